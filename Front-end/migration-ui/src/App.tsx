@@ -12,25 +12,16 @@ function App() {
   const [view, setView] = useState<"classifier" | "template">("classifier");
 
   const [data, setData] = useState<any>(null);
-  const [filteredVMs, setFilteredVMs] = useState<any[]>([]);
+  const [decision, setDecision] = useState<string | null>(null);
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
 
   const handleUpload = (response: any) => {
     setData(response);
-    setFilteredVMs(response.data);
+    setDecision(null);
   };
 
   const filterVMs = (decision: string | null) => {
-    if (!decision) {
-      setFilteredVMs(data.data);
-      return;
-    }
-
-    const filtered = data.data.filter(
-      (vm: any) => vm.decision === decision
-    );
-
-    setFilteredVMs(filtered);
+    setDecision(decision);
   };
 
   const downloadDashboard = async () => {
@@ -92,7 +83,7 @@ function App() {
                     onDownload={downloadDashboard}
                   />
 
-                  <VMTable data={filteredVMs} />
+                  <VMTable sessionId={data.session_id} decision={decision} />
                 </>
               )}
             </>
@@ -65,7 +65,7 @@ const MgnTemplateGenerator = () => {
 
             <input
                 type="file"
-                accept=".csv"
+                accept=".csv,.csv.gz,.csv.zst,.xlsx,.parquet,.pq,.arrow,.feather,.ipc"
                 onChange={(e) =>
                     setSelectedFile(e.target.files?.[0] || null)
                 }
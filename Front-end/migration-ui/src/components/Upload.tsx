@@ -1,5 +1,5 @@
 import { useState } from "react";
-import { uploadCSV } from "../services/api";
+import { createSession } from "../services/api";
 
 interface Props {
   onUpload: (data: any) => void;
@@ -18,8 +18,8 @@ export default function Upload({ onUpload, setSelectedFile }: Props) {
     setLoading(true);
 
     try {
-      const data = await uploadCSV(file);
-      onUpload(data);
+      // Rows stay on the server; the table pages through them
+      onUpload(await createSession(file));
     } catch {
       alert("Upload failed");
     }
@@ -29,7 +29,7 @@ export default function Upload({ onUpload, setSelectedFile }: Props) {
 
   return (
     <div style={{ marginBottom: 20 }}>
-      <input type="file" accept=".csv" onChange={handleFile} />
+      <input type="file" accept=".csv,.csv.gz,.csv.zst,.xlsx,.parquet,.pq,.arrow,.feather,.ipc" onChange={handleFile} />
       {loading && <p>Classifying VMs...</p>}
     </div>
   );
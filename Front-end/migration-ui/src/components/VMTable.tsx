@@ -1,35 +1,145 @@
+import { isAxiosError } from "axios";
+import { useEffect, useState } from "react";
+import { fetchSessionRows } from "../services/api";
 import type { VM } from "../types/vm";
 
 interface Props {
-  data: VM[];
+  sessionId: string;
+  decision: string | null;
 }
 
-export default function VMTable({ data }: Props) {
+const PAGE_SIZE = 100;
+
+const COLUMNS: [keyof VM, string][] = [
+  ["VM Name", "VM"],
+  ["OS", "OS"],
+  ["decision", "Decision"],
+  ["risk", "Risk"],
+  ["strategy", "Strategy"],
+  ["reason", "Reason"],
+];
+
+// Shows one server-side page at a time; filter and sort run on the server.
+// Pages are walked with the API's cursors: cursors[i] fetches page i
+// (null for the first), so Prev just steps back along the trail. The
+// trail belongs to one query — a cursor is only valid for the session,
+// filter and sort it came from — so a new query starts on page one
+// in the same render, never with the old query's cursor.
+export default function VMTable({ sessionId, decision }: Props) {
+  const [rows, setRows] = useState<VM[]>([]);
+  const [total, setTotal] = useState(0);
+  const [offset, setOffset] = useState(0);
+  // next_cursor of the page it was fetched for; stale while another loads
+  const [next, setNext] = useState<{ page: string; cursor: string | null }>({
+    page: "",
+    cursor: null,
+  });
+  const [sort, setSort] = useState<string | undefined>(undefined);
+  const [error, setError] = useState<string | null>(null);
+
+  const query = JSON.stringify([sessionId, decision, sort ?? null]);
+
+  const [trail, setTrail] = useState<{ query: string; cursors: (string | null)[] }>({
+    query,
+    cursors: [null],
+  });
+
+  const cursors = trail.query === query ? trail.cursors : [null];
+  const cursor = cursors[cursors.length - 1];
+  const page = JSON.stringify([query, cursor]);
+  const nextCursor = next.page === page ? next.cursor : null;
+
+  useEffect(() => {
+    let cancelled = false;
+
+    fetchSessionRows(sessionId, {
+      cursor: cursor ?? undefined,
+      limit: PAGE_SIZE,
+      sort,
+      decision: decision ?? undefined,
+    })
+      .then((result) => {
+        if (cancelled) return;
+        setRows(result.data);
+        setTotal(result.total);
+        setOffset(result.offset);
+        setNext({ page, cursor: result.next_cursor });
+        setError(null);
+      })
+      .catch((err) => {
+        if (cancelled) return;
+        setRows([]);
+        setTotal(0);
+        setOffset(0);
+        setNext({ page, cursor: null });
+        setError(
+          isAxiosError(err) && err.response?.status === 404
+            ? "This session has expired. Upload the inventory again."
+            : "Could not load VMs."
+        );
+      });
+
+    return () => {
+      cancelled = true;
+    };
+  }, [sessionId, decision, sort, cursor, page]);
+
+  const toggleSort = (column: string) => {
+    setSort(sort === column ? `-${column}` : column);
+  };
+
   return (
-    <table border={1} cellPadding={8}>
-      <thead>
-        <tr>
-          <th>VM</th>
-          <th>OS</th>
-          <th>Decision</th>
-          <th>Risk</th>
-          <th>Strategy</th>
-          <th>Reason</th>
-        </tr>
-      </thead>
-
-      <tbody>
-        {data.map((vm, i) => (
-          <tr key={i}>
-            <td>{vm["VM Name"]}</td>
-            <td>{vm.OS}</td>
-            <td>{vm.decision}</td>
-            <td>{vm.risk}</td>
-            <td>{vm.strategy}</td>
-            <td>{vm.reason}</td>
+    <>
+      {error && <p style={{ color: "crimson" }}>{error}</p>}
+
+      <table border={1} cellPadding={8}>
+        <thead>
+          <tr>
+            {COLUMNS.map(([column, label]) => (
+              <th
+                key={column}
+                onClick={() => toggleSort(column)}
+                style={{ cursor: "pointer" }}
+              >
+                {label}
+                {sort === column && " ▲"}
+                {sort === `-${column}` && " ▼"}
+              </th>
+            ))}
           </tr>
-        ))}
-      </tbody>
-    </table>
+        </thead>
+
+        <tbody>
+          {rows.map((vm, i) => (
+            <tr key={offset + i}>
+              <td>{vm["VM Name"]}</td>
+              <td>{vm.OS}</td>
+              <td>{vm.decision}</td>
+              <td>{vm.risk}</td>
+              <td>{vm.strategy}</td>
+              <td>{vm.reason}</td>
+            </tr>
+          ))}
+        </tbody>
+      </table>
+
+      <div style={{ marginTop: 12 }}>
+        <button
+          disabled={cursors.length === 1}
+          onClick={() => setTrail({ query, cursors: cursors.slice(0, -1) })}
+        >
+          ‹ Prev
+        </button>
+        <span style={{ margin: "0 12px" }}>
+          {total ? offset + 1 : 0}–{offset + rows.length} of {total}
+        </span>
+        <button
+          disabled={!nextCursor}
+          onClick={() => nextCursor && setTrail({ query, cursors: [...cursors, nextCursor] })}
+        >
+          Next ›
+        </button>
+      </div>
+    </>
   );
 }
@@ -1,21 +1,40 @@
 import axios from "axios";
+import type { VM } from "../types/vm";
 
 const API = axios.create({
   baseURL: "https://orthodox-marie-jeanne-aswinxo-b6a366c1.koyeb.app",
 });
 
-export const uploadCSV = async (file: File) => {
+// Classifies server-side and keeps the rows there; the table then
+// fetches one page at a time.
+export const createSession = async (
+  file: File
+): Promise<{ session_id: string; summary: Record<string, number>; total: number }> => {
   const formData = new FormData();
   formData.append("file", file);
 
-  const response = await API.post("/classifier/classify", formData, {
-    headers: {
-      "Content-Type": "multipart/form-data",
-    },
-  });
+  const response = await API.post("/classifier/sessions", formData);
 
   return response.data;
 };
+
+export interface SessionPage {
+  total: number;
+  offset: number;
+  limit: number;
+  next_cursor: string | null;
+  data: VM[];
+}
+
+export const fetchSessionRows = async (
+  sessionId: string,
+  params: { cursor?: string; limit?: number; sort?: string; decision?: string }
+): Promise<SessionPage> => {
+  const response = await API.get(`/classifier/sessions/${sessionId}/rows`, { params });
+
+  return response.data;
+};
+
 export const exportDashboard = async (file: File) => {
   const formData = new FormData();
   formData.append("file", file);
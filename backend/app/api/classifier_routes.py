@@ -1,84 +1,322 @@
-from fastapi import APIRouter, UploadFile, File
-from fastapi.responses import StreamingResponse
-import pandas as pd
-import io
+import hashlib
+import json
+from typing import List
 
-from app.classifier import classify_os
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app import classifier
+from app.classifier import cache_stats, reload_rules, rules_status
+from app.encoding import dumps, encoded_response, negotiate
+from app.inventory import (
+    SOURCE_COLUMN,
+    ColumnarResult,
+    DecisionSummary,
+    classify_partition,
+    classify_source_partition,
+    columnar_partition,
+    frame_partition,
+    frame_source_partition,
+    inventory_sources,
+    iter_ndjson,
+    partitions,
+    source_partitions,
+)
+from app.api.job_routes import job_links
+from app.jobs import JOBS, run_classify_job
+from app.result_cache import RESULT_CACHE, cached_response, upload_digest
+from app.workers import map_partitions, upload_suffix
+from app.dashboard_export import (
+    EXPORT_COLUMNS,
+    DashboardWorkbook,
+    XLSX_MEDIA_TYPE,
+    iter_spooled,
+    spool_file,
+)
 
 router = APIRouter()
 
+NDJSON = "application/x-ndjson"
+COLUMNAR = "application/vnd.migration.columnar+json"
+
 
 # ✅ CLASSIFY ROUTE
 @router.post("/classify")
-async def classify(file: UploadFile = File(...)):
+async def classify(request: Request, file: UploadFile = File(...)):
+    """
+    Content negotiation:
+        Accept: application/x-ndjson            rows streamed as classified
+        Accept: application/vnd.migration.columnar+json
+                                                dictionary-encoded columns
+                                                (see ColumnarResult)
+        otherwise                               {"summary", "total", "data"}
+    Bodies are gzip / brotli compressed when Accept-Encoding allows.
+    """
 
-    df = pd.read_csv(file.file)
+    accept = request.headers.get("accept", "")
+    encoding = request.headers.get("accept-encoding")
 
-    results = []
+    # one snapshot for the whole request — every partition is pinned to it
+    rules_version = classifier.RULES.version
 
-    for _, row in df.iterrows():
+    # Opt-in streaming via content negotiation
+    if NDJSON in accept:
+        return _ndjson_response(file, rules_version)
 
-        os_value = str(row.get("Guest OS", ""))
+    columnar = COLUMNAR in accept
+    media_type = COLUMNAR if columnar else "application/json"
 
-        classification = classify_os(os_value)
+    # Same bytes + same rules → serve the stored response
+    key = RESULT_CACHE.key(
+        "classify-columnar" if columnar else "classify",
+        await upload_digest(file.file),
+        rules_version=rules_version,
+    )
+    cached = RESULT_CACHE.get(key)
 
-        results.append({
-            "VM Name": row.get("Name"),
-            "OS": os_value,
-            "CPU": row.get("CPU"),
-            "RAM": row.get("RAM"),
-            "Power State": row.get("Power State"),
-            **classification
-        })
+    if cached:
 
-    result_df = pd.DataFrame(results)
+        if not negotiate(encoding):
+            return cached_response(cached, media_type)
 
-    summary = result_df["decision"].value_counts().to_dict()
+        body = await run_in_threadpool(_read, cached)
 
-    return {
-        "summary": summary,
-        "total": len(result_df),
-        "data": results
-    }
+        return await run_in_threadpool(encoded_response, body, media_type, encoding)
 
+    if columnar:
 
-# ✅ EXPORT ROUTE
-@router.post("/export-dashboard")
-async def export_dashboard(file: UploadFile = File(...)):
+        result = ColumnarResult()
+
+        async for part in map_partitions(columnar_partition, partitions(file.file, rules_version)):
+            result.add(part)
+
+        content = result.as_dict()
+
+    else:
+
+        summary = DecisionSummary()
+        data = []
+
+        async for records, counts in map_partitions(classify_partition, partitions(file.file, rules_version)):
+            summary.add_counts(counts)
+            data.extend(records)
+
+        content = {
+            "summary": summary.as_dict(),
+            "total": summary.total,
+            "data": data
+        }
+
+    body = await run_in_threadpool(dumps, content)
+
+    await run_in_threadpool(RESULT_CACHE.put_bytes, key, body)
+
+    return await run_in_threadpool(encoded_response, body, media_type, encoding)
 
-    df = pd.read_csv(file.file)
 
-    results = []
+# ✅ STREAMING CLASSIFY ROUTE
+@router.post("/classify/stream")
+async def classify_stream(file: UploadFile = File(...)):
+    """
+    Rows are emitted as they are classified, followed by
+    a trailing {"summary", "total"} record.
+    """
 
-    for _, row in df.iterrows():
+    return _ndjson_response(file, classifier.RULES.version)
 
-        classification = classify_os(str(row.get("Guest OS", "")))
 
-        results.append({
-            "VM Name": row.get("Name"),
-            "OS": row.get("Guest OS"),
-            "CPU": row.get("CPU"),
-            "RAM": row.get("RAM"),
-            "Power State": row.get("Power State"),
-            **classification
-        })
+def _ndjson_response(file: UploadFile, rules_version: str):
+    return StreamingResponse(iter_ndjson(file.file, rules_version), media_type=NDJSON)
 
-    result_df = pd.DataFrame(results)
 
-    output = io.BytesIO()
+# ✅ EXPORT ROUTE
+@router.post("/export-dashboard")
+async def export_dashboard(file: UploadFile = File(...)):
+
+    rules_version = classifier.RULES.version
+
+    key = RESULT_CACHE.key(
+        "export",
+        await upload_digest(file.file),
+        rules_version=rules_version,
+    )
+    cached = RESULT_CACHE.get(key)
+
+    if cached:
+        return cached_response(cached, XLSX_MEDIA_TYPE, "migration_dashboard.xlsx")
+
+    spool = spool_file()
+    workbook = DashboardWorkbook(spool)
 
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+    try:
+        async for result_df in map_partitions(frame_partition, partitions(file.file, rules_version)):
+            await run_in_threadpool(workbook.add, result_df)
 
-        for decision, data in result_df.groupby("decision"):
-            data.to_excel(writer, sheet_name=decision[:31], index=False)
+        await run_in_threadpool(workbook.close)
+        await run_in_threadpool(RESULT_CACHE.put_file, key, spool)
 
-    output.seek(0)
+    except BaseException:
+        spool.close()
+        raise
 
     return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        iter_spooled(spool),
+        media_type=XLSX_MEDIA_TYPE,
         headers={
             "Content-Disposition":
             "attachment; filename=migration_dashboard.xlsx"
         }
     )
+
+
+# ✅ BATCH CLASSIFY ROUTE
+@router.post("/batch")
+async def classify_batch(
+    files: List[UploadFile] = File(...),
+    format: str = Form("json"),
+):
+    """
+    Classify many inventories in one request — CSV files and/or zip
+    archives of CSVs. Partitions of every file share the worker pool,
+    all against one rules version.
+
+    json: merged and per-file summaries, rows tagged with their source file.
+    xlsx: one combined dashboard workbook with a Source File column.
+    """
+
+    if format not in ("json", "xlsx"):
+        raise HTTPException(400, "format must be 'json' or 'xlsx'.")
+
+    # one snapshot for the whole batch — every partition is pinned to it
+    rules_version = classifier.RULES.version
+
+    digests = [
+        (upload.filename, await upload_digest(upload.file))
+        for upload in files
+    ]
+
+    key = RESULT_CACHE.key(
+        "batch",
+        hashlib.sha256(json.dumps(digests).encode("utf-8")).hexdigest(),
+        rules_version=rules_version,
+        format=format,
+    )
+    cached = RESULT_CACHE.get(key)
+
+    if cached:
+        if format == "xlsx":
+            return cached_response(cached, XLSX_MEDIA_TYPE, "migration_dashboard.xlsx")
+        return cached_response(cached, "application/json")
+
+    sources = await run_in_threadpool(inventory_sources, files)
+
+    batch = source_partitions(sources, rules_version)
+
+    if format == "xlsx":
+
+        spool = spool_file()
+        workbook = DashboardWorkbook(spool, columns=[SOURCE_COLUMN] + EXPORT_COLUMNS)
+
+        try:
+            async for result_df in map_partitions(frame_source_partition, batch):
+                await run_in_threadpool(workbook.add, result_df)
+
+            await run_in_threadpool(workbook.close)
+            await run_in_threadpool(RESULT_CACHE.put_file, key, spool)
+
+        except BaseException:
+            spool.close()
+            raise
+
+        return StreamingResponse(
+            iter_spooled(spool),
+            media_type=XLSX_MEDIA_TYPE,
+            headers={
+                "Content-Disposition":
+                "attachment; filename=migration_dashboard.xlsx"
+            }
+        )
+
+    per_file = {name: DecisionSummary() for name, _ in sources}
+    summary = DecisionSummary()
+    data = []
+
+    async for name, records, counts in map_partitions(classify_source_partition, batch):
+        per_file[name].add_counts(counts)
+        summary.add_counts(counts)
+        data.extend(records)
+
+    response = JSONResponse({
+        "rules_version": rules_version,
+        "summary": summary.as_dict(),
+        "total": summary.total,
+        "files": [
+            {"file": name, "summary": file_summary.as_dict(), "total": file_summary.total}
+            for name, file_summary in per_file.items()
+        ],
+        "data": data,
+    })
+
+    await run_in_threadpool(RESULT_CACHE.put_bytes, key, response.body)
+
+    return response
+
+
+# ✅ BACKGROUND JOB ROUTE
+@router.post("/jobs", status_code=202)
+async def classify_job(
+    file: UploadFile = File(...),
+    format: str = Form("json"),
+):
+    """
+    Queue classification of a large inventory. Poll /jobs/{id}
+    and download /jobs/{id}/result when it is done.
+    """
+
+    if format not in ("json", "xlsx"):
+        raise HTTPException(400, "format must be 'json' or 'xlsx'.")
+
+    job = await run_in_threadpool(
+        JOBS.submit,
+        "classify",
+        run_classify_job,
+        file.file,
+        upload_suffix(file),
+        {"format": format},
+    )
+
+    return job_links(job)
+
+
+# ✅ CACHE STATS ROUTE
+@router.get("/cache")
+async def classification_cache():
+    return cache_stats()
+
+
+# ✅ RULES VERSION ROUTE
+@router.get("/rules")
+async def rules_version():
+    return rules_status()
+
+
+# ✅ RULES RELOAD ROUTE
+@router.post("/rules/reload")
+async def rules_reload():
+    """
+    Re-read the rule files now instead of waiting for the next poll.
+    """
+
+    reloaded = await run_in_threadpool(reload_rules)
+    status = rules_status()
+
+    if status["last_error"]:
+        raise HTTPException(422, f"Rules not reloaded: {status['last_error']}")
+
+    return {"reloaded": reloaded, **status}
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from app.jobs import JOBS, DONE
+
+router = APIRouter()
+
+
+def job_links(job):
+    return {
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}",
+        "result_url": f"/jobs/{job.id}/result",
+    }
+
+
+# ✅ JOB STATUS ROUTE
+@router.get("/{job_id}")
+async def job_status(job_id: str):
+    return JOBS.get(job_id).to_dict()
+
+
+# ✅ JOB RESULT ROUTE
+@router.get("/{job_id}/result")
+async def job_result(job_id: str):
+
+    job = JOBS.get(job_id)
+
+    if job.status != DONE:
+        raise HTTPException(409, f"Job is {job.status}, result not available.")
+
+    return FileResponse(
+        job.artifact,
+        media_type=job.media_type,
+        filename=job.filename,
+    )
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+
+from app.metrics import METRICS, PROMETHEUS_MEDIA_TYPE
+
+router = APIRouter()
+
+
+# ✅ METRICS ROUTE
+@router.get("/metrics")
+async def metrics():
+    """
+    Stage timings, request histograms, cache hit rates and peak
+    memory in Prometheus text format.
+    """
+
+    if not METRICS.enabled:
+        raise HTTPException(404, "Metrics are disabled (METRICS_ENABLED=0).")
+
+    return Response(METRICS.render(), media_type=PROMETHEUS_MEDIA_TYPE)
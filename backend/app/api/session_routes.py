@@ -0,0 +1,159 @@
+from typing import List, Optional
+
+import pandas as pd
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app import classifier
+from app.inventory import frame_partition, partitions
+from app.sessions import (
+    CATEGORICAL_COLUMNS,
+    DEFAULT_LIMIT,
+    MAX_LIMIT,
+    SESSIONS,
+    ClassifiedSession,
+    decode_cursor,
+    encode_cursor,
+    parse_filters,
+)
+from app.workers import map_partitions
+
+router = APIRouter()
+
+# Query parameter → categorical column
+FILTER_PARAMS = {
+    "decision": "decision",
+    "strategy": "strategy",
+    "risk": "risk",
+    "os_family": "os_family",
+    "power_state": "Power State",
+}
+
+
+def query_filters(
+    decision: Optional[List[str]] = Query(None),
+    strategy: Optional[List[str]] = Query(None),
+    risk: Optional[List[str]] = Query(None),
+    os_family: Optional[List[str]] = Query(None),
+    power_state: Optional[List[str]] = Query(None),
+):
+    return parse_filters({
+        FILTER_PARAMS["decision"]: decision,
+        FILTER_PARAMS["strategy"]: strategy,
+        FILTER_PARAMS["risk"]: risk,
+        FILTER_PARAMS["os_family"]: os_family,
+        FILTER_PARAMS["power_state"]: power_state,
+    })
+
+
+# ✅ CREATE SESSION ROUTE
+@router.post("", status_code=201)
+async def create_session(file: UploadFile = File(...)):
+    """
+    Classify an upload and keep the result server-side, so the UI
+    can page, filter and group it instead of downloading every row.
+    """
+
+    rules_version = classifier.RULES.version
+
+    frames = [
+        result_df
+        async for result_df in map_partitions(frame_partition, partitions(file.file, rules_version))
+    ]
+
+    if not frames:
+        raise HTTPException(400, "The inventory has no rows.")
+
+    session = await run_in_threadpool(
+        lambda: ClassifiedSession(pd.concat(frames, ignore_index=True), rules_version)
+    )
+
+    session_id = SESSIONS.add(session)
+
+    return {
+        "session_id": session_id,
+        "rules_version": rules_version,
+        "total": len(session),
+        "summary": session.group_counts("decision", None),
+        "columns": session.columns,
+        "filters": {param: session.group_counts(column, None) for param, column in FILTER_PARAMS.items()},
+        "rows_url": f"/classifier/sessions/{session_id}/rows",
+    }
+
+
+# ✅ SESSION ROWS ROUTE
+@router.get("/{session_id}/rows")
+async def session_rows(
+    session_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None,
+    filters=Depends(query_filters),
+):
+    """
+    One page of a session. Filters take repeated or comma-separated
+    values (?risk=HIGH,MEDIUM); sort is a column, "-" for descending.
+    next_cursor continues the same query where this page ended.
+    """
+
+    session = SESSIONS.get(session_id)
+
+    query = {"sort": sort, "filters": filters, "limit": limit}
+
+    if cursor:
+        offset = decode_cursor(cursor, query)
+
+    def page():
+
+        positions = session.positions(sort, session.mask(filters))
+        window = positions[offset:offset + limit]
+
+        return len(positions), session.page(window)
+
+    total, data = await run_in_threadpool(page)
+
+    end = offset + len(data)
+
+    return {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "next_cursor": encode_cursor(end, query) if end < total else None,
+        "data": data,
+    }
+
+
+# ✅ SESSION GROUPS ROUTE
+@router.get("/{session_id}/groups")
+async def session_groups(
+    session_id: str,
+    by: str = Query("decision"),
+    filters=Depends(query_filters),
+):
+    """
+    Counts per value of one categorical column, over the filtered rows.
+    """
+
+    session = SESSIONS.get(session_id)
+
+    column = FILTER_PARAMS.get(by, by)
+
+    if column not in CATEGORICAL_COLUMNS:
+        raise HTTPException(400, f"Cannot group by '{by}'. Choose one of {list(FILTER_PARAMS)}.")
+
+    mask = session.mask(filters)
+
+    return {
+        "by": by,
+        "total": int(mask.sum()) if mask is not None else len(session),
+        "counts": session.group_counts(column, mask),
+    }
+
+
+# ✅ DROP SESSION ROUTE
+@router.delete("/{session_id}", status_code=204)
+async def drop_session(session_id: str):
+
+    if not SESSIONS.remove(session_id):
+        raise HTTPException(404, "Session not found or expired.")
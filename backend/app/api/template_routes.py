@@ -1,14 +1,33 @@
+from typing import Optional
+
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from itertools import chain
+import json
+import os
 import tempfile
 
-from app.template_engine.record_builder import RecordBuilder
-from app.template_engine.mapper import TemplateMapper
-from app.template_engine.validator import TemplateValidator
-from app.template_engine.generator import TemplateGenerator
+from app.api.job_routes import job_links
+from app.dashboard_export import iter_spooled
+from app.input_formats import UNSUPPORTED_MESSAGE, is_supported
+from app.jobs import JOBS, run_template_job
+from app.result_cache import RESULT_CACHE, cached_response, upload_digest
+from app.settings import EXPORT_TMPDIR
+from app.template_engine.pipeline import (
+    ZIP_MEDIA_TYPE,
+    generate_sharded_templates,
+    generate_template_report,
+    stream_template_csv,
+)
+from app.template_engine.sharding import ShardRouter
+from app.workers import run_cpu_bound, spool_upload, upload_suffix
 
 router = APIRouter()
 
+REPORT_FILENAME = "mgn_template_report.zip"
+SHARDS_FILENAME = "mgn_templates.zip"
+
 
 @router.post("/generate-mgn-template")
 async def generate_template(
@@ -17,40 +36,178 @@ async def generate_template(
     region: str = Form(...),
 ):
 
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(400, "Only CSV files are supported.")
+    if not is_supported(file.filename):
+        raise HTTPException(400, UNSUPPORTED_MESSAGE)
 
-    # ⭐ STEP 1 — Extract
-    records = RecordBuilder.build(file.file)
-
-    mapper = TemplateMapper(account_id, region)
-    validator = TemplateValidator()
-    generator = TemplateGenerator()
+    key = RESULT_CACHE.key(
+        "template",
+        await upload_digest(file.file),
+        account_id=account_id,
+        region=region,
+    )
+    cached = RESULT_CACHE.get(key)
 
-    mapped = []
-    mapping_failures = []
+    if cached:
+        return cached_response(cached, "text/csv", "mgn_import_ready.csv")
 
-    # ⭐ STEP 2 — Transform
-    for r in records:
-        try:
-            mapped.append(mapper.map_record(r))
-        except Exception as e:
-            r["mapping_error"] = str(e)
-            mapping_failures.append(r)
+    chunks = stream_template_csv(file.file, account_id, region)
 
-    # ⭐ STEP 3 — Validate
-    ready, failed = validator.validate(mapped)
+    # ⭐ Extract → Transform → Validate up to the first ready row, so
+    # "no valid servers" can still be a 400 before any byte is sent
+    head = await run_in_threadpool(_first_rows, chunks)
 
-    if not ready:
+    if head is None:
         raise HTTPException(400, "No valid servers found.")
 
-    # ⭐ STEP 4 — Stream file safely
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".csv")
+    # the rest is pulled chunk by chunk from a worker thread as the
+    # client reads — nothing is written to disk unless caching is on
+    return StreamingResponse(
+        RESULT_CACHE.tee(key, chain(head, chunks)),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=mgn_import_ready.csv"},
+    )
 
-    generator.write_ready_csv(ready, temp_file.name)
 
-    return FileResponse(
-        temp_file.name,
-        media_type="text/csv",
-        filename="mgn_import_ready.csv",
+# ✅ VALIDATION REPORT ROUTE
+@router.post("/generate-mgn-report")
+async def generate_report(
+    file: UploadFile = File(...),
+    account_id: str = Form(...),
+    region: str = Form(...),
+):
+    """
+    One pass, one download: a zip with the import-ready CSV, the
+    rejected rows and a JSON summary.
+    """
+
+    if not is_supported(file.filename):
+        raise HTTPException(400, UNSUPPORTED_MESSAGE)
+
+    key = RESULT_CACHE.key(
+        "template-report",
+        await upload_digest(file.file),
+        account_id=account_id,
+        region=region,
+    )
+    cached = RESULT_CACHE.get(key)
+
+    if cached:
+        return cached_response(cached, ZIP_MEDIA_TYPE, REPORT_FILENAME)
+
+    return await _zip_response(
+        key, REPORT_FILENAME, file, generate_template_report, account_id, region
+    )
+
+
+# ✅ MULTI-ACCOUNT ROUTE
+@router.post("/generate-mgn-shards")
+async def generate_shards(
+    file: UploadFile = File(...),
+    account_id: Optional[str] = Form(None),
+    region: Optional[str] = Form(None),
+    routing: Optional[str] = Form(None),
+):
+    """
+    One upload, many MGN targets. Rows are routed by their own
+    account / region columns, then by the `routing` rules (JSON,
+    see ShardRouter.from_spec), then by account_id / region.
+    Returns a zip with one import CSV per account / region pair.
+    """
+
+    if not is_supported(file.filename):
+        raise HTTPException(400, UNSUPPORTED_MESSAGE)
+
+    try:
+        spec = json.loads(routing) if routing else None
+        ShardRouter.from_spec(account_id, region, spec)
+    except ValueError as e:
+        raise HTTPException(400, f"Invalid routing: {e}")
+
+    key = RESULT_CACHE.key(
+        "template-shards",
+        await upload_digest(file.file),
+        account_id=account_id,
+        region=region,
+        routing=spec,
+    )
+    cached = RESULT_CACHE.get(key)
+
+    if cached:
+        return cached_response(cached, ZIP_MEDIA_TYPE, SHARDS_FILENAME)
+
+    return await _zip_response(
+        key, SHARDS_FILENAME, file, generate_sharded_templates, account_id, region, spec
     )
+
+
+# ✅ BACKGROUND JOB ROUTE
+@router.post("/jobs", status_code=202)
+async def template_job(
+    file: UploadFile = File(...),
+    account_id: str = Form(...),
+    region: str = Form(...),
+    format: str = Form("csv"),
+):
+
+    if not is_supported(file.filename):
+        raise HTTPException(400, UNSUPPORTED_MESSAGE)
+
+    if format not in ("csv", "zip"):
+        raise HTTPException(400, "format must be 'csv' or 'zip'.")
+
+    job = await run_in_threadpool(
+        JOBS.submit,
+        "template",
+        run_template_job,
+        file.file,
+        upload_suffix(file),
+        {"account_id": account_id, "region": region, "format": format},
+    )
+
+    return job_links(job)
+
+
+async def _zip_response(key, filename, file, build, *args):
+    """
+    Run build(source_path, *args, zip_path) in the worker pool and
+    stream the archive back, caching it on the way.
+    """
+
+    source = await run_in_threadpool(spool_upload, file.file, upload_suffix(file))
+
+    with tempfile.NamedTemporaryFile(dir=EXPORT_TMPDIR, suffix=".zip", delete=False) as report:
+        pass
+
+    try:
+        await run_cpu_bound(build, source, *args, report.name)
+
+        # the open handle outlives the unlinked path
+        archive = open(report.name, "rb")
+
+    finally:
+        os.remove(source)
+        os.remove(report.name)
+
+    try:
+        await run_in_threadpool(RESULT_CACHE.put_file, key, archive)
+
+    except BaseException:
+        archive.close()
+        raise
+
+    return StreamingResponse(
+        iter_spooled(archive),
+        media_type=ZIP_MEDIA_TYPE,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+def _first_rows(chunks):
+    """
+    [header, first rows] of a template stream, or None if no server is ready.
+    """
+
+    header = next(chunks)
+    first = next(chunks, None)
+
+    return None if first is None else [header, first]
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class ClassificationCache:
+    """
+    Bounded LRU cache in front of classify_os.
+
+    Keyed on the cleaned Guest OS string. Every lookup carries the
+    rules it is valid for — when the loaded rules change, all cached
+    decisions are dropped before the lookup.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+
+        self._data = OrderedDict()
+        self._rules = None
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+
+    def get(self, key, rules):
+
+        with self._lock:
+
+            self._bind(rules)
+
+            value = self._data.get(key)
+
+            if value is None:
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def put(self, key, value, rules):
+
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+
+            self._bind(rules)
+
+            self._data[key] = value
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+
+        with self._lock:
+            self._drop()
+
+    def stats(self):
+
+        with self._lock:
+
+            lookups = self.hits + self.misses
+
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    # -----------------------------
+    # Rules Binding
+    # -----------------------------
+
+    def _bind(self, rules):
+        """
+        Compare by identity — rules are swapped, never edited in place.
+        """
+
+        if self._rules is rules:
+            return
+
+        self._drop()
+        self._rules = rules
+
+    def _drop(self):
+
+        if self._data:
+            self.invalidations += 1
+
+        self._data.clear()
@@ -1,164 +1,216 @@
-import re
-from app.rules_loader import load_rules
+import pandas as pd
+from fastapi import HTTPException
+
+from app.rule_registry import RuleRegistry
+from app.os_fingerprint import parse_os
+from app.classification_cache import ClassificationCache
+from app.metrics import METRICS
+from app.settings import CLASSIFY_CACHE_SIZE
 
 
 # ------------------------------------------------
-# LOAD RULES
+# CLASSIFICATION CACHE
 # ------------------------------------------------
 
-MGN_RULES = load_rules("rules/mgn_rules.yaml")
-VMIE_RULES = load_rules("rules/vmie_rules.yaml")
+_CACHE = ClassificationCache(CLASSIFY_CACHE_SIZE)
 
+METRICS.cache("classify", lambda: (_CACHE.hits, _CACHE.misses))
 
-# ------------------------------------------------
-# DECISION HELPERS
-# ------------------------------------------------
 
-def strategy_map(decision):
-    return {
-        "MGN_SUPPORTED": "REHOST",
-        "MGN_SUPPORTED_WITH_CONDITION": "REHOST_WITH_UPGRADE",
-        "VM_IMPORT_EXPORT": "LEGACY_REHOST",
-        "ACTION_REQUIRED": "MANUAL_VALIDATION",
-        "NEEDS_REVIEW": "MANUAL_CHECK",
-        "REBUILD_REQUIRED": "REPLATFORM"
-    }[decision]
+def cache_stats():
+    """
+    Lookups across the server and its pool workers. Each process
+    keeps its own entries, so size, evictions and invalidations
+    are the server's.
+    """
 
+    stats = _CACHE.stats()
+
+    worker_hits, worker_misses = METRICS.worker_lookups("classify")
+
+    stats["hits"] += worker_hits
+    stats["misses"] += worker_misses
+
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+
+    stats["workers"] = {"hits": worker_hits, "misses": worker_misses}
+
+    return stats
 
-def decision(type, risk, reason):
-    return {
-        "decision": type,
-        "strategy": strategy_map(type),
-        "risk": risk,
-        "reason": reason
-    }
+
+def clear_cache():
+    _CACHE.clear()
 
 
 # ------------------------------------------------
-# NORMALIZE OS FAMILY
+# LOAD RULES
 # ------------------------------------------------
+# The registry re-reads rules/*.yaml when they change. Each swap
+# republishes the globals below; readers take `rules = RULES` once
+# and pass that snapshot down.
 
-def normalize_family(os_string: str):
+REGISTRY = RuleRegistry()
 
-    os_string = os_string.lower()
 
-    if "red hat" in os_string or "rhel" in os_string:
-        return "rhel"
+def _publish(rules):
 
-    if "centos" in os_string:
-        return "centos"
+    global MGN_RULES, VMIE_RULES, RULES
 
-    if "oracle" in os_string:
-        return "oracle"
+    MGN_RULES, VMIE_RULES = REGISTRY.raw
+    RULES = rules
 
-    if "rocky" in os_string:
-        return "rocky"
+    _CACHE.clear()
 
-    if "amazon linux" in os_string:
-        return "amazon"
 
-    if "suse" in os_string:
-        return "sles"
+REGISTRY.on_swap(_publish)
 
-    if "ubuntu" in os_string:
-        return "ubuntu"
+# Validated + indexed at import — malformed rules fail at startup
+REGISTRY.load()
 
-    if "debian" in os_string:
-        return "debian"
 
-    if "windows" in os_string:
-        return "windows"
+def reload_rules():
+    """
+    Re-read and recompile both rule files now. A malformed file
+    leaves the active rules untouched (see REGISTRY.last_error).
+    """
 
-    return None
+    return REGISTRY.reload(force=True)
 
 
-# ------------------------------------------------
-# VERSION EXTRACTION (SAFE + NORMALIZED)
-# ------------------------------------------------
+def rules_status():
+    return REGISTRY.status()
 
-def extract_version(os_string):
 
-    os_string = os_string.lower()
+def rules_for(version):
+    """
+    The compiled rules of exactly the version a request started on.
 
-    # Remove architecture
-    os_string = re.sub(r"\b(32|64)[-\s]?bit\b", "", os_string)
+    Every partition task of a request is pinned to that version. A pool
+    worker that has not loaded it yet (it lags behind the parent's
+    poller) checks the rule files once; if they have already moved past
+    that version, the task fails with a retryable 503 instead of
+    classifying part of the request against other rules.
+    """
 
-    # Remove brackets
-    os_string = re.sub(r"\(.*?\)", "", os_string)
+    rules = REGISTRY.table(version)
 
-    # ⭐ Handle Windows R2
-    if "r2" in os_string:
-        year_match = re.search(r"20\d{2}", os_string)
-        if year_match:
-            return int(year_match.group()) + 1  # treat R2 as newer
+    if rules is None:
+        REGISTRY.reload()
+        rules = REGISTRY.table(version)
 
-    match = re.search(r"\b(20\d{2}|\d{1,2}\.\d+|\d{1,2})\b", os_string)
+    if rules is None:
+        raise HTTPException(
+            503,
+            f"Classification rules changed while the request ran "
+            f"(started on {version}, now {RULES.version}). Retry the request.",
+            headers={"Retry-After": "1"},
+        )
 
-    if not match:
-        return None
+    return rules
 
-    return int(float(match.group()))  # normalize ALWAYS
+
+# ------------------------------------------------
+# DECISION HELPERS
+# ------------------------------------------------
+
+def strategy_map(decision):
+    return {
+        "MGN_SUPPORTED": "REHOST",
+        "MGN_SUPPORTED_WITH_CONDITION": "REHOST_WITH_UPGRADE",
+        "VM_IMPORT_EXPORT": "LEGACY_REHOST",
+        "ACTION_REQUIRED": "MANUAL_VALIDATION",
+        "NEEDS_REVIEW": "MANUAL_CHECK",
+        "REBUILD_REQUIRED": "REPLATFORM"
+    }[decision]
+
+
+def decision(type, risk, reason):
+    return {
+        "decision": type,
+        "strategy": strategy_map(type),
+        "risk": risk,
+        "reason": reason
+    }
 
 
 # ------------------------------------------------
-# SERVICE PACK EXTRACTION
+# OS STRING PARSING
 # ------------------------------------------------
+# All parsing lives in app.os_fingerprint — these
+# helpers are kept for callers of the old API.
 
-def extract_service_pack(os_string):
+def normalize_family(os_string: str):
+    return parse_os(os_string).family
 
-    match = re.search(r"sp\s?(\d+)", os_string.lower())
 
-    if match:
-        return int(match.group(1))
+def extract_version(os_string):
+    return parse_os(os_string).version
 
-    return None
+
+def extract_service_pack(os_string):
+    return parse_os(os_string).service_pack
 
 
 # ------------------------------------------------
 # VM IMPORT SUPPORT CHECK
 # ------------------------------------------------
 
-def vm_import_supported(family):
+def vm_import_supported(family, rules=None):
 
     if family == "windows":
         return True
 
-    return family in VMIE_RULES.get("linux_families_supported", [])
+    return family in (rules or RULES).vm_import_families
 
 
 # ------------------------------------------------
 # MAIN CLASSIFIER
 # ------------------------------------------------
 
-def classify_os(os_string):
+def classify_os(os_string, rules=None):
+    """
+    Cached entry point. Inventories repeat a few hundred distinct
+    Guest OS strings across thousands of VMs, so each distinct
+    string is only run through the rules once.
+
+    rules: a RuleTable snapshot; defaults to the active one.
+    """
+
+    key = os_string.lower().strip()
+    rules = rules or RULES
+
+    result = _CACHE.get(key, rules)
+
+    if result is None:
+        result = _classify_uncached(key, rules)
+        _CACHE.put(key, result, rules)
 
-    os_lower = os_string.lower()
+    # callers may mutate the decision dict — never hand out the cached one
+    return dict(result)
+
+
+def _classify_uncached(os_string, table):
+
+    fingerprint = parse_os(os_string)
 
     # ------------------------------------------------
     # HARD BLOCK — 32bit Linux
     # ------------------------------------------------
 
-    if "32-bit" in os_lower and "windows" not in os_lower:
+    if fingerprint.bits == 32 and fingerprint.platform != "WINDOWS":
         return decision(
             "REBUILD_REQUIRED",
             "CRITICAL",
             "32-bit Linux is not supported by AWS MGN"
         )
 
-    # Clean metadata
-    os_lower = re.sub(r"\(.*?\)", "", os_lower)
-
-    junk = ["or later", "datacenter", "standard", "enterprise"]
-
-    for j in junk:
-        os_lower = os_lower.replace(j, "")
-
     # ------------------------------------------------
     # DETECT FAMILY + VERSION
     # ------------------------------------------------
 
-    family = normalize_family(os_lower)
-    version = extract_version(os_lower)
+    family = fingerprint.family
+    version = fingerprint.version
 
     if not family:
         return decision(
@@ -174,7 +226,7 @@ def classify_os(os_string):
             "OS detected but version missing"
         )
 
-    rules = MGN_RULES.get(family)
+    rules = table.family(family)
 
     if not rules:
         return decision(
@@ -187,16 +239,13 @@ def classify_os(os_string):
     # ⭐⭐⭐ SPECIAL RULES — HIGHEST PRIORITY
     # ====================================================
 
-    special_rules = rules.get("special_rules", {})
-    version_key = int(version)
-
-    if version_key in special_rules:
+    rule = rules.special_rules.get(int(version))
 
-        rule = special_rules[version_key]
+    if rule is not None:
 
         if "min_sp" in rule:
 
-            sp = extract_service_pack(os_lower)
+            sp = fingerprint.service_pack
 
             # Missing SP → NEEDS REVIEW
             if sp is None:
@@ -227,13 +276,11 @@ def classify_os(os_string):
 
     if family == "windows":
 
-        is_server = "server" in os_lower or version >= 2000
+        is_server = fingerprint.server or version >= 2000
 
         if is_server:
 
-            low, high = rules["server_supported_range"]
-
-            if low <= version <= high:
+            if version in rules.server_supported:
                 return decision(
                     "MGN_SUPPORTED",
                     "LOW",
@@ -242,14 +289,14 @@ def classify_os(os_string):
 
         else:
 
-            if version in rules.get("client_supported", []):
+            if version in rules.clients:
                 return decision(
                     "MGN_SUPPORTED",
                     "LOW",
                     "Supported Windows Client"
                 )
 
-        if version in rules.get("conditional", []):
+        if version in rules.conditional:
             return decision(
                 "MGN_SUPPORTED_WITH_CONDITION",
                 "MEDIUM",
@@ -263,33 +310,19 @@ def classify_os(os_string):
         )
 
     # ====================================================
-    # LINUX SUPPORT — MINOR RANGES FIRST
+    # LINUX SUPPORT
     # ====================================================
 
-    if "supported_minor_ranges" in rules:
-
-        for low, high in rules["supported_minor_ranges"]:
-            if low <= version <= high:
-                return decision(
-                    "MGN_SUPPORTED",
-                    "LOW",
-                    "Supported by AWS MGN"
-                )
-
-    # Standard range
-    if "supported_range" in rules:
-
-        low, high = rules["supported_range"]
-
-        if low <= version <= high:
-            return decision(
-                "MGN_SUPPORTED",
-                "LOW",
-                "Supported by AWS MGN"
-            )
+    # minor ranges + standard range, merged at compile time
+    if version in rules.supported:
+        return decision(
+            "MGN_SUPPORTED",
+            "LOW",
+            "Supported by AWS MGN"
+        )
 
     # Conditional
-    if version in rules.get("conditional", []):
+    if version in rules.conditional:
         return decision(
             "MGN_SUPPORTED_WITH_CONDITION",
             "MEDIUM",
@@ -300,7 +333,7 @@ def classify_os(os_string):
     # VM IMPORT FALLBACK
     # ====================================================
 
-    if vm_import_supported(family):
+    if vm_import_supported(family, table):
         return decision(
             "VM_IMPORT_EXPORT",
             "HIGH",
@@ -313,3 +346,43 @@ def classify_os(os_string):
         "UNKNOWN",
         "Unable to determine migration path"
     )
+
+
+# ------------------------------------------------
+# BATCH CLASSIFIER
+# ------------------------------------------------
+
+DECISION_COLUMNS = ["decision", "strategy", "risk", "reason"]
+
+
+def classify_series(os_values: pd.Series, rules=None) -> pd.DataFrame:
+    """
+    Classify a whole Guest OS column at once.
+
+    Each distinct value is classified once and the decision
+    columns are broadcast back onto its rows. The result is
+    aligned to os_values.index. The whole column is classified
+    against one rules snapshot — `rules` (see rules_for) or the
+    active one.
+    """
+
+    if rules is None:
+        # worker processes have no poller thread — pick up rule edits here
+        REGISTRY.refresh()
+        rules = RULES
+
+    with METRICS.stage("classify.os") as stage:
+
+        codes, uniques = pd.factorize(os_values, use_na_sentinel=False)
+
+        table = pd.DataFrame(
+            [classify_os(str(value), rules) for value in uniques],
+            columns=DECISION_COLUMNS,
+        )
+
+        result = table.take(codes)
+        result.index = os_values.index
+
+        stage.rows = len(os_values)
+
+    return result
@@ -0,0 +1,116 @@
+import tempfile
+
+import xlsxwriter
+
+from app.classifier import DECISION_COLUMNS
+from app.inventory import RESULT_COLUMNS
+from app.settings import EXPORT_TMPDIR
+
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXPORT_COLUMNS = list(RESULT_COLUMNS) + DECISION_COLUMNS
+
+
+class DashboardWorkbook:
+    """
+    Writes classified rows into one sheet per decision.
+
+    Runs xlsxwriter in constant_memory mode: each row is flushed
+    to disk as soon as the next one starts, so memory stays flat
+    regardless of inventory size. Sheets appear in the order their
+    decision is first seen.
+    """
+
+    def __init__(self, target, columns=EXPORT_COLUMNS):
+
+        self.columns = list(columns)
+
+        self.workbook = xlsxwriter.Workbook(target, {
+            "constant_memory": True,
+            "tmpdir": EXPORT_TMPDIR,
+        })
+
+        self.header_format = self.workbook.add_format({
+            "bold": True,
+            "border": 1,
+            "align": "center",
+            "valign": "top",
+        })
+
+        # decision → [worksheet, next row]
+        self.sheets = {}
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+
+    def add(self, result_df):
+        """
+        Append a classified chunk. Rows keep their input order per sheet.
+        """
+
+        frame = result_df[self.columns]
+        frame = frame.astype(object).where(frame.notna(), None)
+
+        for decision, rows in frame.groupby("decision", sort=False):
+
+            sheet = self._sheet(decision)
+            worksheet, row = sheet
+
+            for values in rows.itertuples(index=False, name=None):
+                worksheet.write_row(row, 0, values)
+                row += 1
+
+            sheet[1] = row
+
+    def close(self):
+        self.workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -----------------------------
+    # Sheets
+    # -----------------------------
+
+    def _sheet(self, decision):
+
+        if decision not in self.sheets:
+
+            worksheet = self.workbook.add_worksheet(decision[:31])
+            worksheet.write_row(0, 0, self.columns, self.header_format)
+
+            self.sheets[decision] = [worksheet, 1]
+
+        return self.sheets[decision]
+
+
+# ------------------------------------------------
+# SPOOLED OUTPUT
+# ------------------------------------------------
+
+def spool_file():
+    """
+    Anonymous temp file — removed by the OS once closed.
+    """
+
+    return tempfile.TemporaryFile(dir=EXPORT_TMPDIR)
+
+
+def iter_spooled(handle, chunk_size: int = 64 * 1024):
+    """
+    Stream a spooled file from the start, closing it when done.
+    """
+
+    try:
+        handle.seek(0)
+
+        while chunk := handle.read(chunk_size):
+            yield chunk
+
+    finally:
+        handle.close()
@@ -0,0 +1,117 @@
+import gzip
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional — falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional — gzip is always available
+    brotli = None
+
+
+# Bodies smaller than this are sent as-is
+COMPRESS_MIN_BYTES = 1024
+
+# Fast settings: these bodies are built per request, not stored
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+# ------------------------------------------------
+# JSON
+# ------------------------------------------------
+
+def dumps(content: Any) -> bytes:
+    """
+    Compact UTF-8 JSON, the same text JSONResponse renders. Uses
+    orjson when installed (numpy arrays serialized natively).
+    """
+
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_numpy_default,
+    ).encode("utf-8")
+
+
+def _numpy_default(value):
+
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# ------------------------------------------------
+# COMPRESSION
+# ------------------------------------------------
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    "br", "gzip" or None for an Accept-Encoding header. q=0 excludes.
+    """
+
+    accepted = set()
+
+    for part in (accept_encoding or "").split(","):
+
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+
+        if q.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+
+        accepted.add(coding.strip().lower())
+
+    if brotli is not None and "br" in accepted:
+        return "br"
+
+    if "gzip" in accepted:
+        return "gzip"
+
+    return None
+
+
+def compress(body: bytes, coding: str) -> bytes:
+
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def encoded_response(
+    body: bytes,
+    media_type: str,
+    accept_encoding: Optional[str],
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    A Response for an already-serialized body, compressed with the
+    best coding the client accepts.
+    """
+
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+
+    coding = negotiate(accept_encoding) if len(body) >= COMPRESS_MIN_BYTES else None
+
+    if coding:
+        body = compress(body, coding)
+        headers["Content-Encoding"] = coding
+
+    return Response(body, media_type=media_type, headers=headers)
@@ -0,0 +1,369 @@
+import os
+from typing import Iterable, Iterator, List, Optional
+
+import pandas as pd
+from fastapi import HTTPException
+
+
+# ------------------------------------------------
+# FORMATS
+# ------------------------------------------------
+
+CSV = "csv"
+PARQUET = "parquet"
+ARROW_FILE = "arrow"
+ARROW_STREAM = "arrow-stream"
+XLSX = "xlsx"
+
+# RVTools puts one row per VM on this sheet; other workbooks use their first
+RVTOOLS_SHEET = "vInfo"
+
+# Leading bytes → (format, CSV compression)
+_MAGIC = (
+    (b"PAR1", PARQUET, None),
+    (b"ARROW1", ARROW_FILE, None),          # Arrow IPC file / Feather v2
+    (b"\xff\xff\xff\xff", ARROW_STREAM, None),
+    (b"\x1f\x8b", CSV, "gzip"),
+    (b"\x28\xb5\x2f\xfd", CSV, "zstd"),
+    (b"PK\x03\x04", XLSX, None),            # Office Open XML is a zip
+)
+
+SUPPORTED_SUFFIXES = (
+    ".csv",
+    ".csv.gz",
+    ".csv.zst",
+    ".parquet",
+    ".pq",
+    ".arrow",
+    ".feather",
+    ".ipc",
+    ".xlsx",
+)
+
+UNSUPPORTED_MESSAGE = (
+    "Only CSV (plain, .gz or .zst), Excel .xlsx (RVTools), Parquet "
+    "or Arrow / Feather files are supported."
+)
+
+
+def is_supported(filename: Optional[str]) -> bool:
+    return bool(filename) and filename.lower().endswith(SUPPORTED_SUFFIXES)
+
+
+def sniff_format(file):
+    """
+    (format, compression) from the first bytes, not the file name —
+    a renamed upload still reads. Always reads from the start and
+    leaves the file rewound.
+    """
+
+    file.seek(0)
+    head = file.read(8)
+    file.seek(0)
+
+    for magic, fmt, compression in _MAGIC:
+        if head.startswith(magic):
+            return fmt, compression
+
+    return CSV, None
+
+
+# ------------------------------------------------
+# READERS
+# ------------------------------------------------
+
+def read_header(file) -> List[str]:
+    """
+    Column names only. Columnar formats read them from the schema,
+    without touching any data. Leaves the file rewound.
+    """
+
+    fmt, compression = sniff_format(file)
+
+    if fmt == CSV:
+        header = pd.read_csv(file, nrows=0, compression=compression).columns.tolist()
+
+    elif fmt == XLSX:
+        header = _xlsx_header(file)
+
+    else:
+        header = _arrow_schema(file, fmt).names
+
+    file.seek(0)
+
+    return header
+
+
+def iter_frames(
+    file,
+    chunksize: int,
+    columns: Optional[Iterable[str]] = None,
+    as_str: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    DataFrames of at most `chunksize` rows, in any supported format.
+
+    columns projects at read time — only those columns are parsed
+    (or, for Parquet, read from disk); names the file lacks are
+    skipped. as_str turns every non-null value into a string, the
+    way dtype=str reads a CSV.
+    """
+
+    fmt, compression = sniff_format(file)
+
+    if fmt == CSV:
+
+        wanted = set(columns) if columns is not None else None
+
+        yield from pd.read_csv(
+            file,
+            usecols=(lambda col: col in wanted) if wanted is not None else None,
+            dtype=str if as_str else None,
+            compression=compression,
+            chunksize=chunksize,
+        )
+        return
+
+    if fmt == XLSX:
+        for df in _xlsx_frames(file, chunksize, columns):
+            yield _stringify(df) if as_str else df
+        return
+
+    for chunk in _arrow_batches(file, fmt, chunksize, columns):
+
+        df = chunk.to_pandas()
+
+        yield _stringify(df) if as_str else df
+
+
+def read_frame(file, columns: Optional[Iterable[str]] = None, as_str: bool = False) -> pd.DataFrame:
+    """
+    Whole-file iter_frames().
+    """
+
+    frames = list(iter_frames(file, 1 << 20, columns, as_str))
+
+    if not frames:
+        # header-only file — keep the columns
+        return pd.DataFrame(columns=[
+            col for col in read_header(file) if columns is None or col in set(columns)
+        ])
+
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+# ------------------------------------------------
+# XLSX
+# ------------------------------------------------
+
+def _xlsx_frames(file, chunksize, columns):
+    """
+    Stream the sheet row by row — openpyxl's read-only mode parses
+    the sheet XML lazily, so only one chunk of rows is held at a time.
+    """
+
+    workbook = _open_workbook(file)
+
+    try:
+        rows = _xlsx_sheet(workbook).iter_rows(values_only=True)
+
+        header = _header_names(next(rows, None))
+        wanted = set(columns) if columns is not None else None
+        keep = [
+            i for i, name in enumerate(header)
+            if wanted is None or name in wanted
+        ]
+        names = [header[i] for i in keep]
+
+        block = []
+
+        for row in rows:
+
+            # blank lines, as read_csv skips them
+            if all(value is None for value in row):
+                continue
+
+            block.append([row[i] if i < len(row) else None for i in keep])
+
+            if len(block) == chunksize:
+                yield pd.DataFrame(block, columns=names)
+                block = []
+
+        if block:
+            yield pd.DataFrame(block, columns=names)
+
+    finally:
+        workbook.close()
+
+
+def _xlsx_header(file) -> List[str]:
+
+    workbook = _open_workbook(file)
+
+    try:
+        row = next(_xlsx_sheet(workbook).iter_rows(max_row=1, values_only=True), None)
+        return _header_names(row)
+
+    finally:
+        workbook.close()
+
+
+def _open_workbook(file):
+
+    try:
+        from openpyxl import load_workbook
+
+    except ImportError:
+        raise HTTPException(
+            status_code=400,
+            detail="Excel input needs openpyxl, which is not installed.",
+        )
+
+    try:
+        # data_only: cached formula results, not the formulas
+        return load_workbook(file, read_only=True, data_only=True)
+
+    except Exception as e:
+        raise HTTPException(400, f"Not a readable .xlsx workbook ({type(e).__name__}).")
+
+
+def _xlsx_sheet(workbook):
+
+    if RVTOOLS_SHEET in workbook.sheetnames:
+        return workbook[RVTOOLS_SHEET]
+
+    return workbook.worksheets[0]
+
+
+def _header_names(row) -> List[str]:
+
+    if not row or all(value is None for value in row):
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+
+    # unnamed columns as pandas names them
+    return [
+        f"Unnamed: {i}" if value is None else str(value)
+        for i, value in enumerate(row)
+    ]
+
+
+# ------------------------------------------------
+# ARROW
+# ------------------------------------------------
+
+def _arrow_batches(file, fmt, chunksize, columns):
+
+    pa = _pyarrow()
+
+    source = _arrow_source(file)
+
+    if fmt == PARQUET:
+
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(source)
+        names = _present(parquet.schema_arrow.names, columns)
+
+        yield from parquet.iter_batches(batch_size=chunksize, columns=names)
+        return
+
+    if fmt == ARROW_FILE:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        reader = pa.ipc.open_stream(source)
+        batches = iter(reader)
+
+    names = _present(reader.schema.names, columns)
+
+    # IPC batches keep the writer's size — regroup them into tables
+    # of exactly `chunksize` rows, zero copy, as the CSV reader would
+    pending, rows = [], 0
+
+    for batch in batches:
+
+        if names is not None:
+            batch = batch.select(names)
+
+        offset = 0
+
+        while offset < batch.num_rows:
+
+            piece = batch.slice(offset, chunksize - rows)
+            pending.append(piece)
+            rows += piece.num_rows
+            offset += piece.num_rows
+
+            if rows == chunksize:
+                yield pa.Table.from_batches(pending)
+                pending, rows = [], 0
+
+    if pending:
+        yield pa.Table.from_batches(pending)
+
+
+def _arrow_schema(file, fmt):
+
+    pa = _pyarrow()
+
+    source = _arrow_source(file)
+
+    if fmt == PARQUET:
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(source).schema_arrow
+
+    if fmt == ARROW_FILE:
+        return pa.ipc.open_file(source).schema
+
+    return pa.ipc.open_stream(source).schema
+
+
+def _arrow_source(file):
+    """
+    Memory-map files that live on disk, so Arrow reads pages
+    straight from the page cache. Anything else is wrapped as-is.
+    """
+
+    pa = _pyarrow()
+
+    path = getattr(file, "name", None)
+
+    # only when the name really is this handle's file — zip members
+    # and spooled uploads carry names that are not paths
+    try:
+        if isinstance(path, str) and os.path.samestat(os.fstat(file.fileno()), os.stat(path)):
+            return pa.memory_map(path)
+    except (AttributeError, OSError, ValueError):
+        pass
+
+    return pa.PythonFile(file, mode="r")
+
+
+def _present(names, columns) -> Optional[List[str]]:
+
+    if columns is None:
+        return None
+
+    wanted = set(columns)
+
+    return [name for name in names if name in wanted]
+
+
+def _stringify(df: pd.DataFrame) -> pd.DataFrame:
+    # typed columns → str, nulls stay NaN for dropna / isna checks
+    return df.apply(lambda col: col.where(col.isna(), col.astype(str)).astype(object))
+
+
+def _pyarrow():
+
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+
+    except ImportError:
+        raise HTTPException(
+            status_code=400,
+            detail="Parquet / Arrow input needs pyarrow, which is not installed.",
+        )
+
+    return pyarrow
@@ -0,0 +1,422 @@
+import json
+import os
+import zipfile
+from collections import Counter
+from contextlib import nullcontext
+from typing import BinaryIO, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from app.classifier import classify_series, rules_for
+from app.input_formats import UNSUPPORTED_MESSAGE, is_supported, iter_frames, read_header
+from app.metrics import METRICS
+from app.settings import CLASSIFY_CHUNK_ROWS, PARTITION_ROWS
+from app.workers import map_partitions
+
+
+# ------------------------------------------------
+# RESULT LAYOUT
+# ------------------------------------------------
+
+# Output column → inventory column
+RESULT_COLUMNS = {
+    "VM Name": "Name",
+    "OS": "Guest OS",
+    "CPU": "CPU",
+    "RAM": "RAM",
+    "Power State": "Power State",
+}
+
+# Inventory column → other (lowercase) names it goes by, e.g. in an
+# RVTools vInfo sheet. An exact match always wins.
+INVENTORY_ALIASES = {
+    "Name": ["name", "vm name", "vm"],
+    "Guest OS": [
+        "guest os",
+        "os",
+        "os according to the configuration file",
+        "os according to the vmware tools",
+    ],
+    "CPU": ["cpu", "cpus"],
+    "RAM": ["ram", "memory"],
+    "Power State": ["power state", "powerstate"],
+}
+
+
+def classify_frame(df, rules=None):
+    """
+    Build the classified result table for an inventory DataFrame.
+    Missing inventory columns come back as None ("" for the OS).
+    rules: a RuleTable snapshot; defaults to the active one.
+    """
+
+    os_values = df["Guest OS"] if "Guest OS" in df else pd.Series(
+        "", index=df.index, dtype=object
+    )
+
+    result_df = pd.DataFrame({
+        output: df[source] if source in df else None
+        for output, source in RESULT_COLUMNS.items()
+    }, index=df.index)
+
+    result_df["OS"] = os_values
+
+    return pd.concat([result_df, classify_series(os_values, rules)], axis=1)
+
+
+# ------------------------------------------------
+# STREAMING INGEST
+# ------------------------------------------------
+
+def read_inventory_chunks(file, chunksize: int = CLASSIFY_CHUNK_ROWS):
+    """
+    Yield the uploaded inventory (CSV, compressed CSV, xlsx, Parquet
+    or Arrow) as DataFrames of at most `chunksize` rows. Only the
+    columns the result table uses are read, under their inventory names.
+    """
+
+    rename = inventory_columns(read_header(file))
+
+    for chunk in METRICS.timed("classify.parse", iter_frames(file, chunksize, columns=rename)):
+        yield chunk.rename(columns=rename)
+
+
+def inventory_columns(header) -> Dict[str, str]:
+    """
+    column as written in the file → inventory column, for the
+    columns the result table uses.
+    """
+
+    normalized = {}
+    for col in header:
+        normalized.setdefault(str(col).strip().lower(), col)
+
+    columns = {}
+
+    for name, aliases in INVENTORY_ALIASES.items():
+
+        if name in header:
+            columns[name] = name
+            continue
+
+        match = next((normalized[a] for a in aliases if a in normalized), None)
+
+        if match is not None and match not in columns:
+            columns[match] = name
+
+    return columns
+
+
+class DecisionSummary:
+    """
+    Incremental decision counts across classified chunks.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.total = 0
+
+    def add(self, result_df):
+        self.add_counts(decision_counts(result_df))
+
+    def add_counts(self, counts):
+        self.counts.update(counts)
+        self.total += sum(counts.values())
+
+    def as_dict(self):
+        # most frequent first — same order value_counts() gives
+        return dict(self.counts.most_common())
+
+
+def decision_counts(result_df):
+    return result_df["decision"].value_counts().to_dict()
+
+
+def json_records(result_df):
+    """
+    Row dicts safe for strict JSON — NaN becomes None.
+    """
+
+    clean = result_df.astype(object).where(result_df.notna(), None)
+
+    return clean.to_dict("records")
+
+
+def ndjson_lines(result_df):
+
+    lines = [json.dumps(row, default=str) for row in json_records(result_df)]
+
+    return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+
+def ndjson_trailer(summary):
+
+    trailer = {"summary": summary.as_dict(), "total": summary.total}
+
+    return (json.dumps(trailer) + "\n").encode("utf-8")
+
+
+# ------------------------------------------------
+# PARTITION TASKS
+# ------------------------------------------------
+# Run inside pool workers — top-level so they pickle. Each takes a
+# (chunk, rules_version) item from partitions() and classifies against
+# exactly that version (see classifier.rules_for).
+
+def frame_partition(item):
+    """
+    Classified frame for one partition.
+    """
+
+    chunk, rules_version = item
+
+    return classify_frame(chunk, rules_for(rules_version))
+
+
+def classify_partition(item):
+    """
+    Classified API records + decision counts for one partition.
+    """
+
+    result_df = frame_partition(item)
+    result_df["OS"] = result_df["OS"].map(str)
+
+    return json_records(result_df), decision_counts(result_df)
+
+
+def ndjson_partition(item):
+    """
+    Encoded NDJSON lines + decision counts for one partition.
+    """
+
+    result_df = frame_partition(item)
+    result_df["OS"] = result_df["OS"].map(str)
+
+    return ndjson_lines(result_df), decision_counts(result_df)
+
+
+def columnar_partition(item):
+    """
+    Columnar result for one partition: plain value columns, the
+    distinct decision tuples seen here and a code per row into them.
+    """
+
+    result_df = frame_partition(item)
+    result_df["OS"] = result_df["OS"].map(str)
+
+    tuples = pd.MultiIndex.from_frame(result_df[DECISION_COLUMNS].astype(object))
+    codes, distinct = pd.factorize(tuples)
+
+    columns = {
+        column: _plain_values(result_df[column])
+        for column in RESULT_COLUMNS
+    }
+
+    return columns, list(distinct), codes.astype(np.int32), decision_counts(result_df)
+
+
+def partitions(file, rules_version: str):
+    """
+    (chunk, rules_version) items for the partition tasks above.
+    """
+
+    for chunk in read_inventory_chunks(file, PARTITION_ROWS):
+        yield chunk, rules_version
+
+
+# ------------------------------------------------
+# COLUMNAR RESPONSE
+# ------------------------------------------------
+
+# One dictionary entry per distinct combination of these
+DECISION_COLUMNS = ["decision", "strategy", "risk", "reason"]
+
+COLUMNAR_FORMAT = "columnar/v1"
+
+
+class ColumnarResult:
+    """
+    Merges columnar partitions into one response body:
+
+        {
+          "format": "columnar/v1",
+          "summary": {...}, "total": n,
+          "decisions": {"columns": [decision, strategy, risk, reason],
+                        "values": [[...], ...]},
+          "columns": {"VM Name": [...], "OS": [...], "CPU": [...],
+                      "RAM": [...], "Power State": [...]},
+          "decision_codes": [0, 0, 3, ...]
+        }
+
+    Row i is columns[*][i] plus decisions.values[decision_codes[i]].
+    A few dozen distinct tuples cover any inventory, so the repeated
+    strings of the row format collapse to one small int per row.
+    """
+
+    def __init__(self):
+        self.summary = DecisionSummary()
+        self.columns = {column: [] for column in RESULT_COLUMNS}
+        self.codes = []
+        self.dictionary = {}
+
+    def add(self, part):
+
+        columns, distinct, codes, counts = part
+
+        self.summary.add_counts(counts)
+
+        for column, values in columns.items():
+            self.columns[column].extend(values)
+
+        # partition-local codes → codes into the merged dictionary
+        remap = np.array(
+            [self.dictionary.setdefault(t, len(self.dictionary)) for t in distinct],
+            dtype=np.int32,
+        )
+
+        self.codes.append(remap[codes] if len(codes) else codes)
+
+    def as_dict(self):
+        return {
+            "format": COLUMNAR_FORMAT,
+            "summary": self.summary.as_dict(),
+            "total": self.summary.total,
+            "decisions": {
+                "columns": DECISION_COLUMNS,
+                "values": [list(t) for t in self.dictionary],
+            },
+            "columns": self.columns,
+            "decision_codes": np.concatenate(self.codes) if self.codes else np.empty(0, np.int32),
+        }
+
+
+def _plain_values(values: pd.Series) -> list:
+    # NaN → None, numpy scalars → Python, for any JSON encoder
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+# ------------------------------------------------
+# NDJSON STREAMING
+# ------------------------------------------------
+
+async def iter_ndjson(file, rules_version: str):
+    """
+    Classify an upload and yield NDJSON bytes, one classified row
+    per line as each partition completes. The last line is the summary:
+        {"summary": {...}, "total": n}
+    """
+
+    summary = DecisionSummary()
+
+    async for lines, counts in map_partitions(ndjson_partition, partitions(file, rules_version)):
+
+        summary.add_counts(counts)
+
+        if lines:
+            yield lines
+
+    yield ndjson_trailer(summary)
+
+
+# ------------------------------------------------
+# MULTI-FILE BATCHES
+# ------------------------------------------------
+
+SOURCE_COLUMN = "Source File"
+
+
+def inventory_sources(uploads) -> List[Tuple[str, Callable[[], BinaryIO]]]:
+    """
+    (name, opener) for every inventory in a batch upload. CSV uploads
+    and other supported files are used as-is; zip uploads contribute
+    each supported member, named "<archive>/<member>".
+    """
+
+    sources = []
+
+    for upload in uploads:
+
+        name = upload.filename or "upload.csv"
+
+        if name.lower().endswith(".zip"):
+
+            try:
+                archive = zipfile.ZipFile(upload.file)
+            except zipfile.BadZipFile:
+                raise HTTPException(400, f"{name} is not a valid zip archive.")
+
+            for member in archive.infolist():
+
+                base = os.path.basename(member.filename)
+
+                if member.is_dir() or base.startswith(".") or not is_supported(base):
+                    continue
+
+                sources.append((
+                    f"{name}/{member.filename}",
+                    lambda archive=archive, member=member: archive.open(member),
+                ))
+
+        elif is_supported(name):
+            sources.append((name, lambda file=upload.file: _rewound(file)))
+
+        else:
+            raise HTTPException(400, f"{name}: {UNSUPPORTED_MESSAGE} Zip archives may hold any of these.")
+
+    if not sources:
+        raise HTTPException(400, "No inventories found in the upload.")
+
+    return sources
+
+
+def source_partitions(sources, rules_version: str):
+    """
+    (name, chunk, rules_version) across all sources, one file after
+    another — the pool classifies partitions of different files at
+    the same time.
+    """
+
+    for name, opener in sources:
+
+        with opener() as file:
+            try:
+                for chunk in read_inventory_chunks(file, PARTITION_ROWS):
+                    yield name, chunk, rules_version
+            except pd.errors.EmptyDataError:
+                continue
+
+
+def classify_source_partition(item):
+    """
+    Pool task: (name, API records, decision counts) for one partition.
+    """
+
+    name, chunk, rules_version = item
+
+    records, counts = classify_partition((chunk, rules_version))
+
+    for record in records:
+        record[SOURCE_COLUMN] = name
+
+    return name, records, counts
+
+
+def frame_source_partition(item):
+    """
+    Pool task: classified frame for one partition, led by its source file.
+    """
+
+    name, chunk, rules_version = item
+
+    result_df = frame_partition((chunk, rules_version))
+    result_df.insert(0, SOURCE_COLUMN, name)
+
+    return result_df
+
+
+def _rewound(file):
+    # the upload stays open — the request owns it
+    file.seek(0)
+    return nullcontext(file)
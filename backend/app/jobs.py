@@ -0,0 +1,515 @@
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app import classifier
+from app.dashboard_export import DashboardWorkbook, XLSX_MEDIA_TYPE
+from app.inventory import DecisionSummary, classify_partition, frame_partition, partitions
+from app.settings import JOB_RETENTION_SECONDS, JOB_STORE_DIR, JOB_WORKERS
+from app.template_engine.pipeline import (
+    ZIP_MEDIA_TYPE,
+    generate_template_csv,
+    generate_template_report,
+)
+from app.workers import collect, imap_partitions, submit_cpu_bound
+
+
+JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# How often a job thread copies worker progress onto its job
+PROGRESS_POLL_SECONDS = 0.5
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+# ------------------------------------------------
+# JOB RECORD
+# ------------------------------------------------
+
+class Job:
+    """
+    One background job. Status lives in memory and is mirrored to
+    <store>/<id>/job.json on every state change.
+    """
+
+    def __init__(self, job_id: str, kind: str, directory: str, params: Dict[str, Any]):
+
+        self.id = job_id
+        self.kind = kind
+        self.directory = directory
+        self.params = params
+
+        self.status = QUEUED
+        self.error = None
+
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        self.rows_processed = 0
+        self.rows_total = None
+        self.bytes_processed = 0
+        self.bytes_total = 0
+
+        self.summary = None
+        self.artifact = None
+        self.media_type = None
+        self.filename = None
+
+        self._lock = Lock()
+
+    # -----------------------------
+    # Progress
+    # -----------------------------
+
+    def progress(
+        self,
+        rows_processed: int,
+        rows_total: Optional[int] = None,
+        bytes_processed: Optional[int] = None,
+    ):
+
+        with self._lock:
+
+            self.rows_processed = rows_processed
+
+            if rows_total is not None:
+                self.rows_total = rows_total
+
+            if bytes_processed is not None:
+                self.bytes_processed = bytes_processed
+
+    def fraction_done(self) -> Optional[float]:
+
+        if self.status == DONE:
+            return 1.0
+
+        if self.rows_total:
+            return min(self.rows_processed / self.rows_total, 1.0)
+
+        if self.bytes_total and self.bytes_processed:
+            return min(self.bytes_processed / self.bytes_total, 1.0)
+
+        return None
+
+    # -----------------------------
+    # Serialization
+    # -----------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+
+        with self._lock:
+
+            now = self.finished_at or time.time()
+            elapsed = now - self.started_at if self.started_at else 0.0
+
+            throughput = self.rows_processed / elapsed if elapsed > 0 else None
+
+            fraction = self.fraction_done()
+            eta = None
+
+            if self.status == RUNNING and fraction:
+                eta = elapsed * (1 - fraction) / fraction
+
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "error": self.error,
+                "params": self.params,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "rows_processed": self.rows_processed,
+                "rows_total": self.rows_total,
+                "progress": fraction,
+                "elapsed_seconds": elapsed,
+                "rows_per_second": throughput,
+                "eta_seconds": eta,
+                "summary": self.summary,
+                "result_ready": self.status == DONE,
+            }
+
+    def save(self):
+
+        state = self.to_dict()
+        state.update({
+            "artifact": self.artifact,
+            "media_type": self.media_type,
+            "filename": self.filename,
+            "bytes_total": self.bytes_total,
+        })
+
+        path = os.path.join(self.directory, "job.json")
+
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, directory: str) -> "Job":
+
+        with open(os.path.join(directory, "job.json"), encoding="utf-8") as f:
+            state = json.load(f)
+
+        job = cls(state["job_id"], state["kind"], directory, state["params"])
+
+        for key in (
+            "status", "error", "created_at", "started_at", "finished_at",
+            "rows_processed", "rows_total", "summary", "artifact",
+            "media_type", "filename", "bytes_total",
+        ):
+            setattr(job, key, state.get(key))
+
+        # Anything not finished died with the previous process
+        if job.status in (QUEUED, RUNNING):
+            job.status = FAILED
+            job.error = "Interrupted by server restart"
+
+        return job
+
+
+# ------------------------------------------------
+# JOB MANAGER
+# ------------------------------------------------
+
+class JobManager:
+    """
+    In-process job queue backed by an on-disk result store.
+    No external broker — JOB_WORKERS threads drain the queue.
+    """
+
+    def __init__(self, root: str = JOB_STORE_DIR, workers: int = JOB_WORKERS):
+
+        self.root = root
+        self.jobs: Dict[str, Job] = {}
+
+        self.workers = max(workers, 1)
+
+        self._lock = Lock()
+        self._executor = None
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+
+    def submit(
+        self,
+        kind: str,
+        runner: Callable[[Job, str], None],
+        upload,
+        suffix: str,
+        params: Dict[str, Any],
+    ) -> Job:
+        """
+        Persist the upload into the job directory and queue runner(job, source_path).
+        """
+
+        self.purge_expired()
+
+        job_id = uuid.uuid4().hex
+        directory = os.path.join(self.root, job_id)
+        os.makedirs(directory)
+
+        source_path = os.path.join(directory, "input" + suffix)
+
+        upload.seek(0)
+        with open(source_path, "wb") as target:
+            shutil.copyfileobj(upload, target, 1024 * 1024)
+
+        job = Job(job_id, kind, directory, params)
+        job.bytes_total = os.path.getsize(source_path)
+        job.save()
+
+        with self._lock:
+            self.jobs[job_id] = job
+
+        self._start().submit(self._run, job, runner, source_path)
+
+        return job
+
+    def get(self, job_id: str) -> Job:
+
+        if not JOB_ID.match(job_id):
+            raise HTTPException(404, "Job not found.")
+
+        with self._lock:
+            job = self.jobs.get(job_id)
+
+        if job:
+            return job
+
+        # Finished jobs from an earlier process are still on disk
+        directory = os.path.join(self.root, job_id)
+
+        if not os.path.exists(os.path.join(directory, "job.json")):
+            raise HTTPException(404, "Job not found.")
+
+        job = Job.load(directory)
+
+        with self._lock:
+            self.jobs[job_id] = job
+
+        return job
+
+    def purge_expired(self):
+
+        if not os.path.isdir(self.root):
+            return
+
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+
+        for job_id in os.listdir(self.root):
+
+            directory = os.path.join(self.root, job_id)
+            state = os.path.join(directory, "job.json")
+
+            try:
+                expired = os.path.getmtime(state) < cutoff
+            except OSError:
+                continue
+
+            with self._lock:
+                job = self.jobs.get(job_id)
+
+                if not expired or (job and job.status in (QUEUED, RUNNING)):
+                    continue
+
+                self.jobs.pop(job_id, None)
+
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def shutdown(self):
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _start(self) -> ThreadPoolExecutor:
+        # started on first use, so the app can shut down and start again
+
+        with self._lock:
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="job",
+                )
+
+            return self._executor
+
+    # -----------------------------
+    # Execution
+    # -----------------------------
+
+    def _run(self, job: Job, runner, source_path: str):
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.save()
+
+        try:
+            runner(job, source_path)
+            job.status = DONE
+
+        except HTTPException as e:
+            job.status = FAILED
+            job.error = e.detail
+
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+
+        finally:
+            job.finished_at = time.time()
+            job.save()
+
+            # Input is no longer needed once the job settles
+            try:
+                os.remove(source_path)
+            except OSError:
+                pass
+
+
+# ------------------------------------------------
+# RUNNERS
+# ------------------------------------------------
+
+def run_classify_job(job: Job, source_path: str):
+    """
+    Classify an inventory into a JSON document (same shape as
+    /classifier/classify) or a dashboard workbook. Partitions are
+    classified in the process pool, against the rules active when
+    the job started.
+    """
+
+    summary = DecisionSummary()
+    rules_version = classifier.RULES.version
+
+    with open(source_path, "rb") as source:
+
+        items = partitions(source, rules_version)
+
+        if job.params["format"] == "xlsx":
+
+            job.artifact = os.path.join(job.directory, "migration_dashboard.xlsx")
+            job.media_type = XLSX_MEDIA_TYPE
+
+            with DashboardWorkbook(job.artifact) as workbook:
+                for result_df in imap_partitions(frame_partition, items):
+                    workbook.add(result_df)
+                    summary.add(result_df)
+                    job.progress(summary.total, bytes_processed=source.tell())
+
+        else:
+
+            job.artifact = os.path.join(job.directory, "classification.json")
+            job.media_type = "application/json"
+
+            with open(job.artifact, "w", encoding="utf-8") as out:
+
+                out.write('{"data": [')
+                separator = ""
+
+                for records, counts in imap_partitions(classify_partition, items):
+
+                    summary.add_counts(counts)
+
+                    for row in records:
+                        out.write(separator + json.dumps(row, default=str))
+                        separator = ","
+
+                    job.progress(summary.total, bytes_processed=source.tell())
+
+                out.write(
+                    f'], "summary": {json.dumps(summary.as_dict())}, '
+                    f'"total": {summary.total}}}'
+                )
+
+    job.filename = os.path.basename(job.artifact)
+    job.summary = {"decisions": summary.as_dict(), "total": summary.total}
+
+
+def run_template_job(job: Job, source_path: str):
+    """
+    RecordBuilder → TemplateMapper → TemplateValidator → TemplateGenerator,
+    in the process pool. format "zip" produces the validation report
+    archive; otherwise the ready CSV, with rejected rows kept beside it
+    in failures.jsonl.
+    """
+
+    if job.params.get("format") == "zip":
+
+        job.filename = "mgn_template_report.zip"
+        job.media_type = ZIP_MEDIA_TYPE
+        job.artifact = os.path.join(job.directory, job.filename)
+
+        job.summary = _run_in_pool(
+            job,
+            generate_template_report,
+            source_path,
+            job.params["account_id"],
+            job.params["region"],
+            job.artifact,
+        )
+
+        return
+
+    job.artifact = os.path.join(job.directory, "mgn_import_ready.csv")
+    job.media_type = "text/csv"
+    job.filename = "mgn_import_ready.csv"
+
+    counts = _run_in_pool(
+        job,
+        generate_template_csv,
+        source_path,
+        job.params["account_id"],
+        job.params["region"],
+        job.artifact,
+        failures_path=os.path.join(job.directory, "failures.jsonl"),
+    )
+
+    job.summary = counts
+
+    if not counts["ready"]:
+        raise HTTPException(400, "No valid servers found.")
+
+
+# ------------------------------------------------
+# PROGRESS FROM WORKERS
+# ------------------------------------------------
+
+class ProgressFile:
+    """
+    progress(rows_done, bytes_done) callback that crosses processes:
+    the worker overwrites one small file in the job directory, the
+    job thread reads it back.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __call__(self, rows_done: int, position: Optional[int]):
+
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump([rows_done, position], f)
+
+        os.replace(self.path + ".tmp", self.path)
+
+    def read(self) -> Optional[Tuple[int, Optional[int]]]:
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                rows_done, position = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        return rows_done, position
+
+
+def _run_in_pool(job: Job, build, *args, **kwargs):
+    """
+    build(*args, progress=..., **kwargs) in the worker pool, copying its
+    progress onto the job until it is done.
+    """
+
+    progress = ProgressFile(os.path.join(job.directory, "progress.json"))
+    task = submit_cpu_bound(partial(build, *args, progress=progress, **kwargs))
+
+    try:
+        while True:
+
+            wait([task], timeout=PROGRESS_POLL_SECONDS)
+
+            done = task.done()
+            state = progress.read()
+
+            if state:
+                job.progress(state[0], bytes_processed=state[1])
+
+            if done:
+                return collect(task)
+
+    finally:
+        try:
+            os.remove(progress.path)
+        except OSError:
+            pass
+
+
+JOBS = JobManager()
@@ -1,11 +1,29 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.template_routes import router as template_router
 from app.api.classifier_routes import router as classifier_router
+from app.api.job_routes import router as job_router
+from app.api.session_routes import router as session_router
+from app.api.metrics_routes import router as metrics_router
+from app.classifier import REGISTRY
+from app.jobs import JOBS
+from app.metrics import MetricsMiddleware
+from app.workers import shutdown_pool
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    REGISTRY.start()
+    yield
+    REGISTRY.stop()
+    JOBS.shutdown()
+    shutdown_pool()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.add_middleware(
@@ -16,6 +34,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 
 app.include_router(template_router, prefix="/template")
 app.include_router(classifier_router, prefix="/classifier")
+app.include_router(session_router, prefix="/classifier/sessions")
+app.include_router(job_router, prefix="/jobs")
+app.include_router(metrics_router)
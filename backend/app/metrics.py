@@ -0,0 +1,476 @@
+import resource
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.settings import METRICS_ENABLED
+
+
+PREFIX = "migration"
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds); +Inf is implied
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+# ------------------------------------------------
+# HISTOGRAM
+# ------------------------------------------------
+
+class Histogram:
+    """
+    Cumulative-on-render bucket counts, plus sum and count.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, state: Dict[str, Any]):
+        self.counts = [a + b for a, b in zip(self.counts, state["counts"])]
+        self.sum += state["sum"]
+        self.count += state["count"]
+
+    def state(self) -> Dict[str, Any]:
+        return {"counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+    def lines(self, name: str, labels: str) -> List[str]:
+
+        out = []
+        running = 0
+
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            out.append(f'{name}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {running}')
+
+        out.append(f"{name}_sum{{{labels}}} {self.sum}")
+        out.append(f"{name}_count{{{labels}}} {self.count}")
+
+        return out
+
+
+# ------------------------------------------------
+# STAGE TIMING
+# ------------------------------------------------
+# Pipeline stages are chained generators: pulling a batch from the
+# validator pulls from the mapper, which pulls from the reader. Each
+# timed pull keeps a frame on a per-thread stack, and time spent in
+# nested timed pulls is subtracted — so a stage is charged its own
+# work only, not its upstream's.
+
+class _Frame:
+
+    __slots__ = ("nested",)
+
+    def __init__(self):
+        self.nested = 0.0
+
+
+class Stage:
+    """
+    Times one run of a stage: `with METRICS.stage("template.write") as s`
+    and set s.rows. Recorded on exit.
+    """
+
+    def __init__(self, registry: "MetricsRegistry", name: str):
+        self.registry = registry
+        self.name = name
+        self.rows = 0
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._frame = self.registry._push()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds += self.registry._pop(self._frame, self._started)
+        self.registry.record(self.name, self.seconds, self.rows)
+
+
+class _NullStage:
+
+    rows = 0
+    seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+# ------------------------------------------------
+# REGISTRY
+# ------------------------------------------------
+
+class MetricsRegistry:
+    """
+    Per-process metrics: stage runs, HTTP request durations and cache
+    lookups. Worker processes ship theirs back with each task result
+    (see drain / merge), so /metrics covers the whole pool.
+
+    Disabled, stage() and timed() hand back no-op / pass-through
+    objects and nothing is recorded, but cache lookups from workers
+    are still merged.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self._stages: Dict[str, Histogram] = {}
+        self._stage_rows: Dict[str, int] = {}
+        self._stage_rss: Dict[str, int] = {}
+        self._requests: Dict[Tuple[str, str, str], Histogram] = {}
+
+        # cache name → () -> (hits, misses), read live from this process
+        self._caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        # lookups reported by worker processes
+        self._remote_caches: Dict[str, List[int]] = {}
+        self._drained_caches: Dict[str, Tuple[int, int]] = {}
+
+        self._worker_rss = 0
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+
+    def stage(self, name: str):
+        return Stage(self, name) if self.enabled else _NULL_STAGE
+
+    def timed(self, name: str, batches: Iterable, rows: Callable[[Any], int] = len) -> Iterable:
+        """
+        Pass batches through, charging the time spent producing each
+        one (and its rows) to the stage. Recorded once the stream ends.
+        """
+
+        if not self.enabled:
+            return batches
+
+        return self._timed(name, batches, rows)
+
+    def _timed(self, name, batches, rows) -> Iterator:
+
+        stage = Stage(self, name)
+        iterator = iter(batches)
+
+        try:
+            while True:
+
+                started = time.perf_counter()
+                frame = self._push()
+
+                try:
+                    batch = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    stage.seconds += self._pop(frame, started)
+
+                stage.rows += rows(batch)
+
+                yield batch
+
+        finally:
+            self.record(name, stage.seconds, stage.rows)
+
+    def record(self, name: str, seconds: float, rows: int):
+
+        rss = peak_rss_bytes()
+
+        with self._lock:
+
+            if name not in self._stages:
+                self._stages[name] = Histogram()
+                self._stage_rows[name] = 0
+                self._stage_rss[name] = 0
+
+            self._stages[name].observe(seconds)
+            self._stage_rows[name] += rows
+            self._stage_rss[name] = max(self._stage_rss[name], rss)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+
+        key = (method, route, str(status))
+
+        with self._lock:
+
+            if key not in self._requests:
+                self._requests[key] = Histogram()
+
+            self._requests[key].observe(seconds)
+
+    def cache(self, name: str, lookups: Callable[[], Tuple[int, int]]):
+        """
+        Register a cache by a callable returning its (hits, misses).
+        """
+
+        self._caches[name] = lookups
+
+    def _push(self) -> _Frame:
+
+        stack = getattr(self._local, "stack", None)
+
+        if stack is None:
+            stack = self._local.stack = []
+
+        frame = _Frame()
+        stack.append(frame)
+
+        return frame
+
+    def _pop(self, frame: _Frame, started: float) -> float:
+        # own time of the frame; its whole time counts as nested for the parent
+
+        elapsed = time.perf_counter() - started
+
+        stack = self._local.stack
+        stack.pop()
+
+        if stack:
+            stack[-1].nested += elapsed
+
+        return elapsed - frame.nested
+
+    # -----------------------------
+    # Worker Hand-off
+    # -----------------------------
+
+    def drain(self) -> Dict[str, Any]:
+        """
+        Everything recorded in this (worker) process since the last
+        drain, as a picklable dict. Stage data is reset.
+
+        Cache lookups are shipped even when disabled — they also back
+        /classifier/cache.
+        """
+
+        caches = {}
+
+        for name, lookups in self._caches.items():
+            hits, misses = lookups()
+            last_hits, last_misses = self._drained_caches.get(name, (0, 0))
+            caches[name] = (hits - last_hits, misses - last_misses)
+            self._drained_caches[name] = (hits, misses)
+
+        if not self.enabled:
+            return {"stages": {}, "rows": {}, "rss": {}, "caches": caches, "peak_rss": 0}
+
+        with self._lock:
+
+            state = {
+                "stages": {name: h.state() for name, h in self._stages.items()},
+                "rows": dict(self._stage_rows),
+                "rss": dict(self._stage_rss),
+                "caches": caches,
+                "peak_rss": peak_rss_bytes(),
+            }
+
+            self._stages.clear()
+            self._stage_rows.clear()
+            self._stage_rss.clear()
+
+        return state
+
+    def merge(self, state: Optional[Dict[str, Any]]):
+
+        if not state:
+            return
+
+        with self._lock:
+
+            for name, histogram in state["stages"].items():
+
+                if name not in self._stages:
+                    self._stages[name] = Histogram()
+                    self._stage_rows[name] = 0
+                    self._stage_rss[name] = 0
+
+                self._stages[name].merge(histogram)
+                self._stage_rows[name] += state["rows"][name]
+                self._stage_rss[name] = max(self._stage_rss[name], state["rss"][name])
+
+            for name, (hits, misses) in state["caches"].items():
+                totals = self._remote_caches.setdefault(name, [0, 0])
+                totals[0] += hits
+                totals[1] += misses
+
+            self._worker_rss = max(self._worker_rss, state["peak_rss"])
+
+    def worker_lookups(self, name: str) -> Tuple[int, int]:
+        """
+        (hits, misses) of a cache as reported by worker processes.
+        """
+
+        with self._lock:
+            hits, misses = self._remote_caches.get(name, (0, 0))
+
+        return hits, misses
+
+    # -----------------------------
+    # Exposition
+    # -----------------------------
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format.
+        """
+
+        lines = []
+
+        with self._lock:
+
+            stages = sorted(self._stages.items())
+            rows = dict(self._stage_rows)
+            stage_rss = dict(self._stage_rss)
+            requests = sorted(self._requests.items())
+            remote = {name: tuple(totals) for name, totals in self._remote_caches.items()}
+            worker_rss = self._worker_rss
+
+        def family(name, kind, help):
+            lines.append(f"# HELP {PREFIX}_{name} {help}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        family("stage_seconds", "histogram", "Own wall time per pipeline stage run, upstream stages excluded.")
+        for name, histogram in stages:
+            lines.extend(histogram.lines(f"{PREFIX}_stage_seconds", _labels(stage=name)))
+
+        family("stage_rows_total", "counter", "Rows out of each pipeline stage.")
+        for name, _ in stages:
+            lines.append(f"{PREFIX}_stage_rows_total{{{_labels(stage=name)}}} {rows[name]}")
+
+        family("stage_rows_per_second", "gauge", "Rows per second of own stage time, since start.")
+        for name, histogram in stages:
+            rate = rows[name] / histogram.sum if histogram.sum > 0 else 0.0
+            lines.append(f"{PREFIX}_stage_rows_per_second{{{_labels(stage=name)}}} {rate:.1f}")
+
+        family("stage_peak_rss_bytes", "gauge", "Peak RSS of the process running the stage, at the end of a run.")
+        for name, _ in stages:
+            lines.append(f"{PREFIX}_stage_peak_rss_bytes{{{_labels(stage=name)}}} {stage_rss[name]}")
+
+        family("http_request_duration_seconds", "histogram", "Request duration per route, until the body is sent.")
+        for (method, route, status), histogram in requests:
+            labels = _labels(method=method, route=route, status=status)
+            lines.extend(histogram.lines(f"{PREFIX}_http_request_duration_seconds", labels))
+
+        family("cache_lookups_total", "counter", "Cache lookups by result, across the server and worker processes.")
+        ratios = []
+        for name, lookups in sorted(self._caches.items()):
+            hits, misses = lookups()
+            remote_hits, remote_misses = remote.get(name, (0, 0))
+            hits, misses = hits + remote_hits, misses + remote_misses
+            lines.append(f"{PREFIX}_cache_lookups_total{{{_labels(cache=name, result='hit')}}} {hits}")
+            lines.append(f"{PREFIX}_cache_lookups_total{{{_labels(cache=name, result='miss')}}} {misses}")
+            ratios.append((name, hits / (hits + misses) if hits + misses else 0.0))
+
+        family("cache_hit_ratio", "gauge", "Cache hits / lookups since start.")
+        for name, ratio in ratios:
+            lines.append(f"{PREFIX}_cache_hit_ratio{{{_labels(cache=name)}}} {ratio:.4f}")
+
+        family("peak_rss_bytes", "gauge", "Peak resident memory of the server and of the largest worker.")
+        lines.append(f"{PREFIX}_peak_rss_bytes{{{_labels(process='server')}}} {peak_rss_bytes()}")
+        lines.append(f"{PREFIX}_peak_rss_bytes{{{_labels(process='worker')}}} {worker_rss}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# ------------------------------------------------
+# HTTP MIDDLEWARE
+# ------------------------------------------------
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing each request until its last body chunk is
+    sent — streamed responses count in full. Labelled by the route's
+    path template, so path parameters do not explode the series.
+    """
+
+    def __init__(self, app, registry: "MetricsRegistry" = None):
+        self.app = app
+        self.registry = registry or METRICS
+
+    async def __call__(self, scope, receive, send):
+
+        if scope["type"] != "http" or not self.registry.enabled:
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_timed(message):
+
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            self.registry.observe_request(
+                scope["method"],
+                route_template(scope),
+                status,
+                time.perf_counter() - started,
+            )
+
+
+def route_template(scope) -> str:
+    """
+    Full path template of the matched route, e.g. /jobs/{job_id}.
+    The route only knows its path below the router prefix, so the
+    prefix is recovered from the request path.
+    """
+
+    route = scope.get("route")
+
+    if route is None:
+        return "unmatched"
+
+    try:
+        below_prefix = route.path_format.format(**scope.get("path_params", {}))
+    except (AttributeError, KeyError, IndexError, ValueError):
+        return route.path
+
+    path = scope["path"]
+
+    if below_prefix and not path.endswith(below_prefix):
+        return route.path
+
+    return path[:len(path) - len(below_prefix)] + route.path
+
+
+METRICS = MetricsRegistry()
@@ -0,0 +1,151 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+
+# ------------------------------------------------
+# PRECOMPILED PATTERNS
+# ------------------------------------------------
+
+# Everything stripped before version detection, in one pass:
+# bracketed metadata, edition/junk words and architecture tokens
+_STRIP = re.compile(
+    r"\([^)]*\)"
+    r"|or later|datacenter|standard|enterprise"
+    r"|(?=[36])\b(?:32|64)[-\s]?bit\b"
+)
+
+# The leading lookahead lets the regex engine skip to digits
+_VERSION = re.compile(r"(?=\d)\b(20\d{2}|(\d{1,2})\.(\d+)|\d{1,2})\b")
+_YEAR = re.compile(r"20\d{2}")
+_SERVICE_PACK = re.compile(r"sp\s?(\d+)")
+
+# Plain substring keywords. CPython's `in` beats a regex alternation
+# for a handful of literals, so these stay as ordered tuples.
+
+# Family keywords in priority order — the first hit wins
+_FAMILY_KEYWORDS = (
+    ("red hat", "rhel"),
+    ("rhel", "rhel"),
+    ("centos", "centos"),
+    ("oracle", "oracle"),
+    ("rocky", "rocky"),
+    ("amazon linux", "amazon"),
+    ("suse", "sles"),
+    ("ubuntu", "ubuntu"),
+    ("debian", "debian"),
+    ("windows", "windows"),
+)
+
+_LINUX_KEYWORDS = (
+    "linux",
+    "rhel",
+    "red hat",
+    "centos",
+    "ubuntu",
+    "debian",
+    "oracle",
+    "suse",
+    "sles",
+    "amazon linux",
+)
+
+_EDITIONS = ("datacenter", "standard", "enterprise")
+
+# Same keywords as one pattern, for column-wise (pandas) matching
+LINUX_PLATFORM = re.compile("|".join(re.escape(k) for k in _LINUX_KEYWORDS))
+
+
+# ------------------------------------------------
+# FINGERPRINT
+# ------------------------------------------------
+
+class OsFingerprint(NamedTuple):
+    """
+    Structured view of a Guest OS string.
+
+    version is normalized the way the classifier compares it:
+    major only, with Windows R2 releases bumped one year.
+    """
+
+    family: Optional[str]
+    version: Optional[int]
+    minor: Optional[int]
+    service_pack: Optional[int]
+    r2: bool
+    bits: Optional[int]
+    edition: Optional[str]
+    server: bool
+    platform: Optional[str]
+
+
+def _parse(os_string: str) -> OsFingerprint:
+
+    os_lower = os_string.lower()
+
+    if "32-bit" in os_lower:
+        bits = 32
+    elif "64-bit" in os_lower:
+        bits = 64
+    else:
+        bits = None
+
+    # Platform uses the raw string — brackets may carry the hint
+    platform = None
+
+    if "windows" in os_lower:
+        platform = "WINDOWS"
+    else:
+        for keyword in _LINUX_KEYWORDS:
+            if keyword in os_lower:
+                platform = "LINUX"
+                break
+
+    edition = None
+
+    for keyword in _EDITIONS:
+        if keyword in os_lower:
+            edition = keyword
+            break
+
+    cleaned = _STRIP.sub("", os_lower)
+
+    family = None
+
+    for keyword, name in _FAMILY_KEYWORDS:
+        if keyword in cleaned:
+            family = name
+            break
+
+    version = None
+    minor = None
+    r2 = "r2" in cleaned
+
+    year = _YEAR.search(cleaned) if r2 else None
+
+    if year:
+        version = int(year.group()) + 1  # treat R2 as newer
+    else:
+        match = _VERSION.search(cleaned)
+        if match:
+            version = int(float(match.group(1)))
+            if match.group(3) is not None:
+                minor = int(match.group(3))
+
+    sp = _SERVICE_PACK.search(cleaned) if "sp" in cleaned else None
+
+    return OsFingerprint(
+        family,
+        version,
+        minor,
+        int(sp.group(1)) if sp else None,
+        r2,
+        bits,
+        edition,
+        "server" in cleaned,
+        platform,
+    )
+
+
+# Fingerprints are immutable, so repeated strings are parsed once
+parse_os = lru_cache(maxsize=4096)(_parse)
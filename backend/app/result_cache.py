@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from threading import Lock
+from typing import Iterable, Iterator, Optional
+
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app import classifier
+from app.dashboard_export import iter_spooled
+from app.metrics import METRICS
+from app.settings import RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES
+
+
+def hash_upload(file, chunk_size: int = 1024 * 1024) -> str:
+    """
+    SHA-256 of an uploaded file's bytes. Leaves the file rewound.
+    """
+
+    digest = hashlib.sha256()
+
+    file.seek(0)
+
+    while chunk := file.read(chunk_size):
+        digest.update(chunk)
+
+    file.seek(0)
+
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk cache of finished artifacts (JSON bodies, workbooks, CSVs).
+
+    Keys combine the upload hash, the loaded rules version and any
+    request parameters, so a rules change never serves stale output.
+    Entries are plain files; their mtime is the LRU clock and the
+    oldest are evicted once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, root: str = RESULT_CACHE_DIR, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    # -----------------------------
+    # Keys
+    # -----------------------------
+
+    def key(self, kind: str, upload_digest: str, rules_version: Optional[str] = None, **params) -> str:
+        """
+        rules_version: the version the request classifies against —
+        defaults to the active one.
+        """
+
+        material = json.dumps(
+            [kind, upload_digest, rules_version or classifier.RULES.version, params],
+            sort_keys=True,
+        )
+
+        return f"{kind}-{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+    # -----------------------------
+    # Lookup / Store
+    # -----------------------------
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Path of the cached artifact, or None. A hit refreshes its LRU position.
+        """
+
+        if not self.enabled:
+            return None
+
+        path = os.path.join(self.root, key)
+
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return path
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+
+        if not self.enabled:
+            return
+
+        with self._staging() as staged:
+            staged.write(data)
+
+        self._commit(staged.name, key)
+
+    def put_file(self, key: str, file) -> None:
+        """
+        Copy an open binary file into the cache. Leaves it rewound.
+        """
+
+        if not self.enabled:
+            return
+
+        file.seek(0)
+
+        with self._staging() as staged:
+            shutil.copyfileobj(file, staged, 1024 * 1024)
+
+        file.seek(0)
+
+        self._commit(staged.name, key)
+
+    def tee(self, key: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Pass a streamed response through, copying it into the cache.
+        The entry is committed only once the stream completes — an
+        aborted download leaves nothing behind.
+        """
+
+        if not self.enabled:
+            yield from chunks
+            return
+
+        staged = self._staging()
+
+        try:
+            with staged:
+                for chunk in chunks:
+                    staged.write(chunk)
+                    yield chunk
+
+        except BaseException:
+            os.remove(staged.name)
+            raise
+
+        self._commit(staged.name, key)
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+
+    def _staging(self):
+
+        os.makedirs(self.root, exist_ok=True)
+
+        return tempfile.NamedTemporaryFile(dir=self.root, prefix=".staging-", delete=False)
+
+    def _commit(self, staged_path: str, key: str) -> None:
+
+        # atomic — readers never see a partial artifact
+        os.replace(staged_path, os.path.join(self.root, key))
+
+        self.evict()
+
+    def evict(self) -> None:
+
+        with self._lock:
+
+            entries = []
+
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.startswith(".staging-"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+
+            for _, size, path in sorted(entries):
+
+                if total <= self.max_bytes:
+                    break
+
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+
+                total -= size
+
+
+async def upload_digest(file) -> Optional[str]:
+    """
+    hash_upload() off the event loop — or None without reading a
+    byte when the result cache is off, as no key will be looked up.
+    """
+
+    if not RESULT_CACHE.enabled:
+        return None
+
+    return await run_in_threadpool(hash_upload, file)
+
+
+def cached_response(path: str, media_type: str, filename: Optional[str] = None):
+    """
+    Stream a cache hit. The file is opened up front so a concurrent
+    eviction cannot pull it away mid-response.
+    """
+
+    headers = {}
+
+    if filename:
+        headers["Content-Disposition"] = f"attachment; filename={filename}"
+
+    return StreamingResponse(
+        iter_spooled(open(path, "rb")),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+RESULT_CACHE = ResultCache()
+
+METRICS.cache("result", lambda: (RESULT_CACHE.hits, RESULT_CACHE.misses))
@@ -0,0 +1,297 @@
+import hashlib
+import json
+from bisect import bisect_right
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+
+class RuleSchemaError(ValueError):
+    """
+    Raised when a rule file does not match the expected schema.
+    """
+
+
+# ------------------------------------------------
+# SCHEMA
+# ------------------------------------------------
+
+RANGE_KEYS = {"supported_range", "server_supported_range"}
+RANGE_LIST_KEYS = {"supported_minor_ranges"}
+VERSION_LIST_KEYS = {
+    "conditional",
+    "client_supported",
+    "clients",
+    "deprecated",
+    "unsupported",
+    "supported",
+}
+
+MGN_FAMILY_KEYS = RANGE_KEYS | RANGE_LIST_KEYS | VERSION_LIST_KEYS | {
+    "special_rules",
+}
+
+VMIE_KEYS = {"windows", "linux_families_supported"}
+
+
+# ------------------------------------------------
+# COMPILED STRUCTURES
+# ------------------------------------------------
+
+@dataclass(frozen=True)
+class IntervalSet:
+    """
+    Sorted, merged, non-overlapping closed intervals.
+    Membership is a single bisect.
+    """
+
+    starts: Tuple[float, ...]
+    ends: Tuple[float, ...]
+
+    @classmethod
+    def from_ranges(cls, ranges) -> "IntervalSet":
+
+        merged = []
+
+        for low, high in sorted(ranges):
+            if merged and low <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], high)
+            else:
+                merged.append([low, high])
+
+        return cls(
+            starts=tuple(low for low, _ in merged),
+            ends=tuple(high for _, high in merged),
+        )
+
+    def __contains__(self, version) -> bool:
+
+        i = bisect_right(self.starts, version) - 1
+
+        return i >= 0 and version <= self.ends[i]
+
+    def __bool__(self) -> bool:
+        return bool(self.starts)
+
+
+@dataclass(frozen=True)
+class FamilyRules:
+    """
+    Pre-indexed MGN rules for one OS family.
+    """
+
+    name: str
+    supported: IntervalSet
+    server_supported: IntervalSet
+    clients: frozenset
+    conditional: frozenset
+    special_rules: Mapping[int, Mapping[str, Any]]
+
+
+@dataclass(frozen=True)
+class RuleTable:
+    """
+    Immutable decision table compiled from the MGN and VM Import rules.
+    """
+
+    families: Mapping[str, FamilyRules]
+    vm_import_families: frozenset
+    version: str
+
+    def family(self, name: str) -> Optional[FamilyRules]:
+        return self.families.get(name)
+
+
+# ------------------------------------------------
+# COMPILER
+# ------------------------------------------------
+
+def compile_rules(mgn_rules, vmie_rules) -> RuleTable:
+    """
+    Validate raw rule dicts and compile them into a RuleTable.
+    Raises RuleSchemaError on malformed input.
+    """
+
+    mgn_rules = _require_mapping(mgn_rules, "mgn rules")
+    vmie_rules = _require_mapping(vmie_rules, "vmie rules")
+
+    # empty family entries behave as "no rules" — same as a missing family
+    families = {
+        str(name): _compile_family(str(name), rules)
+        for name, rules in mgn_rules.items()
+        if rules
+    }
+
+    if "windows" in families and not families["windows"].server_supported:
+        raise RuleSchemaError(
+            "mgn rules: 'windows' requires server_supported_range"
+        )
+
+    return RuleTable(
+        families=MappingProxyType(families),
+        vm_import_families=_compile_vmie(vmie_rules),
+        version=rules_version(mgn_rules, vmie_rules),
+    )
+
+
+def rules_version(mgn_rules, vmie_rules) -> str:
+    """
+    Stable content hash of both rule sets.
+    """
+
+    canonical = json.dumps(
+        {"mgn": mgn_rules, "vmie": vmie_rules},
+        sort_keys=True,
+        default=str,
+    )
+
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _compile_family(name: str, rules) -> FamilyRules:
+
+    where = f"mgn rules: '{name}'"
+    rules = _require_mapping(rules, where)
+
+    unknown = set(rules) - MGN_FAMILY_KEYS
+    if unknown:
+        raise RuleSchemaError(f"{where}: unknown keys {sorted(unknown)}")
+
+    for key in VERSION_LIST_KEYS & set(rules):
+        _version_list(rules[key], f"{where}.{key}")
+
+    supported = [
+        _range(r, f"{where}.supported_minor_ranges")
+        for r in _list(rules.get("supported_minor_ranges"), f"{where}.supported_minor_ranges")
+    ]
+
+    if rules.get("supported_range") is not None:
+        supported.append(_range(rules["supported_range"], f"{where}.supported_range"))
+
+    server_supported = []
+
+    if rules.get("server_supported_range") is not None:
+        server_supported.append(
+            _range(rules["server_supported_range"], f"{where}.server_supported_range")
+        )
+
+    return FamilyRules(
+        name=name,
+        supported=IntervalSet.from_ranges(supported),
+        server_supported=IntervalSet.from_ranges(server_supported),
+        clients=frozenset(_version_list(rules.get("client_supported"), f"{where}.client_supported")),
+        conditional=frozenset(_version_list(rules.get("conditional"), f"{where}.conditional")),
+        special_rules=_special_rules(rules.get("special_rules"), f"{where}.special_rules"),
+    )
+
+
+def _compile_vmie(rules) -> frozenset:
+
+    unknown = set(rules) - VMIE_KEYS
+    if unknown:
+        raise RuleSchemaError(f"vmie rules: unknown keys {sorted(unknown)}")
+
+    windows = rules.get("windows")
+
+    if windows is not None:
+        windows = _require_mapping(windows, "vmie rules: 'windows'")
+
+        if windows.get("supported_range") is not None:
+            _range(windows["supported_range"], "vmie rules: 'windows'.supported_range")
+
+        _version_list(windows.get("clients"), "vmie rules: 'windows'.clients")
+
+    families = _list(
+        rules.get("linux_families_supported"),
+        "vmie rules: linux_families_supported",
+    )
+
+    for family in families:
+        if not isinstance(family, str):
+            raise RuleSchemaError(
+                f"vmie rules: linux_families_supported entries must be strings, got {family!r}"
+            )
+
+    return frozenset(families)
+
+
+def _special_rules(rules, where) -> Mapping[int, Mapping[str, Any]]:
+
+    if rules is None:
+        return MappingProxyType({})
+
+    rules = _require_mapping(rules, where)
+
+    compiled: Dict[int, Mapping[str, Any]] = {}
+
+    for version, rule in rules.items():
+
+        if isinstance(version, bool) or not isinstance(version, int):
+            raise RuleSchemaError(f"{where}: version keys must be integers, got {version!r}")
+
+        rule = _require_mapping(rule, f"{where}.{version}")
+
+        min_sp = rule.get("min_sp")
+        if min_sp is not None and (
+            isinstance(min_sp, bool) or not isinstance(min_sp, int) or min_sp < 0
+        ):
+            raise RuleSchemaError(f"{where}.{version}.min_sp must be a non-negative integer")
+
+        compiled[version] = MappingProxyType(dict(rule))
+
+    return MappingProxyType(compiled)
+
+
+# ------------------------------------------------
+# SHAPE CHECKS
+# ------------------------------------------------
+
+def _require_mapping(value, where):
+
+    if not isinstance(value, dict):
+        raise RuleSchemaError(f"{where}: expected a mapping, got {type(value).__name__}")
+
+    return value
+
+
+def _list(value, where):
+
+    if value is None:
+        return []
+
+    if not isinstance(value, list):
+        raise RuleSchemaError(f"{where}: expected a list, got {type(value).__name__}")
+
+    return value
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _version_list(value, where):
+
+    versions = [v for v in _list(value, where) if v is not None]
+
+    for v in versions:
+        if not _is_number(v):
+            raise RuleSchemaError(f"{where}: versions must be numbers, got {v!r}")
+
+    return versions
+
+
+def _range(value, where):
+
+    if (
+        not isinstance(value, list)
+        or len(value) != 2
+        or not all(_is_number(v) for v in value)
+    ):
+        raise RuleSchemaError(f"{where}: expected [low, high], got {value!r}")
+
+    low, high = value
+
+    if low > high:
+        raise RuleSchemaError(f"{where}: low {low} is greater than high {high}")
+
+    return low, high
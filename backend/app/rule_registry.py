@@ -0,0 +1,220 @@
+import os
+import time
+from collections import OrderedDict
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.rule_compiler import RuleTable, compile_rules
+from app.rules_loader import load_rules
+from app.settings import RULES_DIR, RULES_POLL_SECONDS
+
+
+MGN_RULES_FILE = os.path.join(RULES_DIR, "mgn_rules.yaml")
+VMIE_RULES_FILE = os.path.join(RULES_DIR, "vmie_rules.yaml")
+
+# Compiled rule sets kept after a swap, so work pinned to a recent
+# version can still run on exactly that version
+RULES_HISTORY = 4
+
+
+class RuleRegistry:
+    """
+    Owns the active rule set and keeps it in step with the rule files.
+
+    The files' mtimes are polled; on a change both files are re-read
+    and compiled, then published with a single reference swap. Callers
+    take one snapshot (`registry.active`) per request and use it
+    throughout, so a swap never mixes two rule versions in one answer.
+    A file that fails to load or compile leaves the active rules in place.
+
+    The last few compiled versions stay available through table(), so
+    work pinned to a version still runs on it after a swap.
+    """
+
+    def __init__(
+        self,
+        mgn_path: str = MGN_RULES_FILE,
+        vmie_path: str = VMIE_RULES_FILE,
+        interval: float = RULES_POLL_SECONDS,
+    ):
+        self.paths = (mgn_path, vmie_path)
+        self.interval = interval
+
+        self.active: Optional[RuleTable] = None
+        self.raw: Tuple[Any, Any] = (None, None)
+
+        self._tables: "OrderedDict[str, RuleTable]" = OrderedDict()
+
+        self.loaded_at = None
+        self.reloads = 0
+        self.last_error = None
+
+        self._mtimes: Tuple[Optional[float], ...] = ()
+        self._checked_at = 0.0
+        self._listeners: List[Callable[[RuleTable], None]] = []
+
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread = None
+
+    # -----------------------------
+    # Loading
+    # -----------------------------
+
+    def load(self) -> RuleTable:
+        """
+        Initial load — unlike later reloads, errors propagate so
+        malformed rules still fail at startup.
+        """
+
+        with self._lock:
+            self._swap(self._mtime_snapshot())
+
+        return self.active
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Recompile if a rule file changed (or always, with force).
+        Returns True when a new rule set was published.
+        """
+
+        with self._lock:
+
+            self._checked_at = time.monotonic()
+            mtimes = self._mtime_snapshot()
+
+            if not force and mtimes == self._mtimes:
+                return False
+
+            try:
+                return self._swap(mtimes)
+
+            except Exception as e:
+                # remember the mtimes so a broken file is not retried every poll
+                self._mtimes = mtimes
+                self.last_error = f"{type(e).__name__}: {e}"
+                return False
+
+    def refresh(self) -> bool:
+        """
+        reload() at most once per poll interval — cheap enough to call
+        on every batch in processes that run no poller thread.
+        """
+
+        if self._thread is not None or self.interval <= 0:
+            return False
+
+        if time.monotonic() - self._checked_at < self.interval:
+            return False
+
+        return self.reload()
+
+    def on_swap(self, listener: Callable[[RuleTable], None]):
+        self._listeners.append(listener)
+
+    def table(self, version: str) -> Optional[RuleTable]:
+        """
+        The compiled rules of this version, if loaded recently enough.
+        """
+
+        rules = self.active
+
+        if rules is not None and rules.version == version:
+            return rules
+
+        with self._lock:
+            return self._tables.get(version)
+
+    # -----------------------------
+    # Poller
+    # -----------------------------
+
+    def start(self):
+        """
+        Poll in a daemon thread so recompiles never land on a request.
+        """
+
+        if self.interval <= 0 or self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = Thread(target=self._poll, name="rule-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            self.reload()
+
+    # -----------------------------
+    # Status
+    # -----------------------------
+
+    def status(self) -> Dict[str, Any]:
+
+        rules = self.active
+
+        return {
+            "version": rules.version if rules else None,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+            "poll_seconds": self.interval,
+            "files": {
+                path: mtime for path, mtime in zip(self.paths, self._mtimes)
+            },
+        }
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+
+    def _swap(self, mtimes) -> bool:
+
+        mgn_rules, vmie_rules = (load_rules(path) for path in self.paths)
+        compiled = compile_rules(mgn_rules, vmie_rules)
+
+        self._mtimes = mtimes
+        self.last_error = None
+
+        # touched but not edited — keep the live table and its caches
+        if self.active is not None and compiled.version == self.active.version:
+            return False
+
+        if self.active is not None:
+            self.reloads += 1
+
+        # one reference assignment — readers see old or new, never a mix
+        self.raw = (mgn_rules, vmie_rules)
+        self.active = compiled
+        self.loaded_at = time.time()
+
+        self._tables[compiled.version] = compiled
+        self._tables.move_to_end(compiled.version)
+
+        while len(self._tables) > RULES_HISTORY:
+            self._tables.popitem(last=False)
+
+        for listener in self._listeners:
+            listener(compiled)
+
+        return True
+
+    def _mtime_snapshot(self) -> Tuple[Optional[float], ...]:
+
+        mtimes = []
+
+        for path in self.paths:
+            try:
+                mtimes.append(os.stat(path).st_mtime)
+            except OSError:
+                mtimes.append(None)
+
+        return tuple(mtimes)
@@ -0,0 +1,313 @@
+import base64
+import binascii
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from app.inventory import json_records
+from app.os_fingerprint import parse_os
+from app.settings import SESSION_MAX, SESSION_TTL_SECONDS
+
+
+# ------------------------------------------------
+# LAYOUT
+# ------------------------------------------------
+
+FAMILY_COLUMN = "os_family"
+
+# Filterable and groupable: stored dictionary-encoded, with a
+# posting list (row positions) per value
+CATEGORICAL_COLUMNS = ["decision", "strategy", "risk", FAMILY_COLUMN, "Power State"]
+
+UNKNOWN_FAMILY = "unknown"
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class ClassifiedSession:
+    """
+    One classified upload, held column-wise for paging.
+
+    Categorical columns are pandas Categoricals with sorted
+    categories, so their codes double as sort keys, and every value
+    has a precomputed posting list — a filter is a union of lists,
+    a group-by a bincount. Sort orders for other columns are built
+    on first use and kept.
+    """
+
+    def __init__(self, result_df: pd.DataFrame, rules_version: str):
+
+        df = result_df.reset_index(drop=True)
+        df[FAMILY_COLUMN] = os_families(df["OS"])
+
+        for column in CATEGORICAL_COLUMNS:
+            # categories come out sorted; missing values get code -1
+            df[column] = pd.Categorical(df[column].astype(object).where(df[column].notna(), None))
+
+        self.frame = df
+        self.rules_version = rules_version
+        self.created_at = time.time()
+
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {
+            column: _postings(df[column]) for column in CATEGORICAL_COLUMNS
+        }
+
+        self._orders: Dict[str, np.ndarray] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.frame.columns)
+
+    # -----------------------------
+    # Filtering
+    # -----------------------------
+
+    def mask(self, filters: Mapping[str, Sequence[str]]) -> Optional[np.ndarray]:
+        """
+        Rows matching every filtered column (any of its values).
+        None when nothing is filtered.
+        """
+
+        mask = None
+
+        for column, values in filters.items():
+
+            if not values:
+                continue
+
+            postings = self.postings[column]
+            hit = np.zeros(len(self), dtype=bool)
+
+            for value in values:
+                if value in postings:
+                    hit[postings[value]] = True
+
+            mask = hit if mask is None else mask & hit
+
+        return mask
+
+    def group_counts(self, column: str, mask: Optional[np.ndarray]) -> Dict[str, int]:
+
+        codes = self.frame[column].cat.codes.to_numpy()
+        categories = self.frame[column].cat.categories
+
+        if mask is not None:
+            codes = codes[mask]
+
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+
+        # most frequent first — same order as DecisionSummary
+        return {
+            categories[i]: int(counts[i])
+            for i in np.argsort(-counts, kind="stable")
+            if counts[i]
+        }
+
+    # -----------------------------
+    # Paging
+    # -----------------------------
+
+    def positions(self, sort: Optional[str], mask: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Row positions in sort order ("column" or "-column"), filtered.
+        """
+
+        if sort:
+            order = self._order(sort)
+        else:
+            order = np.arange(len(self))
+
+        return order if mask is None else order[mask[order]]
+
+    def page(self, positions: np.ndarray) -> List[Dict[str, Any]]:
+
+        rows = self.frame.iloc[positions].astype(object)
+        rows["OS"] = rows["OS"].map(str)
+
+        return json_records(rows)
+
+    def _order(self, sort: str) -> np.ndarray:
+
+        with self._lock:
+
+            if sort not in self._orders:
+
+                column = sort.lstrip("-")
+
+                if column not in self.frame:
+                    raise HTTPException(400, f"Cannot sort by '{column}'.")
+
+                rank = _rank(self.frame[column])
+
+                # stable both ways — ties keep upload order
+                self._orders[sort] = np.argsort(-rank if sort.startswith("-") else rank, kind="stable")
+
+            return self._orders[sort]
+
+
+def os_families(os_values: pd.Series) -> pd.Series:
+    """
+    OsFingerprint family per row, parsed once per distinct string.
+    """
+
+    families = {
+        value: parse_os(str(value).lower().strip()).family or UNKNOWN_FAMILY
+        for value in pd.unique(os_values)
+    }
+
+    return os_values.map(families)
+
+
+def _postings(column: pd.Series) -> Dict[str, np.ndarray]:
+
+    codes = column.cat.codes.to_numpy()
+
+    # one stable sort, then split at code boundaries (missing, -1, sorts first)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(column.cat.categories) + 1))
+
+    return {
+        category: order[bounds[i]:bounds[i + 1]]
+        for i, category in enumerate(column.cat.categories)
+    }
+
+
+def _rank(column: pd.Series) -> np.ndarray:
+
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy().astype(np.int64)
+        # missing values sort last
+        return np.where(codes < 0, len(column.cat.categories), codes)
+
+    # dense rank; missing values sort last
+    rank = column.rank(method="dense", na_option="bottom").to_numpy()
+
+    return rank.astype(np.int64)
+
+
+# ------------------------------------------------
+# CURSORS
+# ------------------------------------------------
+# Sessions never change, so a cursor is just the next offset bound
+# to the query it came from.
+
+def encode_cursor(offset: int, query: Mapping[str, Any]) -> str:
+
+    token = json.dumps({"o": offset, "q": _query_digest(query)})
+
+    return base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, query: Mapping[str, Any]) -> int:
+
+    try:
+        token = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        offset = int(token["o"])
+        digest = token["q"]
+
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError):
+        raise HTTPException(400, "Invalid cursor.")
+
+    if digest != _query_digest(query):
+        raise HTTPException(400, "Cursor does not belong to this query.")
+
+    return offset
+
+
+def _query_digest(query: Mapping[str, Any]) -> str:
+    material = json.dumps(query, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+# ------------------------------------------------
+# STORE
+# ------------------------------------------------
+
+class SessionStore:
+    """
+    In-process store of ClassifiedSessions: least recently used are
+    dropped beyond max_sessions, idle ones after ttl seconds.
+    """
+
+    def __init__(self, max_sessions: int = SESSION_MAX, ttl: float = SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+
+        self._sessions: "OrderedDict[str, ClassifiedSession]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._lock = Lock()
+
+    def add(self, session: ClassifiedSession) -> str:
+
+        session_id = uuid.uuid4().hex
+
+        with self._lock:
+
+            self._sessions[session_id] = session
+            self._touched[session_id] = time.monotonic()
+
+            self._expire()
+
+            while len(self._sessions) > self.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                self._touched.pop(evicted, None)
+
+        return session_id
+
+    def get(self, session_id: str) -> ClassifiedSession:
+
+        with self._lock:
+
+            self._expire()
+
+            session = self._sessions.get(session_id)
+
+            if session is None:
+                raise HTTPException(404, "Session not found or expired.")
+
+            self._sessions.move_to_end(session_id)
+            self._touched[session_id] = time.monotonic()
+
+            return session
+
+    def remove(self, session_id: str) -> bool:
+
+        with self._lock:
+            self._touched.pop(session_id, None)
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self):
+
+        if self.ttl <= 0:
+            return
+
+        cutoff = time.monotonic() - self.ttl
+
+        for session_id in [s for s, at in self._touched.items() if at < cutoff]:
+            self._sessions.pop(session_id, None)
+            self._touched.pop(session_id, None)
+
+
+def parse_filters(params: Mapping[str, Optional[Iterable[str]]]) -> Dict[str, List[str]]:
+    # repeated query params and comma lists both work: ?risk=HIGH&risk=LOW or ?risk=HIGH,LOW
+    return {
+        column: [v for value in values for v in value.split(",") if v]
+        for column, values in params.items()
+        if values
+    }
+
+
+SESSIONS = SessionStore()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+
+
+# ------------------------------------------------
+# CLASSIFIER
+# ------------------------------------------------
+
+# Max distinct Guest OS strings kept in the classify_os LRU cache.
+# 0 disables the cache.
+CLASSIFY_CACHE_SIZE = int(os.getenv("CLASSIFY_CACHE_SIZE", "4096"))
+
+# Rows per chunk when streaming an uploaded inventory
+CLASSIFY_CHUNK_ROWS = int(os.getenv("CLASSIFY_CHUNK_ROWS", "50000"))
+
+# Scratch directory for spooled exports (None → system temp dir)
+EXPORT_TMPDIR = os.getenv("EXPORT_TMPDIR") or None
+
+
+# ------------------------------------------------
+# WORKER POOL
+# ------------------------------------------------
+
+# Processes for CPU-bound classification / template work.
+# 0 runs the work in the event loop's thread pool instead.
+WORKER_POOL_SIZE = int(os.getenv("WORKER_POOL_SIZE", str(os.cpu_count() or 1)))
+
+# Uploads with more rows than this are split into partitions of
+# this size and classified in parallel across the pool.
+PARTITION_ROWS = int(os.getenv("PARTITION_ROWS", str(CLASSIFY_CHUNK_ROWS)))
+
+
+# ------------------------------------------------
+# BACKGROUND JOBS
+# ------------------------------------------------
+
+# Where job inputs, status and finished artifacts are kept
+JOB_STORE_DIR = os.getenv("JOB_STORE_DIR") or os.path.join(
+    tempfile.gettempdir(), "migration-classifier-jobs"
+)
+
+# Jobs processed concurrently; the rest wait in the queue
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Finished jobs older than this are purged from the store
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(24 * 3600)))
+
+
+# ------------------------------------------------
+# RESULT CACHE
+# ------------------------------------------------
+
+# Finished artifacts keyed by upload hash + rules version
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR") or os.path.join(
+    tempfile.gettempdir(), "migration-classifier-cache"
+)
+
+# Size cap for the cache directory; least recently used entries
+# are evicted beyond it. 0 disables the cache.
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(1024 ** 3)))
+
+
+# ------------------------------------------------
+# QUERY SESSIONS
+# ------------------------------------------------
+
+# Classified uploads kept in memory for paged queries; the least
+# recently used are dropped beyond this many
+SESSION_MAX = int(os.getenv("SESSION_MAX", "16"))
+
+# Sessions idle for longer than this are dropped; 0 keeps them
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+
+
+# ------------------------------------------------
+# TEMPLATE PIPELINE
+# ------------------------------------------------
+
+# Rows per batch flowing through read → map → validate → write
+TEMPLATE_CHUNK_ROWS = int(os.getenv("TEMPLATE_CHUNK_ROWS", "50000"))
+
+# Shard CSVs kept open at once when one upload targets many
+# account / region pairs; the least recently written is closed first
+TEMPLATE_MAX_OPEN_SHARDS = int(os.getenv("TEMPLATE_MAX_OPEN_SHARDS", "32"))
+
+
+# ------------------------------------------------
+# RULES
+# ------------------------------------------------
+
+# Directory holding mgn_rules.yaml / vmie_rules.yaml (default: backend/rules)
+RULES_DIR = os.getenv(
+    "RULES_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rules"),
+)
+
+# How often the rule files are checked for edits; 0 disables hot reload
+RULES_POLL_SECONDS = float(os.getenv("RULES_POLL_SECONDS", "5"))
+
+
+# ------------------------------------------------
+# METRICS
+# ------------------------------------------------
+
+# Per-stage timings, request histograms and cache hit rates,
+# served at /metrics. 0 turns recording off.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
@@ -13,16 +13,20 @@ class ColumnResolver:
             "name",
             "guest name",
             "virtual machine",
+            "vm",
         ],
         "os": [
             "os",
             "guest os",
             "operating system",
+            "os according to the configuration file",
+            "os according to the vmware tools",
         ],
         "ip": [
             "ip",
             "ip address",
             "primary ip",
+            "primary ip address",
         ],
     }
 
@@ -0,0 +1,155 @@
+# template_engine/dedupe.py
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Longest dotted quad: "255.255.255.255"
+_IPV4_WIDTH = 15
+
+# Set on digests so they never collide with a packed address (< 2**32)
+_DIGEST_BIT = np.uint64(1 << 63)
+
+
+# ------------------------------------------------
+# KEYS
+# ------------------------------------------------
+
+def name_keys(values: Sequence) -> np.ndarray:
+    """
+    64-bit digests of VM names. Python's string hash is SipHash and
+    cached on the object, so this is one C-level pass. Keys are only
+    comparable within one process — which is all a validator run needs.
+    """
+
+    return np.fromiter(map(hash, values), dtype=np.int64, count=len(values)).view(np.uint64)
+
+
+def ip_keys(values: Sequence) -> np.ndarray:
+    """
+    IPv4 addresses packed into 32 bits. Anything that is not a
+    canonical dotted quad ("010.0.0.1", "999.1.1.1") is keyed by its
+    string digest instead, so it compares exactly as before.
+    """
+
+    n = len(values)
+
+    packed = np.fromiter(map(type, values), dtype=object, count=n) == str
+
+    # one spare column: anything reaching it is too long to be an address
+    try:
+        chars = np.array(values, dtype=f"S{_IPV4_WIDTH + 1}").view(np.uint8)
+    except UnicodeEncodeError:
+        # non-ASCII somewhere; those rows fail the digit check below
+        chars = np.array(values, dtype=f"U{_IPV4_WIDTH + 1}").view(np.uint32)
+
+    chars = chars.reshape(n, _IPV4_WIDTH + 1)
+
+    packed &= chars[:, -1] == 0
+    chars = chars[:, :-1]
+
+    digit = (chars >= ord("0")) & (chars <= ord("9"))
+    dot = chars == ord(".")
+    pad = chars == 0
+
+    packed &= (digit | dot | pad).all(axis=1)
+    packed &= ~(pad[:, :-1] & ~pad[:, 1:]).any(axis=1)
+    packed &= dot.sum(axis=1) == 3
+
+    keys = np.zeros(n, dtype=np.uint64)
+    rows = np.flatnonzero(packed)
+
+    if len(rows):
+
+        octets = _octets(chars[rows].astype(np.int16) - ord("0"), dot[rows], pad[rows])
+        canonical = octets.min(axis=1) >= 0
+
+        keys[rows] = np.bitwise_or.reduce(
+            octets.clip(0).astype(np.uint64) << np.array([24, 16, 8, 0], dtype=np.uint64),
+            axis=1,
+        )
+
+        packed[rows[~canonical]] = False
+
+    if not packed.all():
+        rest = np.flatnonzero(~packed)
+        keys[rest] = name_keys([values[i] for i in rest]) | _DIGEST_BIT
+
+    return keys
+
+
+def _octets(digits: np.ndarray, dot: np.ndarray, pad: np.ndarray) -> np.ndarray:
+    """
+    Octet values for rows with exactly three dots, or -1 where an
+    octet is not canonical (empty, > 3 digits, leading zero, > 255).
+    """
+
+    width = digits.shape[1]
+    length = width - pad.sum(axis=1)
+
+    dots = np.flatnonzero(dot).reshape(-1, 3) % width
+
+    starts = np.column_stack([np.zeros(len(dots), dtype=dots.dtype), dots + 1])
+    ends = np.column_stack([dots, length])
+    size = ends - starts
+
+    def digit_at(offset):
+        return np.take_along_axis(
+            digits, np.minimum(starts + offset, width - 1), axis=1
+        ).astype(np.int32)
+
+    first, second, third = digit_at(0), digit_at(1), digit_at(2)
+
+    value = np.select(
+        [size == 1, size == 2, size == 3],
+        [first, first * 10 + second, first * 100 + second * 10 + third],
+        default=-1,
+    )
+
+    bad = (value > 255) | ((size > 1) & (first == 0)) | (size < 1) | (size > 3)
+
+    return np.where(bad, -1, value)
+
+
+# ------------------------------------------------
+# SEEN SET
+# ------------------------------------------------
+
+class SeenKeys:
+    """
+    Append-only set of uint64 keys kept as one sorted numpy array —
+    8 bytes per entry instead of ~100 for a set of strings.
+    """
+
+    __slots__ = ("_sorted",)
+
+    def __init__(self):
+        self._sorted = np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def add_many(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Add keys in order. Returns a mask that is True where the key
+        was already seen — earlier in `keys` or in a previous call.
+        """
+
+        keys = np.asarray(keys, dtype=np.uint64)
+
+        # within the batch: first occurrence wins
+        seen = pd.Series(keys).duplicated().to_numpy()
+
+        if len(self._sorted):
+            at = np.minimum(self._sorted.searchsorted(keys), len(self._sorted) - 1)
+            seen = seen | (self._sorted[at] == keys)
+
+        new = np.sort(keys[~seen])
+
+        if len(new):
+            # single O(n) copy — no re-sort of what is already stored
+            self._sorted = np.insert(self._sorted, self._sorted.searchsorted(new), new)
+
+        return seen
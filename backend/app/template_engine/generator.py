@@ -1,7 +1,25 @@
 # template_engine/generator.py
 
 import csv
-from typing import Iterable, Dict, Any
+import io
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, TextIO, Tuple
+
+from app.settings import TEMPLATE_MAX_OPEN_SHARDS
+from app.template_engine.record_batch import MappedBatch
+
+
+# Characters allowed in shard file names
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class Shard(NamedTuple):
+    account_id: str
+    region: str
+    path: str
+    rows: int
 
 
 class TemplateGenerator:
@@ -50,6 +68,86 @@ class TemplateGenerator:
                 self._validate_schema(record)
                 writer.writerow(record)
 
+    def write_batches(
+        self,
+        batches: Iterable[MappedBatch],
+        output_path: str,
+    ) -> int:
+        """
+        Final lazy stage: drains the pipeline into the CSV batch by
+        batch. Returns the number of rows written.
+        """
+
+        with open(output_path, mode="w", newline="", encoding="utf-8") as file:
+            return self.write_stream(batches, file)
+
+    def write_stream(
+        self,
+        batches: Iterable[MappedBatch],
+        file: TextIO,
+    ) -> int:
+        """
+        write_batches() into an already open text file — e.g. an
+        entry of a zip archive. Returns the number of rows written.
+        """
+
+        written = 0
+
+        writer = csv.writer(file)
+        writer.writerow(self.HEADERS)
+
+        for batch in batches:
+            writer.writerows(batch.rows())
+            written += len(batch)
+
+        return written
+
+    def iter_csv(self, batches: Iterable[MappedBatch]) -> Iterator[bytes]:
+        """
+        write_stream() as UTF-8 chunks for a streaming response: the
+        header, then one chunk per non-empty batch. Only the batch
+        being encoded is ever buffered.
+        """
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow(self.HEADERS)
+        yield _drain(buffer)
+
+        for batch in batches:
+
+            if not len(batch):
+                continue
+
+            writer.writerows(batch.rows())
+            yield _drain(buffer)
+
+    def write_shards(
+        self,
+        batches: Iterable[MappedBatch],
+        directory: str,
+        max_open: int = TEMPLATE_MAX_OPEN_SHARDS,
+    ) -> List[Shard]:
+        """
+        Routes each batch to the CSV of its account / region — one
+        MGN import file per target, written in a single pass.
+        """
+
+        pool = ShardWriterPool(directory, self.HEADERS, max_open)
+
+        try:
+            for batch in batches:
+                pool.writer(batch.account_id, batch.region).writerows(batch.rows())
+                pool.rows[batch.account_id, batch.region] += len(batch)
+        finally:
+            pool.close()
+
+        return [
+            Shard(account_id, region, pool.paths[account_id, region], rows)
+            for (account_id, region), rows in pool.rows.items()
+        ]
+
     # ---------------------------------------
     # Optional: Write only READY records
     # ---------------------------------------
@@ -77,3 +175,80 @@ class TemplateGenerator:
             raise ValueError(
                 f"Record missing required headers: {missing}"
             )
+
+
+class ShardWriterPool:
+    """
+    csv writers for many shard files with at most `max_open` handles.
+
+    The least recently used file is closed when the limit is reached
+    and reopened in append mode when its shard shows up again.
+    """
+
+    def __init__(self, directory: str, headers: List[str], max_open: int):
+
+        self.directory = directory
+        self.headers = headers
+        self.max_open = max(max_open, 1)
+
+        self.paths: Dict[Tuple[str, str], str] = {}
+        self.rows: Dict[Tuple[str, str], int] = {}
+
+        self._open: "OrderedDict[Tuple[str, str], Tuple[TextIO, Any]]" = OrderedDict()
+
+    def writer(self, account_id: str, region: str):
+
+        key = (account_id, region)
+
+        if key in self._open:
+            self._open.move_to_end(key)
+            return self._open[key][1]
+
+        while len(self._open) >= self.max_open:
+            _, (file, _) = self._open.popitem(last=False)
+            file.close()
+
+        if key in self.paths:
+            file = open(self.paths[key], mode="a", newline="", encoding="utf-8")
+            writer = csv.writer(file)
+
+        else:
+            self.paths[key] = self._new_path(account_id, region)
+            self.rows[key] = 0
+
+            file = open(self.paths[key], mode="w", newline="", encoding="utf-8")
+            writer = csv.writer(file)
+            writer.writerow(self.headers)
+
+        self._open[key] = (file, writer)
+
+        return writer
+
+    def close(self):
+
+        while self._open:
+            _, (file, _) = self._open.popitem()
+            file.close()
+
+    def _new_path(self, account_id: str, region: str) -> str:
+
+        stem = _SAFE_NAME.sub("_", f"mgn_import_ready_{account_id}_{region}")
+        name = f"{stem}.csv"
+        n = 1
+
+        # sanitizing can make two targets collide
+        while os.path.exists(os.path.join(self.directory, name)):
+            n += 1
+            name = f"{stem}_{n}.csv"
+
+        return os.path.join(self.directory, name)
+
+
+def _drain(buffer: io.StringIO) -> bytes:
+
+    data = buffer.getvalue().encode("utf-8")
+
+    buffer.seek(0)
+    buffer.truncate()
+
+    return data
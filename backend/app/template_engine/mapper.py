@@ -1,8 +1,18 @@
 # template_engine/mapper.py
 
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator
 import re
 
+import numpy as np
+import pandas as pd
+
+from app.os_fingerprint import LINUX_PLATFORM, parse_os
+from app.template_engine.record_batch import MappedBatch, RecordBatch
+
+
+# FIRST IPv4 in a messy field — one capture group for str.extract
+IPV4_PATTERN = re.compile(r"\b((?:\d{1,3}\.){3}\d{1,3})\b")
+
 
 class TemplateMapper:
     """
@@ -33,6 +43,51 @@ class TemplateMapper:
             "server:primary-ip": self._extract_ipv4(vm.get("ip")),
         }
 
+    def map_batch(self, batch: RecordBatch) -> MappedBatch:
+        """
+        Column-wise map_record() built on pandas string ops.
+
+        Rows whose platform cannot be derived come back with a
+        message in mapping_error instead of raising — no per-row
+        exception handling when thousands of rows fail.
+        """
+
+        os_values = pd.Series(batch.os, dtype=object)
+        os_lower = os_values.str.lower()
+
+        # Windows wins over any Linux keyword, as in _derive_platform
+        windows = os_lower.str.contains("windows", regex=False, na=False).to_numpy(bool)
+        linux = os_lower.str.contains(LINUX_PLATFORM, na=False).to_numpy(bool)
+
+        platform = np.select([windows, linux], ["WINDOWS", "LINUX"], default=None)
+
+        unknown = ~(windows | linux)
+        mapping_error = np.full(len(batch), None, dtype=object)
+        mapping_error[unknown] = [
+            f"Unknown OS platform: {value}" for value in os_values[unknown]
+        ]
+
+        ips = pd.Series(batch.ip, dtype=object).astype(str)
+        primary_ip = ips.str.extract(IPV4_PATTERN, expand=False)
+
+        return MappedBatch(
+            account_id=self.account_id,
+            region=self.region,
+            server_id=list(batch.vm_name),
+            platform=platform.tolist(),
+            primary_ip=[ip if isinstance(ip, str) else None for ip in primary_ip],
+            mapping_error=mapping_error.tolist(),
+            source=batch,
+        )
+
+    def map_batches(self, batches: Iterable[RecordBatch]) -> Iterator[MappedBatch]:
+        """
+        Lazy stage: maps each batch as it is pulled.
+        """
+
+        for batch in batches:
+            yield self.map_batch(batch)
+
     # -----------------------------
     # Platform Detection
     # -----------------------------
@@ -43,26 +98,10 @@ class TemplateMapper:
         Raise error if unknown to prevent bad imports.
         """
 
-        os_lower = os_string.lower()
-
-        if "windows" in os_lower:
-            return "WINDOWS"
-
-        linux_indicators = [
-            "linux",
-            "rhel",
-            "red hat",
-            "centos",
-            "ubuntu",
-            "debian",
-            "oracle",
-            "suse",
-            "sles",
-            "amazon linux",
-        ]
+        platform = parse_os(os_string).platform
 
-        if any(keyword in os_lower for keyword in linux_indicators):
-            return "LINUX"
+        if platform:
+            return platform
 
         raise ValueError(f"Unknown OS platform: {os_string}")
 
@@ -85,9 +124,7 @@ class TemplateMapper:
         if not ip_field:
             return None
 
-        ip_field = str(ip_field)
-
-        ipv4_pattern = r"\b(?:\d{1,3}\.){3}\d{1,3}\b"
-        matches = re.findall(ipv4_pattern, ip_field)
+        # search stops at the first hit — findall scanned them all
+        match = IPV4_PATTERN.search(str(ip_field))
 
-        return matches[0] if matches else None
+        return match.group(1) if match else None
@@ -0,0 +1,412 @@
+# template_engine/pipeline.py
+
+import csv
+import io
+import json
+import math
+import os
+import shutil
+import tempfile
+import zipfile
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from app.metrics import METRICS
+from app.settings import EXPORT_TMPDIR, TEMPLATE_CHUNK_ROWS
+from app.template_engine.record_batch import MappedBatch
+from app.template_engine.record_builder import RecordBuilder
+from app.template_engine.mapper import TemplateMapper
+from app.template_engine.validator import TemplateValidator
+from app.template_engine.generator import Shard, TemplateGenerator
+from app.template_engine.sharding import ShardRouter, flag_missing_targets, split_by_target
+
+
+ZIP_MEDIA_TYPE = "application/zip"
+
+# Entries of the validation report archive
+READY_ENTRY = "mgn_import_ready.csv"
+FAILURES_ENTRY = "failures.csv"
+SUMMARY_ENTRY = "summary.json"
+
+FAILURE_COLUMNS = [
+    "vm_name",
+    "os",
+    "ip",
+    "server:user-provided-id",
+    "server:platform",
+    "server:primary-ip",
+    "mapping_error",
+    "validation_errors",
+]
+
+Progress = Callable[[int, Optional[int]], None]
+
+
+class FailureSpill:
+    """
+    Sink for rejected rows — JSON lines or CSV into an open text
+    file, or nowhere. Tallies every error message for the summary.
+    """
+
+    def __init__(self, file: Optional[TextIO] = None, format: str = "jsonl"):
+
+        self.count = 0
+        self.errors = Counter()
+
+        self._file = file
+        self._csv = None
+
+        if file and format == "csv":
+            self._csv = csv.DictWriter(file, fieldnames=FAILURE_COLUMNS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, failed: List[Dict]):
+
+        self.count += len(failed)
+
+        for record in failed:
+            if record.get("mapping_error"):
+                self.errors[record["mapping_error"]] += 1
+            self.errors.update(record.get("validation_errors") or ())
+
+        if self._csv:
+            self._csv.writerows(_csv_row(record) for record in failed)
+
+        elif self._file:
+            for record in failed:
+                self._file.write(json.dumps(_strict(record), default=str) + "\n")
+
+
+def generate_template_csv(
+    source,
+    account_id: str,
+    region: str,
+    output_path: str,
+    progress: Optional[Progress] = None,
+    failures_path: Optional[str] = None,
+    chunksize: int = TEMPLATE_CHUNK_ROWS,
+) -> Dict[str, int]:
+    """
+    Extract → Transform → Validate → Write, one chunk at a time.
+
+    Every stage is a generator, so peak memory depends on chunksize,
+    not on the inventory. Top-level and picklable so it can run
+    inside a worker process. Rejected rows go to failures_path
+    (JSON lines) when given. The CSV is removed again if no server
+    is ready. progress(rows_done, bytes_done) is called per chunk.
+
+    Returns:
+        counts of rows / ready / failed / mapping_failures records
+    """
+
+    with _opened(source) as file:
+
+        failures = open(failures_path, "w", encoding="utf-8") if failures_path else None
+
+        try:
+            with open(output_path, mode="w", newline="", encoding="utf-8") as out:
+                counts = _run(
+                    file,
+                    TemplateMapper(account_id, region),
+                    FailureSpill(failures),
+                    lambda ready: TemplateGenerator().write_stream(ready, out),
+                    progress,
+                    chunksize,
+                )
+        finally:
+            if failures:
+                failures.close()
+
+    if not counts["ready"]:
+        os.remove(output_path)
+
+    return counts
+
+
+def stream_template_csv(
+    source,
+    account_id: str,
+    region: str,
+    counts: Optional[Dict[str, int]] = None,
+    chunksize: int = TEMPLATE_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """
+    generate_template_csv() as encoded CSV chunks, produced as they
+    are pulled — nothing is written to disk and rejected rows are
+    dropped. `counts` is filled in once the stream is exhausted.
+    """
+
+    ready, tally = _stages(source, TemplateMapper(account_id, region), FailureSpill(), None, chunksize)
+
+    written = reported = 0
+
+    def count(batches: Iterator[MappedBatch]):
+        nonlocal written
+        for batch in batches:
+            written += len(batch)
+            yield batch
+
+    def rows_encoded(chunk: bytes) -> int:
+        nonlocal reported
+        rows, reported = written - reported, written
+        return rows
+
+    yield from METRICS.timed("template.write", TemplateGenerator().iter_csv(count(ready)), rows_encoded)
+
+    if counts is not None:
+        counts.update(tally(written))
+
+
+def generate_template_report(
+    source,
+    account_id: str,
+    region: str,
+    output_path: str,
+    progress: Optional[Progress] = None,
+    chunksize: int = TEMPLATE_CHUNK_ROWS,
+) -> Dict[str, int]:
+    """
+    Same single pass as generate_template_csv(), written as a zip:
+
+        mgn_import_ready.csv   import-ready rows (header only if none)
+        failures.csv           rejected rows with mapping_error /
+                               validation_errors
+        summary.json           counts and error tallies
+
+    Ready rows are compressed straight into the archive. Zip entries
+    must be contiguous, so failures are spooled until the ready
+    entry is closed.
+    """
+
+    with _opened(source) as file, \
+            zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as archive, \
+            _FailureReport(archive) as spill:
+
+        with archive.open(READY_ENTRY, "w", force_zip64=True) as entry:
+            out = io.TextIOWrapper(entry, encoding="utf-8", newline="")
+            counts = _run(
+                file,
+                TemplateMapper(account_id, region),
+                spill,
+                lambda ready: TemplateGenerator().write_stream(ready, out),
+                progress,
+                chunksize,
+            )
+            out.flush()
+            out.detach()
+
+        spill.finish({"account_id": account_id, "region": region, **counts})
+
+    return counts
+
+
+def generate_sharded_templates(
+    source,
+    account_id: Optional[str],
+    region: Optional[str],
+    routing: Optional[Dict[str, Any]],
+    output_path: str,
+    progress: Optional[Progress] = None,
+    chunksize: int = TEMPLATE_CHUNK_ROWS,
+) -> Dict[str, Any]:
+    """
+    One pass over an inventory that spans several MGN targets. Each
+    row goes to the account / region picked by ShardRouter (row
+    columns → routing rules → account_id / region defaults).
+
+    Writes a zip with one import-ready CSV per target, plus
+    failures.csv and summary.json as in generate_template_report().
+    Shard files are written through a bounded pool of open handles
+    and added to the archive once complete.
+    """
+
+    router = ShardRouter.from_spec(account_id, region, routing)
+
+    with _opened(source) as file, \
+            zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as archive, \
+            tempfile.TemporaryDirectory(dir=EXPORT_TMPDIR) as workdir, \
+            _FailureReport(archive) as spill:
+
+        shards: List[Shard] = []
+
+        def write(ready: Iterator[MappedBatch]) -> int:
+            shards.extend(TemplateGenerator().write_shards(split_by_target(ready), workdir))
+            return sum(shard.rows for shard in shards)
+
+        counts = _run(file, TemplateMapper("", ""), spill, write, progress, chunksize, router)
+
+        for shard in shards:
+            archive.write(shard.path, os.path.basename(shard.path))
+
+        counts["shards"] = [
+            {
+                "account_id": shard.account_id,
+                "region": shard.region,
+                "file": os.path.basename(shard.path),
+                "ready": shard.rows,
+            }
+            for shard in shards
+        ]
+
+        spill.finish(counts)
+
+    return counts
+
+
+class _FailureReport(FailureSpill):
+    """
+    failures.csv + summary.json for a report archive. Zip entries
+    must be contiguous, so rejected rows are spooled to a temp file
+    until the ready entries are closed.
+    """
+
+    def __init__(self, archive: zipfile.ZipFile):
+        self.archive = archive
+        self.spooled = tempfile.TemporaryFile(dir=EXPORT_TMPDIR)
+        super().__init__(io.TextIOWrapper(self.spooled, encoding="utf-8", newline=""), format="csv")
+
+    def finish(self, summary: Dict[str, Any]):
+
+        self._file.flush()
+        self.spooled.seek(0)
+
+        with self.archive.open(FAILURES_ENTRY, "w", force_zip64=True) as entry:
+            shutil.copyfileobj(self.spooled, entry, 1024 * 1024)
+
+        summary = {**summary, "errors": dict(self.errors.most_common())}
+
+        self.archive.writestr(SUMMARY_ENTRY, json.dumps(summary, indent=2, default=str))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._file.detach()
+        self.spooled.close()
+
+
+# ------------------------------------------------
+# STREAMING CORE
+# ------------------------------------------------
+
+def _run(
+    source,
+    mapper: TemplateMapper,
+    spill: FailureSpill,
+    write: Callable[[Iterator[MappedBatch]], int],
+    progress: Optional[Progress],
+    chunksize: int,
+    router: Optional[ShardRouter] = None,
+) -> Dict[str, Any]:
+
+    ready, tally = _stages(source, mapper, spill, progress, chunksize, router)
+
+    # ⭐ STEP 4 — Write
+    with METRICS.stage("template.write") as stage:
+        written = stage.rows = write(ready)
+
+    return tally(written)
+
+
+def _stages(
+    source,
+    mapper: TemplateMapper,
+    spill: FailureSpill,
+    progress: Optional[Progress],
+    chunksize: int,
+    router: Optional[ShardRouter] = None,
+) -> Tuple[Iterator[MappedBatch], Callable[[int], Dict[str, Any]]]:
+    """
+    Steps 1–3 as a lazy stream of ready batches, plus tally(written)
+    for the counts once the stream has been drained.
+    """
+
+    validator = TemplateValidator()
+
+    mapping_failures = 0
+    rows_done = 0
+
+    def split_mapping_failures(batches: Iterator[MappedBatch]):
+        # Mapping failures never reach the validator; spill them here
+        nonlocal mapping_failures, rows_done
+
+        for mapped in batches:
+
+            rows_done += len(mapped)
+            if progress:
+                progress(rows_done, _position(source))
+
+            errors = [i for i, e in enumerate(mapped.mapping_error) if e is not None]
+
+            if errors:
+                mapping_failures += len(errors)
+                spill.write([mapped.failure_record(i) for i in errors])
+
+            yield mapped
+
+    def tally(written: int) -> Dict[str, Any]:
+        return {
+            "rows": rows_done,
+            "ready": written,
+            "failed": spill.count - mapping_failures,
+            "mapping_failures": mapping_failures,
+        }
+
+    if progress:
+        progress(0, 0)
+
+    # Each step is timed on its own (see app.metrics)
+
+    # ⭐ STEP 1 — Extract (chunked, columnar)
+    batches = METRICS.timed("template.extract", RecordBuilder.iter_batches(source, chunksize, router))
+
+    # ⭐ STEP 2 — Transform
+    mapped = mapper.map_batches(batches)
+
+    if router:
+        mapped = flag_missing_targets(mapped)
+
+    mapped = METRICS.timed("template.map", split_mapping_failures(mapped))
+
+    # ⭐ STEP 3 — Validate
+    ready = METRICS.timed("template.validate", validator.validate_stream(mapped, on_failed=spill.write))
+
+    return ready, tally
+
+
+@contextmanager
+def _opened(source):
+    # paths are opened here so progress can report bytes read
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            yield file
+    else:
+        yield source
+
+
+def _position(source) -> Optional[int]:
+
+    try:
+        return source.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _strict(record: Dict) -> Dict:
+    # NaN from empty CSV cells is not valid JSON
+    return {
+        key: None if isinstance(value, float) and math.isnan(value) else value
+        for key, value in record.items()
+    }
+
+
+def _csv_row(record: Dict[str, Any]) -> Dict[str, Any]:
+
+    row = _strict(record)
+
+    if row.get("validation_errors"):
+        row["validation_errors"] = "; ".join(row["validation_errors"])
+
+    return row
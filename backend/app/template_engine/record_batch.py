@@ -0,0 +1,154 @@
+# template_engine/record_batch.py
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+
+class RecordBatch:
+    """
+    Columnar VM records straight from the resolved CSV columns.
+
+    Each field is a sequence aligned by row — no per-row dicts.
+    account_id / region hold per-row targets when the upload is
+    sharded, and are None otherwise.
+    """
+
+    __slots__ = ("vm_name", "os", "ip", "account_id", "region")
+
+    def __init__(
+        self,
+        vm_name: Sequence,
+        os: Sequence,
+        ip: Sequence,
+        account_id: Optional[Sequence] = None,
+        region: Optional[Sequence] = None,
+    ):
+        self.vm_name = vm_name
+        self.os = os
+        self.ip = ip
+        self.account_id = account_id
+        self.region = region
+
+    def __len__(self) -> int:
+        return len(self.vm_name)
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Row dicts, for callers of the per-record API.
+        """
+
+        for vm_name, os, ip in zip(self.vm_name, self.os, self.ip):
+            yield {"vm_name": vm_name, "os": os, "ip": ip}
+
+
+class MappedBatch:
+    """
+    Columnar MGN rows for a single account / region.
+
+    mapping_error[i] is None when row i mapped cleanly; failed rows
+    keep their source values in the `source` batch for reporting.
+    """
+
+    __slots__ = (
+        "account_id",
+        "region",
+        "server_id",
+        "platform",
+        "primary_ip",
+        "mapping_error",
+        "source",
+    )
+
+    def __init__(
+        self,
+        account_id: str,
+        region: str,
+        server_id: List,
+        platform: List,
+        primary_ip: List,
+        mapping_error: List[Optional[str]],
+        source: RecordBatch,
+    ):
+        self.account_id = account_id
+        self.region = region
+        self.server_id = server_id
+        self.platform = platform
+        self.primary_ip = primary_ip
+        self.mapping_error = mapping_error
+        self.source = source
+
+    def __len__(self) -> int:
+        return len(self.server_id)
+
+    def take(self, indices: Sequence[int]) -> "MappedBatch":
+        """
+        Subset of rows, in the given order.
+        """
+
+        source = self.source
+
+        return MappedBatch(
+            self.account_id,
+            self.region,
+            [self.server_id[i] for i in indices],
+            [self.platform[i] for i in indices],
+            [self.primary_ip[i] for i in indices],
+            [self.mapping_error[i] for i in indices],
+            RecordBatch(
+                [source.vm_name[i] for i in indices],
+                [source.os[i] for i in indices],
+                [source.ip[i] for i in indices],
+                _pick(source.account_id, indices),
+                _pick(source.region, indices),
+            ),
+        )
+
+    def rows(self) -> Iterator[tuple]:
+        """
+        Tuples in TemplateGenerator.HEADERS order.
+        """
+
+        account_id = self.account_id
+        region = self.region
+
+        for server_id, platform, primary_ip in zip(
+            self.server_id, self.platform, self.primary_ip
+        ):
+            yield account_id, region, server_id, platform, primary_ip
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """
+        Row i in map_record() format.
+        """
+
+        return {
+            "account-id": self.account_id,
+            "region": self.region,
+            "server:user-provided-id": self.server_id[i],
+            "server:platform": self.platform[i],
+            "server:primary-ip": self.primary_ip[i],
+        }
+
+    def source_record(self, i: int) -> Dict[str, Any]:
+        """
+        Row i as it came in from the inventory.
+        """
+
+        return {
+            "vm_name": self.source.vm_name[i],
+            "os": self.source.os[i],
+            "ip": self.source.ip[i],
+        }
+
+    def failure_record(self, i: int) -> Dict[str, Any]:
+        """
+        Source row i with its mapping error, as the per-record pipeline reports it.
+        """
+
+        record = self.source_record(i)
+        record["mapping_error"] = self.mapping_error[i]
+
+        return record
+
+
+def _pick(values: Optional[Sequence], indices: Sequence[int]) -> Optional[List]:
+    return None if values is None else [values[i] for i in indices]
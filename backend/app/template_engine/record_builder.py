@@ -1,51 +1,144 @@
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
 from fastapi import HTTPException
 
+from app.input_formats import iter_frames, read_frame, read_header
+from app.settings import TEMPLATE_CHUNK_ROWS
+from app.template_engine.record_batch import RecordBatch
+
+if TYPE_CHECKING:
+    from app.template_engine.sharding import ShardRouter
+
 
 class RecordBuilder:
 
+    # RVTools vInfo names last: "VM", the two OS columns, "Primary IP Address"
     COLUMN_ALIASES = {
-        "vm_name": ["vm name", "name", "guest name"],
-        "os": ["os", "guest os", "operating system"],
-        "ip": ["ip", "ip address", "primary ip"],
+        "vm_name": ["vm name", "name", "guest name", "vm"],
+        "os": [
+            "os",
+            "guest os",
+            "operating system",
+            "os according to the configuration file",
+            "os according to the vmware tools",
+        ],
+        "ip": ["ip", "ip address", "primary ip", "primary ip address"],
     }
 
     @classmethod
-    def build(cls, file):
+    def build_batch(cls, file) -> RecordBatch:
+        """
+        Columnar read: sniff the header, then parse only
+        the three required columns.
+        """
+
+        usecols = cls.sniff_columns(file)
+
+        df = read_frame(file, columns=usecols.values(), as_str=True)
+
+        return cls._to_batch(cls._drop_ghost_rows(df, usecols), usecols)
+
+    @classmethod
+    def iter_batches(
+        cls,
+        file,
+        chunksize: int = TEMPLATE_CHUNK_ROWS,
+        router: Optional["ShardRouter"] = None,
+    ) -> Iterator[RecordBatch]:
+        """
+        Lazy build_batch(): one RecordBatch per `chunksize` rows,
+        so memory does not grow with the inventory.
+
+        With a router, the columns it needs are read as well and every
+        batch carries per-row account_id / region targets.
+        """
+
+        usecols = cls.sniff_columns(file)
+        routecols = router.resolve_columns(cls._header(file)) if router else {}
+
+        # as_str: per-chunk type inference would otherwise let the
+        # same value parse differently depending on its neighbours
+        reader = iter_frames(
+            file,
+            chunksize,
+            columns={*usecols.values(), *routecols.values()},
+            as_str=True,
+        )
+
+        for df in reader:
+
+            df = cls._drop_ghost_rows(df, usecols)
+            batch = cls._to_batch(df, usecols)
+
+            if router:
+                batch.account_id, batch.region = router.route(df, routecols)
+
+            yield batch
 
-        df = pd.read_csv(file)
+    @classmethod
+    def sniff_columns(cls, file) -> Dict[str, str]:
+        """
+        Read only the header. Returns canonical → column as written
+        in the file, and leaves the file rewound.
+        """
+
+        actual = cls._header(file)
+
+        column_map = cls.resolve_columns(actual)
+
+        return {canonical: actual[col] for canonical, col in column_map.items()}
 
-        # remove ghost excel rows
-        df = df.dropna(how="all")
+    @classmethod
+    def _header(cls, file) -> Dict[str, str]:
+        """
+        normalized name → column as written in the file. Leaves the file rewound.
+        """
+
+        header = read_header(file)
 
-        # normalize headers
-        df.columns = df.columns.str.strip().str.lower()
+        actual = {}
+        for col in header:
+            actual.setdefault(str(col).strip().lower(), col)
 
-        column_map = cls.resolve_columns(df)
+        return actual
 
-        records = []
+    @staticmethod
+    def _drop_ghost_rows(df, usecols):
+        # blank excel rows — judged on the template columns only
+        return df.dropna(how="all", subset=list(usecols.values()))
 
-        for _, row in df.iterrows():
+    @staticmethod
+    def _to_batch(df, usecols) -> RecordBatch:
 
-            records.append({
-                "vm_name": row[column_map["vm_name"]],
-                "os": row[column_map["os"]],
-                "ip": row[column_map["ip"]],
-            })
+        return RecordBatch(
+            vm_name=df[usecols["vm_name"]].tolist(),
+            os=df[usecols["os"]].tolist(),
+            ip=df[usecols["ip"]].tolist(),
+        )
+
+    @classmethod
+    def build(cls, file) -> List[Dict[str, Any]]:
+        """
+        The per-record API: iter_batches() flattened into row dicts.
+        Values are read as strings, like every batch.
+        """
 
-        return records
+        return [record for batch in cls.iter_batches(file) for record in batch.records()]
 
     # ------------------------
 
     @classmethod
-    def resolve_columns(cls, df):
+    def resolve_columns(cls, columns):
+        """
+        columns: a DataFrame or any iterable of normalized names
+        """
 
         mapping = {}
 
         for canonical, aliases in cls.COLUMN_ALIASES.items():
 
             match = next(
-                (col for col in df.columns if col in aliases),
+                (col for col in columns if col in aliases),
                 None
             )
 
@@ -0,0 +1,222 @@
+# template_engine/sharding.py
+
+import re
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from app.template_engine.record_batch import MappedBatch
+
+
+MISSING_TARGET = "No target account-id / region for this row"
+
+
+class ShardRouter:
+    """
+    Resolves the MGN target (account_id, region) of every row:
+
+        1. the row's own account / region columns, when the file has them
+        2. the first routing rule whose pattern matches the rule column
+        3. the request defaults
+    """
+
+    TARGET_ALIASES = {
+        "account_id": ["account id", "account-id", "account", "target account"],
+        "region": ["region", "target region", "aws region"],
+    }
+
+    def __init__(
+        self,
+        account_id: Optional[str] = None,
+        region: Optional[str] = None,
+        column: Optional[str] = None,
+        rules: Tuple[Tuple[re.Pattern, Optional[str], Optional[str]], ...] = (),
+    ):
+        self.account_id = account_id or None
+        self.region = region or None
+        self.column = column
+        self.rules = rules
+
+    @classmethod
+    def from_spec(
+        cls,
+        account_id: Optional[str] = None,
+        region: Optional[str] = None,
+        spec: Optional[Mapping[str, Any]] = None,
+    ) -> "ShardRouter":
+        """
+        spec is the request's routing document:
+
+            {
+                "column": "Cluster",
+                "rules": [
+                    {"match": "^prod", "account_id": "111111111111", "region": "us-east-1"},
+                    {"match": "dev", "account_id": "222222222222"}
+                ]
+            }
+
+        Patterns are case-insensitive regexes. Raises ValueError when malformed.
+        """
+
+        if not spec:
+            return cls(account_id, region)
+
+        if not isinstance(spec, Mapping):
+            raise ValueError("routing must be a JSON object.")
+
+        column = spec.get("column")
+        rules = spec.get("rules") or []
+
+        if not isinstance(rules, list):
+            raise ValueError("routing.rules must be a list.")
+
+        if rules and not (isinstance(column, str) and column.strip()):
+            raise ValueError("routing.column is required with routing rules.")
+
+        compiled = []
+
+        for n, rule in enumerate(rules):
+
+            if not isinstance(rule, Mapping) or not isinstance(rule.get("match"), str):
+                raise ValueError(f"routing.rules[{n}] needs a 'match' pattern.")
+
+            if not (rule.get("account_id") or rule.get("region")):
+                raise ValueError(f"routing.rules[{n}] sets neither account_id nor region.")
+
+            try:
+                pattern = re.compile(rule["match"], re.IGNORECASE)
+            except re.error as e:
+                raise ValueError(f"routing.rules[{n}]: invalid pattern ({e}).")
+
+            compiled.append((
+                pattern,
+                str(rule["account_id"]) if rule.get("account_id") else None,
+                str(rule["region"]) if rule.get("region") else None,
+            ))
+
+        return cls(account_id, region, column, tuple(compiled))
+
+    # -----------------------------
+    # Columns
+    # -----------------------------
+
+    def resolve_columns(self, header: Mapping[str, str]) -> Dict[str, str]:
+        """
+        header: normalized name → column as written in the file.
+        Target columns are optional; the rule column is not.
+        """
+
+        columns = {}
+
+        for canonical, aliases in self.TARGET_ALIASES.items():
+
+            match = next((header[a] for a in aliases if a in header), None)
+
+            if match is not None:
+                columns[canonical] = match
+
+        if self.rules:
+
+            key = self.column.strip().lower()
+
+            if key not in header:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Routing column '{self.column}' not found in the inventory.",
+                )
+
+            columns["rule"] = header[key]
+
+        return columns
+
+    # -----------------------------
+    # Routing
+    # -----------------------------
+
+    def route(self, df: pd.DataFrame, columns: Mapping[str, str]) -> Tuple[List, List]:
+        """
+        Per-row account_id and region lists for a chunk; None where unresolved.
+        """
+
+        account = _targets(df, columns.get("account_id"))
+        region = _targets(df, columns.get("region"))
+
+        if self.rules:
+
+            keys = df[columns["rule"]]
+
+            for pattern, rule_account, rule_region in self.rules:
+
+                hit = keys.str.contains(pattern, na=False)
+
+                if rule_account:
+                    account = account.mask(account.isna() & hit, rule_account)
+
+                if rule_region:
+                    region = region.mask(region.isna() & hit, rule_region)
+
+        if self.account_id:
+            account = account.fillna(self.account_id)
+
+        if self.region:
+            region = region.fillna(self.region)
+
+        return _plain(account), _plain(region)
+
+
+# ------------------------------------------------
+# BATCH STAGES
+# ------------------------------------------------
+
+def flag_missing_targets(batches: Iterator[MappedBatch]) -> Iterator[MappedBatch]:
+    """
+    Rows that mapped but have nowhere to go become mapping failures.
+    """
+
+    for batch in batches:
+
+        source = batch.source
+
+        for i, (account_id, region) in enumerate(zip(source.account_id, source.region)):
+            if batch.mapping_error[i] is None and not (account_id and region):
+                batch.mapping_error[i] = MISSING_TARGET
+
+        yield batch
+
+
+def split_by_target(batches: Iterator[MappedBatch]) -> Iterator[MappedBatch]:
+    """
+    One MappedBatch per (account_id, region) found in each batch,
+    in order of first appearance.
+    """
+
+    for batch in batches:
+
+        groups: Dict[Tuple[str, str], List[int]] = {}
+
+        for i, key in enumerate(zip(batch.source.account_id, batch.source.region)):
+            groups.setdefault(key, []).append(i)
+
+        for (account_id, region), indices in groups.items():
+
+            shard = batch if len(groups) == 1 else batch.take(indices)
+            shard.account_id = account_id
+            shard.region = region
+
+            yield shard
+
+
+def _targets(df: pd.DataFrame, column: Optional[str]) -> pd.Series:
+
+    if column is None:
+        return pd.Series(np.nan, index=df.index, dtype=object)
+
+    values = df[column].str.strip()
+
+    return values.mask(values == "")
+
+
+def _plain(values: pd.Series) -> List:
+    return values.astype(object).where(values.notna(), None).tolist()
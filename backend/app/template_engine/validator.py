@@ -1,6 +1,11 @@
 # template_engine/validator.py
 
-from typing import List, Dict, Any, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.template_engine.dedupe import SeenKeys, ip_keys, name_keys
+from app.template_engine.record_batch import MappedBatch
 
 
 class TemplateValidator:
@@ -31,11 +36,15 @@ class TemplateValidator:
         ready = []
         failed = []
 
-        seen_ips = set()
-        seen_names = set()
+        duplicate_names, duplicate_ips = self._duplicates(
+            [r.get("server:user-provided-id") for r in records],
+            [r.get("server:primary-ip") for r in records],
+            SeenKeys(),
+            SeenKeys(),
+        )
 
-        for record in records:
-            errors = self._validate_record(record, seen_ips, seen_names)
+        for record, dup_name, dup_ip in zip(records, duplicate_names, duplicate_ips):
+            errors = self._validate_record(record, dup_name, dup_ip)
 
             if errors:
                 record["validation_errors"] = errors
@@ -45,6 +54,86 @@ class TemplateValidator:
 
         return ready, failed
 
+    def validate_stream(
+        self,
+        batches: Iterable[MappedBatch],
+        on_failed: Optional[Callable[[List[Dict]], None]] = None,
+    ) -> Iterator[MappedBatch]:
+        """
+        Lazy stage: yields the ready part of each batch and hands the
+        failed records to on_failed, so neither side accumulates.
+        Duplicate detection spans the whole stream.
+        """
+
+        seen_ips = SeenKeys()
+        seen_names = SeenKeys()
+
+        for batch in batches:
+
+            ready, failed = self.validate_batch(batch, seen_ips, seen_names)
+
+            if failed and on_failed:
+                on_failed(failed)
+
+            yield ready
+
+    def validate_batch(
+        self,
+        batch: MappedBatch,
+        seen_ips: Optional[SeenKeys] = None,
+        seen_names: Optional[SeenKeys] = None,
+    ) -> Tuple[MappedBatch, List[Dict]]:
+        """
+        Column-wise validate(). Rows that failed mapping are skipped,
+        exactly as if they never reached the validator. Pass the seen
+        keys to carry duplicate detection across batches.
+
+        Returns:
+            ready batch
+            failed_records (with reasons)
+        """
+
+        ready = []
+        failed = []
+
+        rows = [i for i, e in enumerate(batch.mapping_error) if e is None]
+
+        names = [batch.server_id[i] for i in rows]
+        ips = [batch.primary_ip[i] for i in rows]
+
+        duplicate_names, duplicate_ips = self._duplicates(
+            names,
+            ips,
+            SeenKeys() if seen_names is None else seen_names,
+            SeenKeys() if seen_ips is None else seen_ips,
+        )
+
+        for i, name, ip, dup_name, dup_ip in zip(
+            rows, names, ips, duplicate_names, duplicate_ips
+        ):
+
+            # REQUIRED_FIELDS order
+            values = (name, batch.platform[i], ip)
+
+            errors = [
+                f"Missing required field: {field}"
+                for field, value in zip(self.REQUIRED_FIELDS, values)
+                if not value
+            ]
+
+            errors += self._duplicate_errors(dup_name, dup_ip)
+
+            if errors:
+                # source values too, so rejects can be traced back
+                record = batch.source_record(i)
+                record.update(batch.record(i))
+                record["validation_errors"] = errors
+                failed.append(record)
+            else:
+                ready.append(i)
+
+        return batch.take(ready), failed
+
     # -----------------------------
     # Record Validation
     # -----------------------------
@@ -52,8 +141,8 @@ class TemplateValidator:
     def _validate_record(
         self,
         record: Dict[str, Any],
-        seen_ips: set,
-        seen_names: set,
+        duplicate_name: bool,
+        duplicate_ip: bool,
     ) -> List[str]:
 
         errors = []
@@ -63,21 +152,51 @@ class TemplateValidator:
             if not record.get(field):
                 errors.append(f"Missing required field: {field}")
 
-        name = record.get("server:user-provided-id")
-        ip = record.get("server:primary-ip")
+        errors += self._duplicate_errors(duplicate_name, duplicate_ip)
 
-        # Duplicate name
-        if name:
-            if name in seen_names:
-                errors.append("Duplicate VM name detected")
-            else:
-                seen_names.add(name)
+        return errors
 
-        # Duplicate IP
-        if ip:
-            if ip in seen_ips:
-                errors.append("Duplicate IP detected")
-            else:
-                seen_ips.add(ip)
+    def _duplicate_errors(self, duplicate_name: bool, duplicate_ip: bool) -> List[str]:
+
+        errors = []
+
+        if duplicate_name:
+            errors.append("Duplicate VM name detected")
+
+        if duplicate_ip:
+            errors.append("Duplicate IP detected")
 
         return errors
+
+    # -----------------------------
+    # Duplicate Detection
+    # -----------------------------
+
+    def _duplicates(
+        self,
+        names: Sequence,
+        ips: Sequence,
+        seen_names: SeenKeys,
+        seen_ips: SeenKeys,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Duplicate flags for a whole column at once. Empty values are
+        never duplicates and are not remembered.
+        """
+
+        return (
+            self._flag(names, name_keys, seen_names),
+            self._flag(ips, ip_keys, seen_ips),
+        )
+
+    @staticmethod
+    def _flag(values: Sequence, keys, seen: SeenKeys) -> np.ndarray:
+
+        present = np.fromiter(map(bool, values), dtype=bool, count=len(values))
+        flags = np.zeros(len(values), dtype=bool)
+
+        if present.any():
+            candidates = np.asarray(values, dtype=object)[present]
+            flags[present] = seen.add_many(keys(candidates))
+
+        return flags
@@ -1,6 +1,9 @@
-from template_engine.mapper import TemplateMapper
-from template_engine.validator import TemplateValidator
-from template_engine.generator import TemplateGenerator
+import os
+import tempfile
+
+from app.template_engine.mapper import TemplateMapper
+from app.template_engine.validator import TemplateValidator
+from app.template_engine.generator import TemplateGenerator
 
 
 def main():
@@ -58,16 +61,19 @@ def main():
     ready, failed = validator.validate(mapped_records)
 
     # ✅ GENERATE CSV (ONLY READY RECORDS)
+    # written to the temp dir so running the smoke test leaves the tree clean
+    output_path = os.path.join(tempfile.gettempdir(), "mgn_ready.csv")
+
     generator.write_ready_csv(
         ready,
-        output_path="mgn_ready.csv"
+        output_path=output_path
     )
 
     # -----------------------------
     # OUTPUT
     # -----------------------------
 
-    print("\n✅ CSV GENERATED: mgn_ready.csv")
+    print(f"\n✅ CSV GENERATED: {output_path}")
 
     print("\n✅ READY FOR IMPORT")
     for r in ready:
@@ -0,0 +1,252 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.metrics import METRICS
+from app.settings import EXPORT_TMPDIR, WORKER_POOL_SIZE
+
+
+# ------------------------------------------------
+# POOL LIFECYCLE
+# ------------------------------------------------
+
+_POOL = None
+_THREADS = None
+_POOL_LOCK = Lock()
+
+
+def get_pool():
+    """
+    Lazily start the shared process pool. Workers are spawned, not
+    forked — forking a threaded uvicorn worker is unsafe.
+    """
+
+    global _POOL
+
+    with _POOL_LOCK:
+
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=WORKER_POOL_SIZE,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        return _POOL
+
+
+def get_threads() -> ThreadPoolExecutor:
+    """
+    Stand-in for the pool when WORKER_POOL_SIZE is 0 (see submit_cpu_bound).
+    """
+
+    global _THREADS
+
+    with _POOL_LOCK:
+
+        if _THREADS is None:
+            _THREADS = ThreadPoolExecutor(thread_name_prefix="cpu")
+
+        return _THREADS
+
+
+def shutdown_pool():
+
+    global _POOL, _THREADS
+
+    with _POOL_LOCK:
+
+        if _POOL is not None:
+            _POOL.shutdown(cancel_futures=True)
+            _POOL = None
+
+        if _THREADS is not None:
+            _THREADS.shutdown(cancel_futures=True)
+            _THREADS = None
+
+
+# ------------------------------------------------
+# OFFLOADING
+# ------------------------------------------------
+
+class WorkerHTTPError(Exception):
+    """
+    Picklable stand-in for an HTTPException raised inside a worker —
+    HTTPException itself does not survive the trip back.
+    """
+
+    def __init__(self, status_code, detail, headers=None):
+        super().__init__(status_code, detail, headers)
+        self.status_code = status_code
+        self.detail = detail
+        self.headers = headers
+
+
+def _invoke(fn, *args):
+    # runs in the worker: hand its metrics back with the result
+
+    try:
+        result = fn(*args)
+    except HTTPException as e:
+        raise WorkerHTTPError(e.status_code, e.detail, e.headers) from None
+
+    return result, METRICS.drain()
+
+
+async def run_cpu_bound(fn, *args):
+    """
+    Run fn(*args) off the event loop — in the process pool,
+    or the thread pool when WORKER_POOL_SIZE is 0.
+    fn and its arguments must be picklable.
+    """
+
+    if WORKER_POOL_SIZE <= 0:
+        return await run_in_threadpool(fn, *args)
+
+    loop = asyncio.get_running_loop()
+
+    try:
+        result, metrics = await loop.run_in_executor(get_pool(), partial(_invoke, fn, *args))
+    except WorkerHTTPError as e:
+        raise HTTPException(e.status_code, e.detail, e.headers) from None
+
+    METRICS.merge(metrics)
+
+    return result
+
+
+_EXHAUSTED = object()
+
+
+async def map_partitions(fn, partitions, window: int = 0):
+    """
+    Apply fn to each partition across the pool, yielding results
+    in input order.
+
+    Partitions are pulled from the (blocking) iterator in the thread
+    pool, and at most `window` of them are in flight at once so
+    memory stays bounded. Defaults to two per worker.
+    """
+
+    window = window or max(WORKER_POOL_SIZE, 1) * 2
+
+    iterator = iter(partitions)
+    pending = deque()
+    exhausted = False
+
+    while True:
+
+        while not exhausted and len(pending) < window:
+
+            partition = await run_in_threadpool(next, iterator, _EXHAUSTED)
+
+            if partition is _EXHAUSTED:
+                exhausted = True
+            else:
+                pending.append(asyncio.ensure_future(run_cpu_bound(fn, partition)))
+
+        if not pending:
+            return
+
+        try:
+            yield await pending.popleft()
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+
+def imap_partitions(fn, partitions, window: int = 0):
+    """
+    map_partitions for synchronous callers (background job threads):
+    same ordering and in-flight window, blocking on each result.
+    """
+
+    if WORKER_POOL_SIZE <= 0:
+        yield from map(fn, partitions)
+        return
+
+    window = window or WORKER_POOL_SIZE * 2
+
+    pool = get_pool()
+    pending = deque()
+
+    try:
+        for partition in partitions:
+
+            pending.append(pool.submit(_invoke, fn, partition))
+
+            if len(pending) >= window:
+                yield collect(pending.popleft())
+
+        while pending:
+            yield collect(pending.popleft())
+
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def collect(future: Future):
+    """
+    Result of a pool task (see submit_cpu_bound), with the worker's
+    metrics merged and its HTTP errors raised again as HTTPException.
+    """
+
+    try:
+        result, metrics = future.result()
+    except WorkerHTTPError as e:
+        raise HTTPException(e.status_code, e.detail, e.headers) from None
+
+    METRICS.merge(metrics)
+
+    return result
+
+
+def submit_cpu_bound(fn, *args) -> Future:
+    """
+    Start fn(*args) in the process pool — or a thread when
+    WORKER_POOL_SIZE is 0 — and return at once. The task's own
+    result is read with collect() below.
+    """
+
+    if WORKER_POOL_SIZE <= 0:
+        return get_threads().submit(_invoke_local, fn, *args)
+
+    return get_pool().submit(_invoke, fn, *args)
+
+
+def _invoke_local(fn, *args):
+    # same shape as _invoke; metrics were recorded in this process already
+    return fn(*args), None
+
+
+# ------------------------------------------------
+# UPLOAD HAND-OFF
+# ------------------------------------------------
+
+def spool_upload(file, suffix: str = "") -> str:
+    """
+    Copy an upload to a named temp file so a worker process can
+    open it by path. The caller removes the file when done.
+    """
+
+    file.seek(0)
+
+    with tempfile.NamedTemporaryFile(dir=EXPORT_TMPDIR, delete=False, suffix=suffix) as target:
+        shutil.copyfileobj(file, target, 1024 * 1024)
+
+    return target.name
+
+
+def upload_suffix(file) -> str:
+    # spooled copies keep the upload's extension; readers sniff the content anyway
+    return os.path.splitext(file.filename or "")[1]
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark: single-pass OS tokenizer vs the old chained scans.
+
+Run from backend/:
+    python -m benchmarks.bench_os_fingerprint
+"""
+
+import re
+import timeit
+
+from app.os_fingerprint import parse_os
+
+
+OS_STRINGS = [
+    "Microsoft Windows Server 2019 (64-bit)",
+    "Microsoft Windows Server 2008 R2 Datacenter (64-bit)",
+    "Microsoft Windows 10 (64-bit)",
+    "Red Hat Enterprise Linux 8 (64-bit)",
+    "Red Hat Enterprise Linux 6 (32-bit)",
+    "CentOS 7 (64-bit)",
+    "Oracle Linux 8.6 (64-bit)",
+    "SUSE Linux Enterprise 11 SP4 (64-bit)",
+    "Ubuntu Linux 22.04 (64-bit)",
+    "Debian GNU/Linux 11 (64-bit)",
+    "Amazon Linux 2 (64-bit)",
+    "Other 3.x or later Linux (64-bit)",
+]
+
+
+# ------------------------------------------------
+# LEGACY PARSE (pre-tokenizer classify_os prologue)
+# ------------------------------------------------
+
+def legacy_parse(os_string):
+
+    os_lower = os_string.lower()
+    hard_32 = "32-bit" in os_lower and "windows" not in os_lower
+
+    os_lower = re.sub(r"\(.*?\)", "", os_lower)
+
+    for j in ["or later", "datacenter", "standard", "enterprise"]:
+        os_lower = os_lower.replace(j, "")
+
+    family = None
+    for keyword, name in [
+        ("red hat", "rhel"), ("rhel", "rhel"), ("centos", "centos"),
+        ("oracle", "oracle"), ("rocky", "rocky"), ("amazon linux", "amazon"),
+        ("suse", "sles"), ("ubuntu", "ubuntu"), ("debian", "debian"),
+        ("windows", "windows"),
+    ]:
+        if keyword in os_lower:
+            family = name
+            break
+
+    version_string = re.sub(r"\b(32|64)[-\s]?bit\b", "", os_lower.lower())
+    version_string = re.sub(r"\(.*?\)", "", version_string)
+
+    version = None
+    year = re.search(r"20\d{2}", version_string) if "r2" in version_string else None
+
+    if year:
+        version = int(year.group()) + 1
+    else:
+        match = re.search(r"\b(20\d{2}|\d{1,2}\.\d+|\d{1,2})\b", version_string)
+        if match:
+            version = int(float(match.group()))
+
+    sp = re.search(r"sp\s?(\d+)", os_lower.lower())
+
+    return hard_32, family, version, int(sp.group(1)) if sp else None
+
+
+def main(number=20000):
+
+    tokenizer = parse_os.__wrapped__  # bypass the LRU cache
+
+    def run_legacy():
+        for s in OS_STRINGS:
+            legacy_parse(s)
+
+    def run_tokenizer():
+        for s in OS_STRINGS:
+            tokenizer(s)
+
+    def run_cached():
+        for s in OS_STRINGS:
+            parse_os(s)
+
+    calls = number * len(OS_STRINGS)
+
+    legacy = min(timeit.repeat(run_legacy, number=number, repeat=3)) / calls
+    tokenized = min(timeit.repeat(run_tokenizer, number=number, repeat=3)) / calls
+    cached = min(timeit.repeat(run_cached, number=number, repeat=3)) / calls
+
+    print(f"legacy chained scans : {legacy * 1e6:8.2f} µs/string")
+    print(f"single-pass tokenizer: {tokenized * 1e6:8.2f} µs/string")
+    print(f"tokenizer, LRU hit   : {cached * 1e6:8.2f} µs/string")
+    print(f"speedup (uncached)   : {legacy / tokenized:8.2f}x")
+    print(f"speedup (cached)     : {legacy / cached:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Throughput benchmarks: rows/sec and peak RSS for
+
+    classify_os          the cached per-string classifier, cache cleared first
+    classify_route       POST /classifier/classify through TestClient
+    classify_stream      POST /classifier/classify/stream (NDJSON)
+    export_dashboard     POST /classifier/export-dashboard (xlsx workbook)
+    template_pipeline    RecordBuilder → TemplateMapper → TemplateValidator
+                         → TemplateGenerator over a CSV on disk
+
+on synthetic inventories (see benchmarks/synthetic.py). Every
+case × size runs in a fresh interpreter so peak RSS is its own;
+worker-pool processes are reported separately.
+
+Run from backend/:
+    python -m benchmarks.bench_throughput
+    python -m benchmarks.bench_throughput --sizes 1k,10k,100k,1m --output baseline.json
+    python -m benchmarks.bench_throughput --baseline baseline.json
+
+With --baseline, results are compared per case and size; a drop in
+rows/sec or a rise in peak RSS beyond --tolerance is a regression
+and the exit status is 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, List
+
+from benchmarks.synthetic import SIZES, write_inventory
+
+
+CASES = ["classify_os", "classify_route", "classify_stream", "export_dashboard", "template_pipeline"]
+
+DEFAULT_SIZES = ["1k", "10k", "100k"]
+
+# Rows of the untimed warm-up pass
+WARMUP_ROWS = 200
+
+# Relative change that counts as a regression
+DEFAULT_TOLERANCE = 0.15
+
+# Case environment: no result cache, no rule polling in the way
+CASE_ENV = {
+    "RESULT_CACHE_MAX_BYTES": "0",
+    "RULES_POLL_SECONDS": "0",
+}
+
+
+# ------------------------------------------------
+# CASES
+# ------------------------------------------------
+# Each is a context manager: setup (imports, app startup, worker
+# pool spawn) happens on entry and is not timed; the yielded
+# callable takes an inventory CSV path and returns the rows it processed.
+
+@contextmanager
+def case_classify_os():
+
+    import pandas as pd
+    from app.classifier import classify_os, clear_cache
+
+    def run(path):
+
+        values = pd.read_csv(path, usecols=["Guest OS"])["Guest OS"].map(str).tolist()
+
+        clear_cache()
+
+        for value in values:
+            classify_os(value)
+
+        return len(values)
+
+    yield run
+
+
+@contextmanager
+def case_classify_route():
+
+    with _client() as client:
+
+        def run(path):
+
+            with open(path, "rb") as f:
+                response = client.post("/classifier/classify", files={"file": ("inventory.csv", f)})
+
+            response.raise_for_status()
+
+            return response.json()["total"]
+
+        yield run
+
+
+@contextmanager
+def case_classify_stream():
+
+    with _client() as client:
+
+        def run(path):
+
+            rows = -1  # trailer line
+
+            with open(path, "rb") as f:
+                with client.stream(
+                    "POST", "/classifier/classify/stream", files={"file": ("inventory.csv", f)}
+                ) as response:
+                    response.raise_for_status()
+                    for _ in response.iter_lines():
+                        rows += 1
+
+            return rows
+
+        yield run
+
+
+@contextmanager
+def case_export_dashboard():
+
+    import io
+    from openpyxl import load_workbook
+
+    with _client() as client:
+
+        def run(path):
+
+            with open(path, "rb") as f:
+                response = client.post("/classifier/export-dashboard", files={"file": ("inventory.csv", f)})
+
+            response.raise_for_status()
+
+            # one sheet per decision, each with a header row; the
+            # dimension tag is enough, no cells are read
+            workbook = load_workbook(io.BytesIO(response.content), read_only=True)
+
+            return sum(sheet.max_row - 1 for sheet in workbook.worksheets)
+
+        yield run
+
+
+@contextmanager
+def case_template_pipeline():
+
+    from app.template_engine.pipeline import generate_template_csv
+
+    with tempfile.TemporaryDirectory() as out:
+
+        def run(path):
+            counts = generate_template_csv(
+                path, "123456789012", "us-east-1", os.path.join(out, "mgn_import_ready.csv")
+            )
+            return counts["rows"]
+
+        yield run
+
+
+def _client():
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    # the context runs the lifespan, so the worker pool is shut down
+    # (and its peak RSS collected) when the case exits
+    return TestClient(app)
+
+
+# ------------------------------------------------
+# MEASUREMENT
+# ------------------------------------------------
+
+def measure(case: str, path: str, rows: int, repeat: int) -> Dict:
+    """
+    Runs inside the case's own interpreter. One warm-up pass over the
+    first rows of the inventory (imports, pool spawn) is not timed.
+    """
+
+    rss_before = _rss_mb(resource.RUSAGE_SELF)
+    best = None
+
+    with globals()[f"case_{case}"]() as run, _head(path, WARMUP_ROWS) as warmup:
+
+        run(warmup)
+
+        for _ in range(repeat):
+
+            started = time.perf_counter()
+            processed = run(path)
+            elapsed = time.perf_counter() - started
+
+            best = elapsed if best is None else min(best, elapsed)
+
+    return {
+        "case": case,
+        "rows": rows,
+        "processed": processed,
+        "seconds": round(best, 4),
+        "rows_per_sec": round(rows / best, 1),
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": _rss_mb(resource.RUSAGE_SELF),
+        "workers_peak_rss_mb": _rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+@contextmanager
+def _head(path: str, rows: int):
+
+    with open(path) as source, tempfile.NamedTemporaryFile("w", suffix=".csv") as head:
+        head.writelines(islice(source, rows + 1))
+        head.flush()
+        yield head.name
+
+
+def run_case(case: str, path: str, rows: int, repeat: int) -> Dict:
+
+    command = [
+        sys.executable, "-m", "benchmarks.bench_throughput",
+        "--run-case", case, "--input", path, "--rows", str(rows), "--repeat", str(repeat),
+    ]
+
+    result = subprocess.run(
+        command,
+        env={**os.environ, **CASE_ENV},
+        capture_output=True,
+        text=True,
+    )
+
+    if result.returncode != 0:
+        raise RuntimeError(f"{case} @ {rows} rows failed:\n{result.stderr}")
+
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _rss_mb(who) -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# ------------------------------------------------
+# COMPARISON
+# ------------------------------------------------
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[Dict]:
+    """
+    One entry per case / size of this run, flagged when throughput
+    fell or peak memory grew by more than tolerance. Cases the
+    baseline lacks are listed with no ratios.
+    """
+
+    previous = {(r["case"], r["rows"]): r for r in baseline}
+
+    report = []
+
+    for result in results:
+
+        before = previous.get((result["case"], result["rows"]))
+
+        if before is None:
+            # a case added since the baseline was taken: listed, never a regression
+            report.append({
+                "case": result["case"],
+                "rows": result["rows"],
+                "rows_per_sec_ratio": None,
+                "peak_rss_ratio": None,
+                "regressions": [],
+            })
+            continue
+
+        speed = result["rows_per_sec"] / before["rows_per_sec"]
+        memory = result["peak_rss_mb"] / before["peak_rss_mb"]
+
+        regressions = []
+
+        if speed < 1 - tolerance:
+            regressions.append("rows_per_sec")
+
+        if memory > 1 + tolerance:
+            regressions.append("peak_rss_mb")
+
+        report.append({
+            "case": result["case"],
+            "rows": result["rows"],
+            "rows_per_sec_ratio": round(speed, 3),
+            "peak_rss_ratio": round(memory, 3),
+            "regressions": regressions,
+        })
+
+    return report
+
+
+def print_table(results: List[Dict], comparison: List[Dict]):
+
+    flags = {(c["case"], c["rows"]): c for c in comparison}
+
+    print(f"{'case':<18} {'rows':>9} {'rows/s':>12} {'peak MB':>9} {'workers MB':>11}  vs baseline",
+          file=sys.stderr)
+
+    for r in results:
+
+        c = flags.get((r["case"], r["rows"]))
+        verdict = ""
+
+        if c and c["rows_per_sec_ratio"] is None:
+            verdict = "not in baseline"
+        elif c:
+            verdict = f"x{c['rows_per_sec_ratio']:.2f} speed, x{c['peak_rss_ratio']:.2f} mem"
+            if c["regressions"]:
+                verdict += "  REGRESSION: " + ", ".join(c["regressions"])
+
+        print(
+            f"{r['case']:<18} {r['rows']:>9} {r['rows_per_sec']:>12,.0f} "
+            f"{r['peak_rss_mb']:>9.1f} {r['workers_peak_rss_mb']:>11.1f}  {verdict}",
+            file=sys.stderr,
+        )
+
+
+# ------------------------------------------------
+# CLI
+# ------------------------------------------------
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated subset of " + ", ".join(CASES))
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help="comma-separated subset of " + ", ".join(SIZES))
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case; the fastest counts")
+    parser.add_argument("--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+
+    # internal: run a single case in this process
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        print(json.dumps(measure(args.run_case, args.input, args.rows, args.repeat)))
+        return 0
+
+    cases = args.cases.split(",")
+    sizes = args.sizes.split(",")
+
+    unknown = [c for c in cases if c not in CASES] + [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown case / size: {', '.join(unknown)}")
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+
+        for size in sizes:
+
+            rows = SIZES[size]
+            path = write_inventory(rows, os.path.join(workdir, f"inventory_{size}.csv"))
+
+            for case in cases:
+                print(f"… {case} @ {size}", file=sys.stderr)
+                results.append(run_case(case, path, rows, args.repeat))
+
+    comparison = []
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare(results, json.load(f)["results"], args.tolerance)
+
+    document = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "worker_pool_size": os.getenv("WORKER_POOL_SIZE"),
+        },
+        "results": results,
+        "comparison": comparison,
+    }
+
+    print_table(results, comparison)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+    else:
+        print(json.dumps(document, indent=2))
+
+    return 1 if any(c["regressions"] for c in comparison) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+Synthetic RVTools-style inventories for the benchmarks.
+
+Guest OS strings are drawn from the families and versions named in
+rules/mgn_rules.yaml, so every rule branch (supported, conditional,
+deprecated, unsupported, special rules) gets traffic, plus a tail of
+strings no rule knows. Output is deterministic for a given seed.
+
+Run from backend/ to write a CSV:
+    python -m benchmarks.synthetic 100000 /tmp/inventory.csv
+"""
+
+import sys
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.rule_registry import MGN_RULES_FILE
+from app.rules_loader import load_rules
+
+
+SIZES = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+INVENTORY_COLUMNS = ["Name", "Guest OS", "CPU", "RAM", "Power State", "IP Address"]
+
+
+# ------------------------------------------------
+# OS CATALOGUE
+# ------------------------------------------------
+
+# Rough share of each family in a VMware estate
+FAMILY_WEIGHTS = {
+    "windows": 0.45,
+    "rhel": 0.15,
+    "centos": 0.09,
+    "ubuntu": 0.09,
+    "oracle": 0.05,
+    "sles": 0.04,
+    "debian": 0.03,
+    "amazon_linux": 0.02,
+    "rocky": 0.02,
+}
+
+# How vSphere spells each family
+FAMILY_NAMES = {
+    "rhel": "Red Hat Enterprise Linux {v}",
+    "centos": "CentOS {v}",
+    "ubuntu": "Ubuntu Linux {v}",
+    "oracle": "Oracle Linux {v}",
+    "sles": "SUSE Linux Enterprise {v}",
+    "debian": "Debian GNU/Linux {v}",
+    "amazon_linux": "Amazon Linux {v}",
+    "rocky": "Rocky Linux {v}",
+}
+
+# Strings that match no rule, or barely parse
+UNKNOWN_OS = [
+    "Other 3.x or later Linux",
+    "Other Linux",
+    "FreeBSD 12",
+    "Solaris 10",
+    "VMware Photon OS",
+    "",
+]
+UNKNOWN_SHARE = 0.06
+
+# Ranges in the rules span years; only these were ever released
+WINDOWS_SERVER_RELEASES = (2003, 2008, 2008.1, 2012, 2012.1, 2016, 2019, 2022, 2025)
+
+ARCHITECTURES = [(" (64-bit)", 0.85), (" (32-bit)", 0.10), ("", 0.05)]
+
+
+def os_catalogue(rules: Dict = None) -> Tuple[List[str], np.ndarray]:
+    """
+    (OS strings, probabilities) for every family / version / arch
+    combination the rules mention.
+    """
+
+    rules = rules if rules is not None else load_rules(MGN_RULES_FILE)
+
+    names, weights = [], []
+
+    families = {f: w for f, w in FAMILY_WEIGHTS.items() if f in rules}
+    scale = (1 - UNKNOWN_SHARE) / sum(families.values())
+
+    for family, share in families.items():
+
+        base = _family_strings(family, rules[family])
+
+        for name in base:
+            for suffix, arch_share in ARCHITECTURES:
+                names.append(name + suffix)
+                weights.append(share * scale * arch_share / len(base))
+
+    for name in UNKNOWN_OS:
+        names.append(name)
+        weights.append(UNKNOWN_SHARE / len(UNKNOWN_OS))
+
+    weights = np.asarray(weights)
+
+    return names, weights / weights.sum()
+
+
+def _family_strings(family: str, rule: Dict) -> List[str]:
+
+    versions = sorted(_versions(rule))
+
+    if family == "windows":
+
+        servers = [v for v in versions if v >= 2000]
+        versions = [v for v in versions if v < 2000] + [
+            v for v in WINDOWS_SERVER_RELEASES if servers and servers[0] <= v <= servers[-1]
+        ]
+
+        return [
+            f"Microsoft Windows Server {_windows_year(v)}" if v >= 2000
+            else f"Microsoft Windows {_number(v)}"
+            for v in versions
+        ]
+
+    template = FAMILY_NAMES.get(family, family.replace("_", " ").title() + " {v}")
+
+    strings = []
+
+    for v in versions:
+
+        label = f"{int(v)}.04" if family == "ubuntu" and v == int(v) else _number(v)
+        strings.append(template.format(v=label))
+
+    # service-pack gated releases, e.g. sles 11 SP4
+    for major, special in (rule.get("special_rules") or {}).items():
+        sp = special.get("min_sp")
+        if sp:
+            strings.append(template.format(v=major) + f" SP{sp}")
+            strings.append(template.format(v=major) + f" SP{max(sp - 2, 1)}")
+
+    return strings
+
+
+def _versions(rule: Dict) -> set:
+    """
+    Every version a family's rules mention: listed ones, range
+    endpoints and the whole numbers inside short ranges.
+    """
+
+    found = set()
+
+    for key, value in rule.items():
+
+        if key == "special_rules":
+            found.update(float(v) for v in value)
+            continue
+
+        pairs = value if key.endswith("ranges") else [value] if key.endswith("range") else []
+
+        for lo, hi in pairs:
+            found.update((float(lo), float(hi)))
+            if hi - lo <= 20:
+                found.update(float(v) for v in range(int(lo) + 1, int(hi)))
+
+        if not pairs and isinstance(value, list):
+            found.update(float(v) for v in value)
+
+    return found
+
+
+def _windows_year(v: float) -> str:
+    # 2008.1 in the rules is 2008 R2
+    return f"{int(v)} R2" if v != int(v) else str(int(v))
+
+
+def _number(v: float) -> str:
+    return str(int(v)) if v == int(v) else str(v)
+
+
+# ------------------------------------------------
+# INVENTORIES
+# ------------------------------------------------
+
+def synthetic_inventory(rows: int, seed: int = 7) -> pd.DataFrame:
+    """
+    An inventory of `rows` VMs with the classifier's input columns and
+    an IP column. About 1% of IPs repeat, 0.5% of names repeat and 1%
+    of IPs are blank, so the template validator has work to do.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    names, p = os_catalogue()
+
+    index = np.arange(rows)
+
+    vm_names = np.char.add("vm-", index.astype(str))
+    dup_names = rng.random(rows) < 0.005
+    vm_names[dup_names] = vm_names[rng.integers(0, rows, dup_names.sum())]
+
+    ips = _ipv4(index)
+    dup_ips = rng.random(rows) < 0.01
+    ips[dup_ips] = ips[rng.integers(0, rows, dup_ips.sum())]
+    ips[rng.random(rows) < 0.01] = ""
+
+    return pd.DataFrame({
+        "Name": vm_names,
+        "Guest OS": np.asarray(names, dtype=object)[rng.choice(len(names), rows, p=p)],
+        "CPU": rng.choice([1, 2, 4, 8, 16], rows, p=[0.1, 0.35, 0.3, 0.2, 0.05]),
+        "RAM": rng.choice([2, 4, 8, 16, 32, 64], rows, p=[0.1, 0.25, 0.3, 0.2, 0.1, 0.05]),
+        "Power State": np.where(rng.random(rows) < 0.85, "poweredOn", "poweredOff"),
+        "IP Address": ips,
+    }, columns=INVENTORY_COLUMNS)
+
+
+def write_inventory(rows: int, path: str, seed: int = 7) -> str:
+    synthetic_inventory(rows, seed).to_csv(path, index=False)
+    return path
+
+
+def _ipv4(index: np.ndarray) -> np.ndarray:
+    # 10.x.y.z, unique per row up to 16M rows
+    octets = [(index >> shift) & 0xFF for shift in (16, 8, 0)]
+    quad = np.char.add("10.", octets[0].astype(str))
+    for octet in octets[1:]:
+        quad = np.char.add(np.char.add(quad, "."), octet.astype(str))
+    return quad.astype(object)
+
+
+if __name__ == "__main__":
+    write_inventory(SIZES.get(sys.argv[1], None) or int(sys.argv[1]), sys.argv[2])
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Settings are read at import, so the environment is fixed before any
+# app module loads: rule files in a scratch copy the tests may edit,
+# no result cache, no poller, classification in-process.
+RULES_DIR = tempfile.mkdtemp(prefix="classifier-rules-")
+shutil.copytree(os.path.join(BACKEND_DIR, "rules"), RULES_DIR, dirs_exist_ok=True)
+
+JOB_STORE_DIR = tempfile.mkdtemp(prefix="classifier-jobs-")
+
+os.environ["RULES_DIR"] = RULES_DIR
+os.environ["JOB_STORE_DIR"] = JOB_STORE_DIR
+os.environ["RULES_POLL_SECONDS"] = "0"
+os.environ["RESULT_CACHE_MAX_BYTES"] = "0"
+os.environ["WORKER_POOL_SIZE"] = "0"
+os.environ["METRICS_ENABLED"] = "0"
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(RULES_DIR, ignore_errors=True)
+    shutil.rmtree(JOB_STORE_DIR, ignore_errors=True)
+
+
+class RuleFiles:
+    """
+    Edits to the scratch rule files, undone after the test.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.originals = {}
+
+        for name in os.listdir(directory):
+            with open(os.path.join(directory, name)) as f:
+                self.originals[name] = f.read()
+
+    def edit(self, name: str, old: str, new: str):
+
+        path = os.path.join(self.directory, name)
+
+        with open(path) as f:
+            text = f.read()
+
+        assert old in text
+
+        self._write(path, text.replace(old, new))
+
+    def restore(self):
+        for name, text in self.originals.items():
+            self._write(os.path.join(self.directory, name), text)
+
+    def _write(self, path: str, text: str):
+
+        with open(path, "w") as f:
+            f.write(text)
+
+        # step the mtime forward so a reload always notices the edit
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def rule_files():
+
+    from app import classifier
+
+    files = RuleFiles(RULES_DIR)
+
+    yield files
+
+    files.restore()
+    classifier.reload_rules()
@@ -0,0 +1,160 @@
+import ipaddress
+import random
+
+import numpy as np
+import pytest
+
+from app.template_engine.dedupe import SeenKeys, ip_keys, name_keys
+from app.template_engine.validator import TemplateValidator
+
+
+CANONICAL = [
+    "0.0.0.0",
+    "10.0.0.1",
+    "10.0.0.2",
+    "10.0.1.0",
+    "172.16.254.3",
+    "192.168.0.10",
+    "255.255.255.255",
+]
+
+NOT_CANONICAL = [
+    # leading zeros
+    "010.0.0.1", "10.00.0.1", "10.0.0.01", "00.0.0.0", "10.0.0.001",
+    # out of range / too long
+    "256.0.0.1", "10.0.0.300", "999.999.999.999", "1234.1.1.1", "1.1.1.1234",
+    "255.255.255.2555",
+    # whitespace
+    " 10.0.0.1", "10.0.0.1 ", "10.0.0.1\n", "\t10.0.0.1", "10. 0.0.1",
+    # IPv6
+    "fe80::1", "::1", "::ffff:10.0.0.1", "2001:db8::1",
+    # wrong shape
+    "10.0.0", "10.0.0.1.5", "10..0.1", ".10.0.0", "10.0.0.", "...",
+    # garbage, including spellings of the same number
+    "abc", "1.2.3.4a", "10.0.0.1/24", "0x0A.0.0.1", "1e3.0.0.1",
+    "167772161", "4294967295", "10.0.0.1,10.0.0.2",
+    # non-ASCII digits
+    "１０.０.０.１", "10.0.0.١",
+]
+
+
+def _reference(batches):
+    """
+    Duplicate flags from the set-based dedupe this replaced.
+    """
+
+    seen = set()
+    flags = []
+
+    for batch in batches:
+        for value in batch:
+            if value and value in seen:
+                flags.append(True)
+            else:
+                if value:
+                    seen.add(value)
+                flags.append(False)
+
+    return flags
+
+
+def _flags(batches, keys):
+
+    seen = SeenKeys()
+    flags = []
+
+    for batch in batches:
+        flags.extend(TemplateValidator._flag(batch, keys, seen).tolist())
+
+    return flags
+
+
+def test_canonical_addresses_pack_to_their_integer():
+
+    keys = ip_keys(CANONICAL)
+
+    assert keys.tolist() == [int(ipaddress.IPv4Address(v)) for v in CANONICAL]
+
+
+def test_other_strings_never_pack():
+
+    keys = ip_keys(NOT_CANONICAL)
+
+    # digests carry the top bit; packed addresses are < 2**32
+    assert (keys >= np.uint64(1 << 63)).all()
+
+
+def test_keys_are_equal_exactly_when_strings_are():
+
+    values = CANONICAL + NOT_CANONICAL
+    keys = ip_keys(values).tolist()
+
+    for i, a in enumerate(values):
+        for j, b in enumerate(values):
+            assert (keys[i] == keys[j]) == (a == b), (a, b)
+
+
+def test_keys_do_not_depend_on_batch_neighbours():
+
+    values = CANONICAL + NOT_CANONICAL
+    alone = [ip_keys([v])[0] for v in values]
+
+    assert ip_keys(values).tolist() == alone
+
+
+def test_duplicates_inside_one_batch():
+
+    batch = ["10.0.0.1", "010.0.0.1", "10.0.0.1", "", None, "", "fe80::1", "fe80::1", " 10.0.0.1"]
+
+    assert _flags([batch], ip_keys) == _reference([batch])
+    assert _flags([batch], ip_keys) == [False, False, True, False, False, False, False, True, False]
+
+
+def test_duplicates_across_batches():
+
+    batches = [
+        ["10.0.0.1", "abc"],
+        ["10.0.0.2", "10.0.0.1"],
+        [],
+        ["abc", "010.0.0.1", "10.0.0.2"],
+    ]
+
+    assert _flags(batches, ip_keys) == _reference(batches)
+    assert _flags(batches, ip_keys) == [False, False, False, True, True, False, True]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_set_dedupe_on_random_streams(seed):
+
+    rng = random.Random(seed)
+    pool = CANONICAL + NOT_CANONICAL + ["", None]
+
+    batches = [
+        [rng.choice(pool) for _ in range(rng.randint(0, 40))]
+        for _ in range(rng.randint(1, 8))
+    ]
+
+    assert _flags(batches, ip_keys) == _reference(batches)
+
+
+def test_name_keys_match_set_dedupe():
+
+    batches = [
+        ["web-01", "db-01", "web-01", ""],
+        ["db-01", "Web-01", "web-01 ", "app"],
+        ["app", None, "web-01"],
+    ]
+
+    assert _flags(batches, name_keys) == _reference(batches)
+
+
+def test_seen_keys_first_occurrence_wins():
+
+    seen = SeenKeys()
+
+    first = seen.add_many(np.array([5, 3, 5, 9], dtype=np.uint64))
+    second = seen.add_many(np.array([9, 1, 1, 3, 7], dtype=np.uint64))
+
+    assert first.tolist() == [False, False, True, False]
+    assert second.tolist() == [True, False, True, True, False]
+    assert len(seen) == 5
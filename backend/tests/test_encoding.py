@@ -0,0 +1,253 @@
+import gzip
+import io
+import json
+
+import numpy as np
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app import classifier, encoding, inventory
+from app.encoding import COMPRESS_MIN_BYTES, dumps, encoded_response, negotiate
+from app.inventory import COLUMNAR_FORMAT, DECISION_COLUMNS, ColumnarResult, columnar_partition
+from app.main import app
+from benchmarks.synthetic import synthetic_inventory
+
+
+COLUMNAR = "application/vnd.migration.columnar+json"
+
+ROWS = 450
+
+
+@pytest.fixture(scope="module")
+def inventory_csv():
+    return synthetic_inventory(ROWS, seed=21).to_csv(index=False).encode()
+
+
+def _classify(client, csv, **headers):
+    return client.post(
+        "/classifier/classify",
+        files={"file": ("inventory.csv", io.BytesIO(csv))},
+        headers=headers,
+    )
+
+
+def _rows(body):
+    """
+    The row format rebuilt from a columnar body.
+    """
+
+    columns = body["columns"]
+    decisions = body["decisions"]
+
+    assert decisions["columns"] == DECISION_COLUMNS
+
+    rows = []
+
+    for i, code in enumerate(body["decision_codes"]):
+        row = {name: values[i] for name, values in columns.items()}
+        row.update(zip(decisions["columns"], decisions["values"][code]))
+        rows.append(row)
+
+    return rows
+
+
+# ------------------------------------------------
+# COLUMNAR
+# ------------------------------------------------
+
+def test_columnar_rebuilds_the_json_rows(monkeypatch, inventory_csv):
+
+    # several partitions, so codes have to be merged
+    monkeypatch.setattr(inventory, "PARTITION_ROWS", 100)
+
+    with TestClient(app) as client:
+        rows = _classify(client, inventory_csv).json()
+        response = _classify(client, inventory_csv, accept=COLUMNAR)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(COLUMNAR)
+
+    body = response.json()
+
+    assert body["format"] == COLUMNAR_FORMAT
+    assert body["total"] == rows["total"] == ROWS
+    assert body["summary"] == rows["summary"]
+    assert len(body["decision_codes"]) == ROWS
+
+    assert _rows(body) == rows["data"]
+
+
+def test_codes_are_merged_across_partitions():
+
+    version = classifier.RULES.version
+
+    chunk = synthetic_inventory(200, seed=7)
+    parts = [
+        columnar_partition((chunk.iloc[:80], version)),
+        columnar_partition((chunk.iloc[80:80], version)),   # empty partition
+        columnar_partition((chunk.iloc[80:].iloc[::-1], version)),
+    ]
+
+    merged = ColumnarResult()
+    for part in parts:
+        merged.add(part)
+
+    body = merged.as_dict()
+
+    # one dictionary entry per distinct tuple, whichever partition saw it
+    values = [tuple(v) for v in body["decisions"]["values"]]
+    assert len(values) == len(set(values))
+
+    expected = []
+    for _, distinct, codes, _ in parts:
+        expected.extend(distinct[code] for code in codes)
+
+    codes = body["decision_codes"]
+    assert codes.dtype == np.int32
+    assert [values[code] for code in codes] == expected
+
+    # each partition's codes are local to it
+    assert parts[2][2].max() < len(parts[2][1])
+    assert body["total"] == 200
+
+
+def test_empty_result():
+
+    body = ColumnarResult().as_dict()
+
+    assert body["total"] == 0
+    assert body["decisions"]["values"] == []
+    assert len(body["decision_codes"]) == 0
+    assert json.loads(dumps(body))["decision_codes"] == []
+
+
+# ------------------------------------------------
+# CONTENT ENCODING
+# ------------------------------------------------
+
+@pytest.mark.parametrize("header, coding", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("br", "br"),
+    ("gzip, deflate, br", "br"),
+    ("GZIP;q=0.5, BR;q=1.0", "br"),
+    ("gzip, br;q=0", "gzip"),
+    ("br; q=0.0, gzip;q=0", None),
+    ("deflate", None),
+])
+def test_negotiate(header, coding):
+    assert negotiate(header) == coding
+
+
+def test_negotiate_without_brotli(monkeypatch):
+
+    monkeypatch.setattr(encoding, "brotli", None)
+
+    assert negotiate("gzip, br") == "gzip"
+    assert negotiate("br") is None
+
+
+def _decode(response):
+
+    coding = response.headers.get("content-encoding")
+
+    if coding == "br":
+        return encoding.brotli.decompress(response.body)
+
+    if coding == "gzip":
+        return gzip.decompress(response.body)
+
+    return response.body
+
+
+@pytest.mark.parametrize("accept, coding", [
+    ("gzip, br", "br"),
+    ("gzip", "gzip"),
+    ("identity", None),
+])
+def test_encoded_response(accept, coding):
+
+    body = b"x" * COMPRESS_MIN_BYTES
+
+    response = encoded_response(body, "application/json", accept, headers={"X-Test": "1"})
+
+    assert response.headers.get("content-encoding") == coding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["x-test"] == "1"
+    assert _decode(response) == body
+
+
+def test_small_bodies_are_not_compressed():
+
+    response = encoded_response(b"{}", "application/json", "gzip, br")
+
+    assert "content-encoding" not in response.headers
+    assert response.body == b"{}"
+
+
+@pytest.mark.parametrize("accept_encoding, coding", [("gzip", "gzip"), ("br", "br")])
+def test_classify_route_compresses(inventory_csv, accept_encoding, coding):
+
+    with TestClient(app) as client:
+
+        plain = _classify(client, inventory_csv, **{"accept-encoding": "identity"})
+        response = _classify(client, inventory_csv, **{"accept-encoding": accept_encoding})
+
+    assert "content-encoding" not in plain.headers
+    assert response.headers["content-encoding"] == coding
+
+    # the client decodes it transparently
+    assert response.json() == plain.json()
+
+
+# ------------------------------------------------
+# JSON
+# ------------------------------------------------
+
+CONTENT = {
+    "text": "café ✓",
+    "none": None,
+    "nested": [{"a": 1, "b": 2.5}, [True, False]],
+    "int": np.int64(7),
+    "float": np.float32(0.5),
+    "codes": np.arange(4, dtype=np.int32),
+}
+
+
+def _plain(content):
+    return json.loads(json.dumps(content, default=encoding._numpy_default))
+
+
+def test_stdlib_fallback_matches_json_response(monkeypatch):
+
+    monkeypatch.setattr(encoding, "orjson", None)
+
+    plain = _plain(CONTENT)
+
+    assert dumps(CONTENT) == JSONResponse(plain).body
+    assert json.loads(dumps(CONTENT)) == plain
+
+
+def test_stdlib_fallback_rejects_nan(monkeypatch):
+
+    monkeypatch.setattr(encoding, "orjson", None)
+
+    with pytest.raises(ValueError):
+        dumps({"x": float("nan")})
+
+    with pytest.raises(TypeError):
+        dumps({"x": object()})
+
+
+def test_orjson_matches_stdlib(monkeypatch):
+
+    pytest.importorskip("orjson")
+
+    fast = dumps(CONTENT)
+
+    monkeypatch.setattr(encoding, "orjson", None)
+
+    assert json.loads(fast) == json.loads(dumps(CONTENT))
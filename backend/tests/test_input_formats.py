@@ -0,0 +1,210 @@
+import gzip
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import pytest
+import zstandard
+from fastapi.testclient import TestClient
+
+from app import input_formats
+from app.input_formats import UNSUPPORTED_MESSAGE, iter_frames, read_frame, read_header, sniff_format
+from app.main import app
+
+
+FRAME = pd.DataFrame({
+    "Name": ["vm-0", "vm-1", "vm-2", "vm-3", "vm-4", "vm-5", "vm-6"],
+    "Guest OS": ["Ubuntu Linux (64-bit)", None, "Microsoft Windows Server 2019 (64-bit)", "CentOS 7 (64-bit)", None, "Solaris 10", "RHEL 8"],
+    "CPU": [2, 4, 8, 2, 16, 1, 4],
+    "IP Address": ["10.0.0.0", "10.0.0.1", None, "10.0.0.3", "10.0.0.4", "10.0.0.5", "10.0.0.6"],
+})
+
+
+def _csv():
+    return FRAME.to_csv(index=False).encode()
+
+
+def _xlsx():
+
+    buffer = io.BytesIO()
+
+    # RVTools puts the VMs on vInfo, after other sheets
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        pd.DataFrame({"Host": ["esx-0"]}).to_excel(writer, sheet_name="vHost", index=False)
+        FRAME.to_excel(writer, sheet_name="vInfo", index=False)
+
+    return buffer.getvalue()
+
+
+def _parquet():
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(FRAME, preserve_index=False), buffer, row_group_size=3)
+    return buffer.getvalue()
+
+
+def _ipc(new_writer):
+
+    table = pa.Table.from_pandas(FRAME, preserve_index=False)
+    sink = io.BytesIO()
+
+    # small batches, so chunks have to be regrouped across them
+    with new_writer(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=3):
+            writer.write_batch(batch)
+
+    return sink.getvalue()
+
+
+def _feather():
+    buffer = io.BytesIO()
+    feather.write_feather(pa.Table.from_pandas(FRAME, preserve_index=False), buffer)
+    return buffer.getvalue()
+
+
+FORMATS = {
+    "csv": (_csv, ("csv", None)),
+    "csv.gz": (lambda: gzip.compress(_csv()), ("csv", "gzip")),
+    "csv.zst": (lambda: zstandard.ZstdCompressor().compress(_csv()), ("csv", "zstd")),
+    "xlsx": (_xlsx, ("xlsx", None)),
+    "parquet": (_parquet, ("parquet", None)),
+    "arrow": (lambda: _ipc(pa.ipc.new_file), ("arrow", None)),
+    "arrow-stream": (lambda: _ipc(pa.ipc.new_stream), ("arrow-stream", None)),
+    "feather": (_feather, ("arrow", None)),
+}
+
+
+@pytest.fixture(params=list(FORMATS))
+def upload(request):
+    build, sniffed = FORMATS[request.param]
+    return io.BytesIO(build()), sniffed
+
+
+def _values(df):
+    # nulls as None, whatever the reader used for them
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+def _as_str(df):
+    return _values(df.astype(object).where(df.isna(), df.astype(str)))
+
+
+# ------------------------------------------------
+# ROUND TRIP
+# ------------------------------------------------
+
+def test_sniffed_from_content(upload):
+
+    file, sniffed = upload
+    file.read(3)
+
+    assert sniff_format(file) == sniffed
+    assert file.tell() == 0
+
+
+def test_header(upload):
+
+    file, _ = upload
+
+    assert read_header(file) == list(FRAME.columns)
+    assert file.tell() == 0
+
+
+def test_round_trip_in_chunks(upload):
+
+    file, _ = upload
+
+    frames = list(iter_frames(file, chunksize=4))
+
+    assert [len(df) for df in frames] == [4, 3]
+    assert [list(df.columns) for df in frames] == [list(FRAME.columns)] * 2
+
+    rows = _values(pd.concat(frames, ignore_index=True))
+    assert rows == _values(FRAME)
+
+
+def test_as_str_reads_every_value_as_text(upload):
+
+    file, _ = upload
+
+    df = read_frame(file, as_str=True)
+
+    assert _values(df) == _as_str(FRAME)
+
+
+def test_column_projection(upload):
+
+    file, _ = upload
+
+    # names the file lacks are skipped
+    frames = list(iter_frames(file, chunksize=5, columns=["IP Address", "Name", "Cluster"]))
+
+    assert all(set(df.columns) == {"Name", "IP Address"} for df in frames)
+
+    df = pd.concat(frames, ignore_index=True)
+    assert _values(df[["Name", "IP Address"]]) == _values(FRAME[["Name", "IP Address"]])
+
+
+def test_first_sheet_without_vinfo():
+
+    buffer = io.BytesIO()
+    FRAME.to_excel(buffer, sheet_name="Sheet1", index=False, engine="openpyxl")
+
+    assert read_header(buffer) == list(FRAME.columns)
+    assert _values(read_frame(buffer)) == _values(FRAME)
+
+
+def test_header_only_file_keeps_its_columns():
+
+    df = read_frame(io.BytesIO(b"Name,Guest OS\n"))
+
+    assert df.empty
+    assert list(df.columns) == ["Name", "Guest OS"]
+
+
+@pytest.mark.parametrize("name, supported", [
+    ("inventory.csv", True),
+    ("INVENTORY.CSV.GZ", True),
+    ("inventory.csv.zst", True),
+    ("rvtools.xlsx", True),
+    ("inventory.pq", True),
+    ("inventory.ipc", True),
+    ("inventory.xls", False),
+    ("inventory.json", False),
+    ("inventory.gz", False),
+    ("", False),
+    (None, False),
+])
+def test_is_supported(name, supported):
+    assert input_formats.is_supported(name) is supported
+
+
+# ------------------------------------------------
+# ROUTES
+# ------------------------------------------------
+
+def test_unsupported_extension_is_a_400():
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/template/generate-mgn-template",
+            files={"file": ("inventory.json", io.BytesIO(_csv()))},
+            data={"account_id": "123456789012", "region": "us-east-1"},
+        )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == UNSUPPORTED_MESSAGE
+
+
+def test_renamed_upload_is_read_by_content():
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/template/generate-mgn-template",
+            files={"file": ("inventory.csv", io.BytesIO(_parquet()))},
+            data={"account_id": "123456789012", "region": "us-east-1"},
+        )
+
+    assert response.status_code == 200
+    assert b"vm-0" in response.content
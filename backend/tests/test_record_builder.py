@@ -0,0 +1,45 @@
+import io
+import math
+
+import pytest
+from fastapi import HTTPException
+
+from app.template_engine.record_builder import RecordBuilder
+
+
+CSV = (
+    "VM Name,Guest OS,IP Address,CPU\n"
+    "web-01,Ubuntu Linux 22.04 (64-bit),10.0.0.1,2\n"
+    ",,,\n"
+    "db-01,Microsoft Windows Server 2019 (64-bit),,4\n"
+    "007,RHEL 8,10.0.0.3,\n"
+)
+
+
+def test_build_flattens_the_batches():
+
+    records = RecordBuilder.build(io.BytesIO(CSV.encode()))
+
+    # empty cells stay NaN, as they were with the row-by-row build
+    assert math.isnan(records[1].pop("ip"))
+
+    assert records == [
+        {"vm_name": "web-01", "os": "Ubuntu Linux 22.04 (64-bit)", "ip": "10.0.0.1"},
+        {"vm_name": "db-01", "os": "Microsoft Windows Server 2019 (64-bit)"},
+        # read as strings: the leading zeros survive
+        {"vm_name": "007", "os": "RHEL 8", "ip": "10.0.0.3"},
+    ]
+
+    batches = RecordBuilder.iter_batches(io.BytesIO(CSV.encode()), chunksize=1)
+    flattened = [record for batch in batches for record in batch.records()]
+
+    assert [r["vm_name"] for r in flattened] == [r["vm_name"] for r in records]
+
+
+def test_build_requires_the_template_columns():
+
+    with pytest.raises(HTTPException) as raised:
+        RecordBuilder.build(io.BytesIO(b"VM Name,Guest OS\nweb-01,Ubuntu\n"))
+
+    assert raised.value.status_code == 400
+    assert "'ip'" in raised.value.detail
@@ -0,0 +1,71 @@
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import result_cache
+from app.main import app
+from app.result_cache import RESULT_CACHE
+
+
+INVENTORY = (
+    "Name,Guest OS,CPU,RAM,Power State,IP Address\n"
+    "vm-0,Ubuntu Linux 22.04 (64-bit),2,4,poweredOn,10.0.0.1\n"
+    "vm-1,Microsoft Windows Server 2019 (64-bit),4,8,poweredOn,10.0.0.2\n"
+)
+
+ROUTES = [
+    ("/classifier/classify", "file", {}),
+    ("/classifier/export-dashboard", "file", {}),
+    ("/classifier/batch", "files", {"format": "json"}),
+    ("/template/generate-mgn-template", "file", {"account_id": "123456789012", "region": "us-east-1"}),
+]
+
+
+def _post(client, route, field, data):
+    response = client.post(route, files={field: ("inventory.csv", io.BytesIO(INVENTORY.encode()))}, data=data)
+    assert response.status_code == 200, response.text
+    return response
+
+
+@pytest.fixture
+def hashed(monkeypatch):
+
+    calls = []
+    hash_upload = result_cache.hash_upload
+
+    def counting(file):
+        calls.append(file)
+        return hash_upload(file)
+
+    monkeypatch.setattr(result_cache, "hash_upload", counting)
+
+    return calls
+
+
+@pytest.mark.parametrize("route, field, data", ROUTES)
+def test_uploads_are_not_hashed_when_the_cache_is_off(hashed, route, field, data):
+
+    assert not RESULT_CACHE.enabled
+
+    with TestClient(app) as client:
+        _post(client, route, field, data)
+
+    assert hashed == []
+
+
+@pytest.mark.parametrize("route, field, data", ROUTES)
+def test_uploads_are_hashed_when_the_cache_is_on(hashed, monkeypatch, tmp_path, route, field, data):
+
+    monkeypatch.setattr(RESULT_CACHE, "root", str(tmp_path))
+    monkeypatch.setattr(RESULT_CACHE, "max_bytes", 1 << 20)
+
+    hits = RESULT_CACHE.hits
+
+    with TestClient(app) as client:
+        first = _post(client, route, field, data)
+        second = _post(client, route, field, data)
+
+    assert len(hashed) == 2
+    assert RESULT_CACHE.hits == hits + 1
+    assert second.content == first.content
@@ -0,0 +1,268 @@
+import copy
+import os
+
+import pytest
+
+from app.classifier import classify_os, decision
+from app.os_fingerprint import parse_os
+from app.rule_compiler import IntervalSet, RuleSchemaError, compile_rules
+from app.rule_registry import MGN_RULES_FILE, VMIE_RULES_FILE, RuleRegistry
+from app.rules_loader import load_rules
+from benchmarks.synthetic import os_catalogue
+
+
+MGN = load_rules(MGN_RULES_FILE)
+VMIE = load_rules(VMIE_RULES_FILE)
+
+
+# ------------------------------------------------
+# SCHEMA ERRORS
+# ------------------------------------------------
+
+def _with(family, rules):
+    return {**copy.deepcopy(MGN), family: rules}
+
+
+MALFORMED_MGN = [
+    (["rhel"], "mgn rules: expected a mapping, got list"),
+    (None, "mgn rules: expected a mapping, got NoneType"),
+    (_with("rhel", [7, 9]), "mgn rules: 'rhel': expected a mapping, got list"),
+    (_with("rhel", {"supported_rnage": [7, 9]}), "mgn rules: 'rhel': unknown keys ['supported_rnage']"),
+    (_with("rhel", {"supported_range": [7]}), "mgn rules: 'rhel'.supported_range: expected [low, high], got [7]"),
+    (_with("rhel", {"supported_range": [7, "9"]}), "mgn rules: 'rhel'.supported_range: expected [low, high]"),
+    (_with("rhel", {"supported_range": "7-9"}), "mgn rules: 'rhel'.supported_range: expected [low, high]"),
+    (_with("rhel", {"supported_range": [True, 9]}), "mgn rules: 'rhel'.supported_range: expected [low, high]"),
+    (_with("rhel", {"supported_range": [9, 7]}), "mgn rules: 'rhel'.supported_range: low 9 is greater than high 7"),
+    (_with("oracle", {"supported_minor_ranges": [6, 7]}), "mgn rules: 'oracle'.supported_minor_ranges: expected [low, high], got 6"),
+    (_with("oracle", {"supported_minor_ranges": {"a": 1}}), "mgn rules: 'oracle'.supported_minor_ranges: expected a list, got dict"),
+    (_with("rhel", {"conditional": 6}), "mgn rules: 'rhel'.conditional: expected a list, got int"),
+    (_with("rhel", {"conditional": ["six"]}), "mgn rules: 'rhel'.conditional: versions must be numbers, got 'six'"),
+    (_with("rhel", {"unsupported": [True]}), "mgn rules: 'rhel'.unsupported: versions must be numbers, got True"),
+    (_with("sles", {"special_rules": {"11": {"min_sp": 4}}}), "mgn rules: 'sles'.special_rules: version keys must be integers, got '11'"),
+    (_with("sles", {"special_rules": {11: 4}}), "mgn rules: 'sles'.special_rules.11: expected a mapping, got int"),
+    (_with("sles", {"special_rules": {11: {"min_sp": -1}}}), "mgn rules: 'sles'.special_rules.11.min_sp must be a non-negative integer"),
+    (_with("sles", {"special_rules": {11: {"min_sp": "4"}}}), "mgn rules: 'sles'.special_rules.11.min_sp must be a non-negative integer"),
+    (_with("windows", {"conditional": [2012]}), "mgn rules: 'windows' requires server_supported_range"),
+]
+
+MALFORMED_VMIE = [
+    (None, "vmie rules: expected a mapping, got NoneType"),
+    ({**VMIE, "linux": ["rhel"]}, "vmie rules: unknown keys ['linux']"),
+    ({**VMIE, "windows": [2003, 2025]}, "vmie rules: 'windows': expected a mapping, got list"),
+    ({**VMIE, "windows": {"supported_range": [2025, 2003]}}, "vmie rules: 'windows'.supported_range: low 2025 is greater than high 2003"),
+    ({**VMIE, "windows": {"clients": ["xp"]}}, "vmie rules: 'windows'.clients: versions must be numbers, got 'xp'"),
+    ({**VMIE, "linux_families_supported": "rhel"}, "vmie rules: linux_families_supported: expected a list, got str"),
+    ({**VMIE, "linux_families_supported": ["rhel", 7]}, "vmie rules: linux_families_supported entries must be strings, got 7"),
+]
+
+
+@pytest.mark.parametrize("mgn, message", MALFORMED_MGN)
+def test_malformed_mgn_rules(mgn, message):
+
+    with pytest.raises(RuleSchemaError) as raised:
+        compile_rules(mgn, VMIE)
+
+    assert str(raised.value).startswith(message)
+
+
+@pytest.mark.parametrize("vmie, message", MALFORMED_VMIE)
+def test_malformed_vmie_rules(vmie, message):
+
+    with pytest.raises(RuleSchemaError) as raised:
+        compile_rules(MGN, vmie)
+
+    assert str(raised.value).startswith(message)
+
+
+def test_empty_family_means_no_rules():
+
+    table = compile_rules({**MGN, "fedora": None, "rocky": {}}, VMIE)
+
+    assert table.family("fedora") is None
+    assert table.family("rocky") is None
+
+
+def test_malformed_file_keeps_active_rules(tmp_path):
+
+    mgn_path, vmie_path = tmp_path / "mgn.yaml", tmp_path / "vmie.yaml"
+
+    with open(MGN_RULES_FILE) as f:
+        mgn_path.write_text(f.read())
+    with open(VMIE_RULES_FILE) as f:
+        vmie_path.write_text(f.read())
+
+    registry = RuleRegistry(str(mgn_path), str(vmie_path), interval=0)
+    active = registry.load()
+
+    mgn_path.write_text("rhel:\n  supported_range: [9, 7]\n")
+    os.utime(mgn_path, (1, 1))
+
+    assert registry.reload() is False
+    assert registry.active is active
+    assert registry.last_error.startswith("RuleSchemaError: mgn rules: 'rhel'.supported_range")
+
+
+# ------------------------------------------------
+# INTERVALS
+# ------------------------------------------------
+
+def _in_any(ranges, version):
+    return any(low <= version <= high for low, high in ranges)
+
+
+@pytest.mark.parametrize("ranges", [
+    [],
+    [(7, 7)],
+    [(1, 2), (4, 5)],
+    [(4, 5), (1, 2)],
+    [(1, 2), (2, 3)],
+    [(1, 3), (2, 5)],
+    [(1, 10), (2, 3)],
+    [(6, 7), (8.5, 8.9), (9.0, 9.4)],
+    [(8.5, 8.9), (8.9, 8.9), (8.0, 8.5), (12, 15)],
+])
+def test_interval_set_matches_range_scan(ranges):
+
+    intervals = IntervalSet.from_ranges(ranges)
+
+    grid = [v / 20 for v in range(-20, 340)]
+    edges = [x + d for low, high in ranges for x in (low, high) for d in (-1e-9, 0, 1e-9)]
+
+    for version in grid + edges:
+        assert (version in intervals) == _in_any(ranges, version), version
+
+    assert bool(intervals) == bool(ranges)
+
+
+def test_overlapping_and_adjacent_ranges_merge():
+
+    intervals = IntervalSet.from_ranges([(4, 6), (1, 2), (2, 3), (5, 9), (11, 12)])
+
+    assert intervals.starts == (1, 4, 11)
+    assert intervals.ends == (3, 9, 12)
+
+
+def test_bisect_boundaries():
+
+    intervals = IntervalSet.from_ranges([(1, 2), (4, 5)])
+
+    assert 1 in intervals and 2 in intervals
+    assert 4 in intervals and 5 in intervals
+    assert 0.999 not in intervals
+    assert 2.001 not in intervals
+    assert 3 not in intervals
+    assert 3.999 not in intervals
+    assert 5.001 not in intervals
+    assert 0 not in IntervalSet.from_ranges([])
+
+
+# ------------------------------------------------
+# EQUIVALENCE WITH THE DICT LOOKUPS
+# ------------------------------------------------
+
+def _dict_decision(mgn, vmie, os_string):
+    """
+    The decision path as it was before compilation: raw rule dicts,
+    linear range scans and list membership. Parsing is shared.
+    """
+
+    fingerprint = parse_os(os_string.lower().strip())
+
+    family, version = fingerprint.family, fingerprint.version
+
+    if fingerprint.bits == 32 and fingerprint.platform != "WINDOWS":
+        return decision("REBUILD_REQUIRED", "CRITICAL", "32-bit Linux is not supported by AWS MGN")
+
+    if not family:
+        return decision("NEEDS_REVIEW", "CRITICAL", "Unknown OS — manual validation required")
+
+    if version is None:
+        return decision("ACTION_REQUIRED", "HIGH", "OS detected but version missing")
+
+    rules = mgn.get(family)
+
+    if not rules:
+        return decision("NEEDS_REVIEW", "HIGH", "No MGN rules found for this OS")
+
+    special = rules.get("special_rules", {})
+
+    if int(version) in special and "min_sp" in special[int(version)]:
+
+        min_sp = special[int(version)]["min_sp"]
+        sp = fingerprint.service_pack
+
+        if sp is None:
+            return decision("NEEDS_REVIEW", "HIGH", f"{family.upper()} {version} requires SP{min_sp}+ — Service Pack not detected")
+
+        if sp < min_sp:
+            return decision("REBUILD_REQUIRED", "CRITICAL", f"{family.upper()} {version} SP{sp} is not supported by AWS MGN")
+
+        return decision("MGN_SUPPORTED", "LOW", f"{family.upper()} {version} SP{sp} supported by AWS MGN")
+
+    if family == "windows":
+
+        if fingerprint.server or version >= 2000:
+            low, high = rules["server_supported_range"]
+            if low <= version <= high:
+                return decision("MGN_SUPPORTED", "LOW", "Supported Windows Server")
+
+        elif version in rules.get("client_supported", []):
+            return decision("MGN_SUPPORTED", "LOW", "Supported Windows Client")
+
+        if version in rules.get("conditional", []):
+            return decision("MGN_SUPPORTED_WITH_CONDITION", "MEDIUM", "Older Windows — upgrade recommended")
+
+        return decision("VM_IMPORT_EXPORT", "HIGH", "Not supported by MGN — use VM Import/Export")
+
+    ranges = list(rules.get("supported_minor_ranges", []))
+    if "supported_range" in rules:
+        ranges.append(rules["supported_range"])
+
+    if _in_any(ranges, version):
+        return decision("MGN_SUPPORTED", "LOW", "Supported by AWS MGN")
+
+    if version in rules.get("conditional", []):
+        return decision("MGN_SUPPORTED_WITH_CONDITION", "MEDIUM", "Supported but nearing deprecation")
+
+    if family in vmie.get("linux_families_supported", []):
+        return decision("VM_IMPORT_EXPORT", "HIGH", "Not supported by MGN — use VM Import/Export")
+
+    return decision("NEEDS_REVIEW", "UNKNOWN", "Unable to determine migration path")
+
+
+EXTRA_OS = [
+    "Microsoft Windows Server 2008 R2 (64-bit)",
+    "Microsoft Windows Server 2003 Standard (32-bit)",
+    "Microsoft Windows 7 (64-bit)",
+    "Microsoft Windows 11 (64-bit)",
+    "SUSE Linux Enterprise 11 SP4 (64-bit)",
+    "SUSE Linux Enterprise 11 SP2 (64-bit)",
+    "SUSE Linux Enterprise 11 (64-bit)",
+    "Oracle Linux 8.4 (64-bit)",
+    "Oracle Linux 8.5 (64-bit)",
+    "Oracle Linux 8.9 (64-bit)",
+    "Oracle Linux 9.5 (64-bit)",
+    "CentOS 4/5 or later (32-bit)",
+    "Red Hat Enterprise Linux",
+    "Other 3.x or later Linux (64-bit)",
+    "",
+]
+
+# Overlapping, adjacent and point ranges, service-pack and client rules
+EDGE_MGN = {
+    **MGN,
+    "oracle": {"supported_minor_ranges": [[6, 7], [6.5, 8], [8, 8]], "supported_range": [9, 9], "conditional": [5]},
+    "rhel": {"supported_range": [7, 7], "supported_minor_ranges": [[8, 9], [9, 10]], "conditional": [6, 7]},
+    "windows": {"server_supported_range": [2012, 2019], "client_supported": [10], "conditional": [2008, 2012, 7]},
+    "centos": {"special_rules": {7: {"min_sp": 2}}, "supported_range": [6, 8]},
+}
+
+
+@pytest.mark.parametrize("mgn", [MGN, EDGE_MGN], ids=["rule files", "edge rules"])
+def test_compiled_table_classifies_like_dict_lookups(mgn):
+
+    table = compile_rules(mgn, VMIE)
+    names, _ = os_catalogue(mgn)
+
+    for os_string in names + EXTRA_OS:
+        assert classify_os(os_string, table) == _dict_decision(mgn, VMIE, os_string), os_string
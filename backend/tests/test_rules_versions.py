@@ -0,0 +1,122 @@
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app import classifier, inventory
+from app.inventory import classify_partition
+from app.main import app
+from app.workers import WorkerHTTPError, _invoke
+
+
+RHEL6 = "Red Hat Enterprise Linux 6 (64-bit)"
+
+# RHEL 6 moves from conditional to supported
+RHEL_RANGE = ("supported_range: [7, 10]", "supported_range: [6, 10]")
+
+INVENTORY = (
+    "Name,Guest OS,CPU,RAM,Power State\n"
+    + "".join(f"vm-{i},{RHEL6},2,4,poweredOn\n" for i in range(6))
+)
+
+
+def _chunk():
+    return pd.DataFrame({"Name": ["vm-0"], "Guest OS": [RHEL6]})
+
+
+def _decisions(records):
+    return {record["decision"] for record in records}
+
+
+def _classify(client):
+    response = client.post("/classifier/classify", files={"file": ("inventory.csv", io.BytesIO(INVENTORY.encode()))})
+    response.raise_for_status()
+    return response.json()
+
+
+def test_rule_edit_between_partitions_keeps_one_version(monkeypatch, rule_files):
+
+    monkeypatch.setattr(inventory, "PARTITION_ROWS", 2)
+
+    read_chunks = inventory.read_inventory_chunks
+
+    def edit_after_first_chunk(file, chunksize):
+        for i, chunk in enumerate(read_chunks(file, chunksize)):
+            yield chunk
+            if i == 0:
+                # the poller swaps rules while the request is mid-upload
+                rule_files.edit("mgn_rules.yaml", *RHEL_RANGE)
+                assert classifier.reload_rules()
+
+    with TestClient(app) as client:
+
+        before = _classify(client)
+
+        monkeypatch.setattr(inventory, "read_inventory_chunks", edit_after_first_chunk)
+        during = _classify(client)
+
+        monkeypatch.setattr(inventory, "read_inventory_chunks", read_chunks)
+        after = _classify(client)
+
+    assert during == before
+    assert _decisions(before["data"]) == {"MGN_SUPPORTED_WITH_CONDITION"}
+    assert _decisions(after["data"]) == {"MGN_SUPPORTED"}
+
+
+def test_pinned_version_is_served_after_a_swap(rule_files):
+
+    old = classifier.RULES.version
+
+    rule_files.edit("mgn_rules.yaml", *RHEL_RANGE)
+    assert classifier.reload_rules()
+
+    records, _ = classify_partition((_chunk(), old))
+    assert _decisions(records) == {"MGN_SUPPORTED_WITH_CONDITION"}
+
+    records, _ = classify_partition((_chunk(), classifier.RULES.version))
+    assert _decisions(records) == {"MGN_SUPPORTED"}
+
+
+def test_unknown_version_is_a_retryable_error():
+
+    with pytest.raises(Exception) as raised:
+        classify_partition((_chunk(), "0" * 16))
+
+    assert raised.value.status_code == 503
+    assert raised.value.headers == {"Retry-After": "1"}
+
+
+def test_pool_workers_follow_the_pinned_version(rule_files):
+
+    spawn = multiprocessing.get_context("spawn")
+    old = classifier.RULES.version
+
+    with ProcessPoolExecutor(1, mp_context=spawn) as pool:
+
+        records, _ = pool.submit(_invoke, classify_partition, (_chunk(), old)).result()[0]
+        assert _decisions(records) == {"MGN_SUPPORTED_WITH_CONDITION"}
+
+        rule_files.edit("mgn_rules.yaml", *RHEL_RANGE)
+        assert classifier.reload_rules()
+        new = classifier.RULES.version
+
+        # the worker lags the parent: it catches up to the pinned version ...
+        records, _ = pool.submit(_invoke, classify_partition, (_chunk(), new)).result()[0]
+        assert _decisions(records) == {"MGN_SUPPORTED"}
+
+        # ... and still serves requests that started before the swap
+        records, _ = pool.submit(_invoke, classify_partition, (_chunk(), old)).result()[0]
+        assert _decisions(records) == {"MGN_SUPPORTED_WITH_CONDITION"}
+
+    # a worker started after the files moved on again cannot rebuild `new`
+    rule_files.edit("mgn_rules.yaml", "supported_range: [6, 10]", "supported_range: [6, 9]")
+
+    with ProcessPoolExecutor(1, mp_context=spawn) as pool:
+
+        with pytest.raises(WorkerHTTPError) as raised:
+            pool.submit(_invoke, classify_partition, (_chunk(), new)).result()
+
+    assert raised.value.status_code == 503
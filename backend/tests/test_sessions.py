@@ -0,0 +1,297 @@
+import base64
+import io
+import json
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app import sessions
+from app.main import app
+from app.sessions import SessionStore, decode_cursor, encode_cursor
+from benchmarks.synthetic import synthetic_inventory
+
+
+ROWS = 537
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def session(client):
+
+    csv = synthetic_inventory(ROWS, seed=11).to_csv(index=False).encode()
+
+    response = client.post("/classifier/sessions", files={"file": ("inventory.csv", io.BytesIO(csv))})
+    assert response.status_code == 201
+
+    body = response.json()
+    assert body["total"] == ROWS
+
+    return body["session_id"]
+
+
+def _rows(client, session_id, **params):
+    response = client.get(f"/classifier/sessions/{session_id}/rows", params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+def _walk(client, session_id, **params):
+    """
+    Every page of a query, following next_cursor.
+    """
+
+    pages = [_rows(client, session_id, **params)]
+
+    while pages[-1]["next_cursor"]:
+        pages.append(_rows(client, session_id, cursor=pages[-1]["next_cursor"], **params))
+
+    return pages
+
+
+def _all_rows(client, session_id):
+    return _rows(client, session_id, limit=1000)["data"]
+
+
+# ------------------------------------------------
+# CURSORS
+# ------------------------------------------------
+
+QUERY = {"sort": "-risk", "filters": {"decision": ["MGN_SUPPORTED"]}, "limit": 50}
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(250, QUERY), QUERY) == 250
+
+
+@pytest.mark.parametrize("other", [
+    {**QUERY, "sort": "risk"},
+    {**QUERY, "limit": 51},
+    {**QUERY, "filters": {"decision": ["MGN_SUPPORTED", "NEEDS_REVIEW"]}},
+    {**QUERY, "filters": {}},
+])
+def test_cursor_of_another_query_is_rejected(other):
+
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(encode_cursor(250, QUERY), other)
+
+    assert raised.value.status_code == 400
+    assert raised.value.detail == "Cursor does not belong to this query."
+
+
+def _b64(text):
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    "!!!!",
+    "é",
+    _b64("not json"),
+    _b64("[1, 2]"),
+    _b64('{"o": 10}'),
+    _b64('{"q": "abc"}'),
+    _b64('{"o": "ten", "q": "abc"}'),
+])
+def test_garbage_cursor_is_rejected(cursor):
+
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor, QUERY)
+
+    assert raised.value.status_code == 400
+
+
+def test_tampered_cursor_is_rejected():
+
+    token = json.loads(base64.urlsafe_b64decode(encode_cursor(250, QUERY)))
+    token["q"] = token["q"][:-1] + ("0" if token["q"][-1] != "0" else "1")
+
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(_b64(json.dumps(token)), QUERY)
+
+    assert raised.value.status_code == 400
+
+
+def test_route_rejects_cursor_reused_with_other_query(client, session):
+
+    first = _rows(client, session, limit=100, sort="decision")
+
+    response = client.get(
+        f"/classifier/sessions/{session}/rows",
+        params={"limit": 100, "sort": "-decision", "cursor": first["next_cursor"]},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor does not belong to this query."
+
+
+def test_route_rejects_garbage_cursor(client, session):
+
+    response = client.get(f"/classifier/sessions/{session}/rows", params={"cursor": "garbage"})
+
+    assert response.status_code == 400
+
+
+# ------------------------------------------------
+# FILTERS AND SORTING
+# ------------------------------------------------
+
+def test_combined_filters(client, session):
+
+    rows = _all_rows(client, session)
+
+    decisions = {"MGN_SUPPORTED", "NEEDS_REVIEW"}
+    risks = {"LOW", "CRITICAL"}
+
+    expected = [
+        r for r in rows
+        if r["decision"] in decisions and r["risk"] in risks and r["Power State"] == "poweredOn"
+    ]
+
+    page = _rows(
+        client, session,
+        limit=1000,
+        decision="MGN_SUPPORTED,NEEDS_REVIEW",
+        risk=["LOW", "CRITICAL"],
+        power_state="poweredOn",
+    )
+
+    assert expected
+    assert page["total"] == len(expected)
+    assert page["data"] == expected
+
+    groups = client.get(
+        f"/classifier/sessions/{session}/groups",
+        params={"by": "risk", "decision": "MGN_SUPPORTED,NEEDS_REVIEW", "risk": ["LOW", "CRITICAL"], "power_state": "poweredOn"},
+    ).json()
+
+    assert groups["total"] == len(expected)
+    assert sum(groups["counts"].values()) == len(expected)
+
+
+def test_filter_on_unknown_value_matches_nothing(client, session):
+
+    page = _rows(client, session, decision="NO_SUCH_DECISION")
+
+    assert page["total"] == 0
+    assert page["data"] == []
+    assert page["next_cursor"] is None
+
+
+@pytest.mark.parametrize("sort", ["decision", "-decision", "CPU", "-RAM", "VM Name"])
+def test_sort_is_stable_across_pages(client, session, sort):
+
+    rows = _all_rows(client, session)
+
+    column = sort.lstrip("-")
+    descending = sort.startswith("-")
+
+    # stable both ways: ties keep upload order
+    expected = sorted(rows, key=lambda row: row[column], reverse=descending)
+
+    pages = _walk(client, session, sort=sort, limit=100)
+    walked = [row for page in pages for row in page["data"]]
+
+    assert [page["offset"] for page in pages] == list(range(0, ROWS, 100))
+    assert walked == expected
+    assert pages[-1]["next_cursor"] is None
+
+
+def test_unknown_sort_column(client, session):
+
+    response = client.get(f"/classifier/sessions/{session}/rows", params={"sort": "nope"})
+
+    assert response.status_code == 400
+
+
+# ------------------------------------------------
+# STORE
+# ------------------------------------------------
+
+class _Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(sessions.time, "monotonic", clock)
+    return clock
+
+
+def _expect_gone(store, session_id):
+
+    with pytest.raises(HTTPException) as raised:
+        store.get(session_id)
+
+    assert raised.value.status_code == 404
+
+
+def test_least_recently_used_is_evicted(clock):
+
+    store = SessionStore(max_sessions=2, ttl=0)
+
+    a = store.add(object())
+    b = store.add(object())
+
+    store.get(a)  # a is now more recent than b
+
+    c = store.add(object())
+
+    _expect_gone(store, b)
+    assert store.get(a) is not None
+    assert store.get(c) is not None
+
+
+def test_idle_sessions_expire(clock):
+
+    store = SessionStore(max_sessions=4, ttl=60)
+
+    a = store.add(object())
+    b = store.add(object())
+
+    clock.now += 45
+    store.get(b)
+
+    clock.now += 30
+
+    _expect_gone(store, a)
+    assert store.get(b) is not None
+
+    clock.now += 61
+
+    _expect_gone(store, b)
+
+
+def test_removed_session(client, session):
+
+    store = SessionStore()
+    session_id = store.add(object())
+
+    assert store.remove(session_id)
+    assert not store.remove(session_id)
+    _expect_gone(store, session_id)
+
+    assert client.delete("/classifier/sessions/unknown").status_code == 404
+
+
+def test_postings_match_column_values(client, session):
+
+    stored = sessions.SESSIONS.get(session)
+
+    for column, postings in stored.postings.items():
+        values = stored.frame[column].astype(object).to_numpy()
+        for value, rows in postings.items():
+            assert (values[rows] == value).all()
+            assert np.all(np.diff(rows) > 0)
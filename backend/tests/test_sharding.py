@@ -0,0 +1,276 @@
+import csv
+import io
+import json
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from app.template_engine.generator import ShardWriterPool, TemplateGenerator
+from app.template_engine.mapper import TemplateMapper
+from app.template_engine.pipeline import generate_sharded_templates
+from app.template_engine.record_batch import RecordBatch
+from app.template_engine.sharding import (
+    MISSING_TARGET,
+    ShardRouter,
+    flag_missing_targets,
+    split_by_target,
+)
+
+
+RULES = {
+    "column": "Cluster",
+    "rules": [
+        {"match": "^prod", "account_id": "111111111111", "region": "us-east-1"},
+        {"match": "prod|dev", "account_id": "222222222222"},
+        {"match": "eu", "region": "eu-west-1"},
+    ],
+}
+
+
+def _header(columns):
+    return {str(c).strip().lower(): c for c in columns}
+
+
+def _route(router, df):
+    return router.route(df, router.resolve_columns(_header(df.columns)))
+
+
+# ------------------------------------------------
+# ROUTING
+# ------------------------------------------------
+
+def test_row_columns_win_over_rules_and_defaults():
+
+    df = pd.DataFrame({
+        "Account ID": ["333333333333", " ", None, "444444444444"],
+        "Region": [None, "ap-south-1", None, "eu-central-1"],
+        "Cluster": ["prod-a", "prod-b", "dev-eu", "misc"],
+    })
+
+    router = ShardRouter.from_spec("999999999999", "us-west-2", RULES)
+
+    accounts, regions = _route(router, df)
+
+    assert accounts == ["333333333333", "111111111111", "222222222222", "444444444444"]
+    assert regions == ["us-east-1", "ap-south-1", "eu-west-1", "eu-central-1"]
+
+
+def test_first_matching_rule_wins_per_field():
+
+    df = pd.DataFrame({"Cluster": ["PROD-eu", "dev", "eu-only", None]})
+
+    accounts, regions = _route(ShardRouter.from_spec(None, None, RULES), df)
+
+    # patterns are case-insensitive; a rule that sets only one field
+    # leaves the other to later rules
+    assert accounts == ["111111111111", "222222222222", None, None]
+    assert regions == ["us-east-1", None, "eu-west-1", None]
+
+
+def test_defaults_fill_what_is_left():
+
+    df = pd.DataFrame({"Cluster": ["eu-only", "other"]})
+
+    accounts, regions = _route(ShardRouter.from_spec("999999999999", "us-west-2", RULES), df)
+
+    assert accounts == ["999999999999", "999999999999"]
+    assert regions == ["eu-west-1", "us-west-2"]
+
+
+def test_without_rules_or_columns_every_row_gets_the_defaults():
+
+    df = pd.DataFrame({"Name": ["a", "b"]})
+
+    assert _route(ShardRouter("1", "r"), df) == (["1", "1"], ["r", "r"])
+
+
+@pytest.mark.parametrize("spec, message", [
+    (["Cluster"], "routing must be a JSON object."),
+    ({"column": "Cluster", "rules": {"match": "a"}}, "routing.rules must be a list."),
+    ({"rules": [{"match": "a", "region": "r"}]}, "routing.column is required with routing rules."),
+    ({"column": "c", "rules": [{"region": "r"}]}, "routing.rules[0] needs a 'match' pattern."),
+    ({"column": "c", "rules": [{"match": "a"}]}, "routing.rules[0] sets neither account_id nor region."),
+    ({"column": "c", "rules": [{"match": "(", "region": "r"}]}, "routing.rules[0]: invalid pattern"),
+])
+def test_malformed_routing(spec, message):
+
+    with pytest.raises(ValueError) as raised:
+        ShardRouter.from_spec("1", "r", spec)
+
+    assert str(raised.value).startswith(message)
+
+
+def test_missing_rule_column_is_a_400():
+
+    router = ShardRouter.from_spec(None, None, RULES)
+
+    with pytest.raises(HTTPException) as raised:
+        router.resolve_columns(_header(["Name", "Guest OS"]))
+
+    assert raised.value.status_code == 400
+
+
+# ------------------------------------------------
+# BATCH STAGES
+# ------------------------------------------------
+
+def _mapped(accounts, regions, os_values=None):
+
+    n = len(accounts)
+    batch = RecordBatch(
+        vm_name=[f"vm-{i}" for i in range(n)],
+        os=os_values or ["Ubuntu Linux (64-bit)"] * n,
+        ip=[f"10.0.0.{i}" for i in range(n)],
+        account_id=accounts,
+        region=regions,
+    )
+
+    return TemplateMapper("", "").map_batch(batch)
+
+
+def test_rows_without_a_target_are_flagged():
+
+    mapped = _mapped(
+        ["1", None, "1", "2"],
+        ["r", "r", None, "r"],
+        ["Ubuntu Linux (64-bit)", "Ubuntu Linux (64-bit)", "Solaris 10", "Ubuntu Linux (64-bit)"],
+    )
+
+    (flagged,) = flag_missing_targets([mapped])
+
+    assert flagged.mapping_error[0] is None
+    assert flagged.mapping_error[1] == MISSING_TARGET
+    # an earlier mapping error is kept
+    assert flagged.mapping_error[2].startswith("Unknown OS platform")
+    assert flagged.mapping_error[3] is None
+
+
+def test_split_by_target_in_order_of_first_appearance():
+
+    mapped = _mapped(["1", "2", "1", "2", "1"], ["r", "r", "r", "s", "r"])
+
+    shards = list(split_by_target([mapped]))
+
+    assert [(s.account_id, s.region) for s in shards] == [("1", "r"), ("2", "r"), ("2", "s")]
+    assert [s.server_id for s in shards] == [["vm-0", "vm-2", "vm-4"], ["vm-1"], ["vm-3"]]
+
+
+def test_single_target_batch_is_passed_through():
+
+    mapped = _mapped(["1", "1"], ["r", "r"])
+
+    (shard,) = split_by_target([mapped])
+
+    assert shard is mapped
+    assert (shard.account_id, shard.region) == ("1", "r")
+
+
+# ------------------------------------------------
+# WRITER POOL
+# ------------------------------------------------
+
+def _read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_pool_closes_least_recently_used_and_appends_on_reopen(tmp_path):
+
+    pool = ShardWriterPool(str(tmp_path), ["a", "b"], max_open=2)
+
+    pool.writer("1", "r").writerow(["1r", 0])
+    pool.writer("2", "r").writerow(["2r", 0])
+    pool.writer("1", "r").writerow(["1r", 1])   # 2/r is now least recent
+
+    pool.writer("3", "r").writerow(["3r", 0])   # closes 2/r
+    assert set(pool._open) == {("1", "r"), ("3", "r")}
+
+    pool.writer("2", "r").writerow(["2r", 1])   # reopened for append, closes 1/r
+    assert set(pool._open) == {("3", "r"), ("2", "r")}
+
+    pool.close()
+    assert not pool._open
+
+    assert _read(pool.paths["1", "r"]) == [["a", "b"], ["1r", "0"], ["1r", "1"]]
+    assert _read(pool.paths["2", "r"]) == [["a", "b"], ["2r", "0"], ["2r", "1"]]
+    assert _read(pool.paths["3", "r"]) == [["a", "b"], ["3r", "0"]]
+
+
+def test_colliding_shard_names_get_distinct_files(tmp_path):
+
+    pool = ShardWriterPool(str(tmp_path), ["a"], max_open=1)
+
+    pool.writer("1/2", "r")
+    pool.writer("1:2", "r")
+    pool.close()
+
+    assert len(set(pool.paths.values())) == 2
+
+
+def test_write_shards_counts_rows_per_shard(tmp_path):
+
+    batches = [
+        _mapped(["1", "2", "1"], ["r", "r", "r"]),
+        _mapped(["3", "1"], ["r", "r"]),
+        _mapped(["2"], ["r"]),
+    ]
+
+    shards = TemplateGenerator().write_shards(split_by_target(batches), str(tmp_path), max_open=1)
+
+    counts = {(s.account_id, s.region): s.rows for s in shards}
+    assert counts == {("1", "r"): 3, ("2", "r"): 2, ("3", "r"): 1}
+
+    for shard in shards:
+        assert len(_read(shard.path)) == shard.rows + 1
+
+
+# ------------------------------------------------
+# END TO END
+# ------------------------------------------------
+
+INVENTORY = (
+    "Name,Guest OS,IP Address,Cluster,Account ID\n"
+    "web-01,Ubuntu Linux (64-bit),10.0.0.1,prod-a,\n"
+    "web-02,Ubuntu Linux (64-bit),10.0.0.2,dev-eu,\n"
+    "db-01,Microsoft Windows Server 2019 (64-bit),10.0.0.3,prod-b,555555555555\n"
+    "lab-01,Ubuntu Linux (64-bit),10.0.0.4,lab,\n"
+    "web-03,Ubuntu Linux (64-bit),10.0.0.5,prod-c,\n"
+)
+
+
+def test_summary_counts_rows_per_shard(tmp_path):
+
+    output = tmp_path / "shards.zip"
+
+    counts = generate_sharded_templates(
+        io.BytesIO(INVENTORY.encode()), None, "us-west-2", RULES, str(output), chunksize=2
+    )
+
+    shards = {(s["account_id"], s["region"]): s for s in counts["shards"]}
+
+    assert {key: s["ready"] for key, s in shards.items()} == {
+        ("111111111111", "us-east-1"): 2,
+        ("222222222222", "eu-west-1"): 1,
+        # own account column, region from the ^prod rule
+        ("555555555555", "us-east-1"): 1,
+    }
+
+    assert counts["ready"] == 4
+    assert counts["mapping_failures"] == 1
+
+    with zipfile.ZipFile(output) as archive:
+
+        summary = json.loads(archive.read("summary.json"))
+        assert summary["shards"] == counts["shards"]
+
+        for shard in shards.values():
+            rows = list(csv.reader(io.StringIO(archive.read(shard["file"]).decode())))
+            assert len(rows) == shard["ready"] + 1
+
+        failures = archive.read("failures.csv").decode()
+        assert "lab-01" in failures and MISSING_TARGET in failures
+
+    assert not os.path.exists(tmp_path / "work")
@@ -0,0 +1,44 @@
+import io
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.template_engine.pipeline import generate_template_csv
+from benchmarks.synthetic import synthetic_inventory
+
+
+ACCOUNT = {"account_id": "123456789012", "region": "us-east-1"}
+
+
+def _template(client, csv):
+    return client.post(
+        "/template/generate-mgn-template",
+        files={"file": ("inventory.csv", io.BytesIO(csv.encode()))},
+        data=ACCOUNT,
+    )
+
+
+def test_streamed_template_matches_the_written_one(tmp_path):
+
+    inventory = tmp_path / "inventory.csv"
+    synthetic_inventory(400, seed=5).to_csv(inventory, index=False)
+
+    written = tmp_path / "ready.csv"
+    counts = generate_template_csv(str(inventory), ACCOUNT["account_id"], ACCOUNT["region"], str(written))
+
+    with TestClient(app) as client:
+        response = _template(client, inventory.read_text())
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.content == written.read_bytes()
+    assert response.content.count(b"\n") == counts["ready"] + 1
+
+
+def test_no_valid_servers_is_a_400():
+
+    with TestClient(app) as client:
+        response = _template(client, "Name,Guest OS,IP Address\nvm-0,Solaris 10,10.0.0.1\n")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "No valid servers found."
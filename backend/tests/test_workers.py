@@ -0,0 +1,150 @@
+import io
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app import classifier, workers
+from app.inventory import classify_partition
+from app.main import app
+from app.metrics import METRICS
+from app.template_engine.pipeline import generate_template_csv
+from app.workers import _invoke, imap_partitions
+from benchmarks.synthetic import synthetic_inventory
+
+
+def _chunk():
+    return pd.DataFrame({
+        "Name": ["vm-0", "vm-1", "vm-2"],
+        "Guest OS": ["Ubuntu Linux (64-bit)", "Ubuntu Linux (64-bit)", "Microsoft Windows Server 2019 (64-bit)"],
+    })
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(workers, "WORKER_POOL_SIZE", 1)
+    yield
+    workers.shutdown_pool()
+
+
+def test_cache_stats_include_worker_lookups():
+
+    before = classifier.cache_stats()
+
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for _ in range(2):
+            _, metrics = pool.submit(_invoke, classify_partition, (_chunk(), classifier.RULES.version)).result()
+            METRICS.merge(metrics)
+
+    after = classifier.cache_stats()
+
+    # one lookup per distinct string: missed by the first task, hit by the second
+    assert after["workers"]["misses"] - before["workers"]["misses"] == 2
+    assert after["workers"]["hits"] - before["workers"]["hits"] == 2
+
+    assert after["hits"] - before["hits"] == 2
+    assert after["misses"] - before["misses"] == 2
+
+
+def test_imap_partitions_keeps_order(pool):
+
+    version = classifier.RULES.version
+    items = [(frame, version) for frame in (_chunk(), _chunk().iloc[::-1], _chunk().iloc[:1])]
+
+    expected = [classify_partition(item) for item in items]
+
+    assert list(imap_partitions(classify_partition, items, window=2)) == expected
+
+
+def test_imap_partitions_raises_worker_http_errors(pool):
+
+    with pytest.raises(HTTPException) as raised:
+        list(imap_partitions(classify_partition, [(_chunk(), "0" * 16)]))
+
+    assert raised.value.status_code == 503
+
+
+def test_classify_job_runs_in_the_pool(pool, tmp_path):
+
+    path = tmp_path / "inventory.parquet"
+    synthetic_inventory(300, seed=3).to_parquet(path)
+
+    with TestClient(app) as client:
+
+        expected = client.post(
+            "/classifier/classify", files={"file": ("inventory.parquet", io.BytesIO(path.read_bytes()))}
+        ).json()
+
+        job = client.post(
+            "/classifier/jobs", files={"file": ("inventory.parquet", io.BytesIO(path.read_bytes()))}
+        ).json()
+
+        status = _finish(client, job)
+        assert status["status"] == "done", status["error"]
+
+        result = client.get(f"/jobs/{job['job_id']}/result").json()
+
+    assert result["data"] == expected["data"]
+    assert result["total"] == 300
+
+
+
+def _finish(client, job):
+
+    for _ in range(300):
+        status = client.get(f"/jobs/{job['job_id']}").json()
+        if status["status"] not in ("queued", "running"):
+            return status
+        time.sleep(0.1)
+
+    raise AssertionError("job did not finish")
+
+
+@pytest.mark.parametrize("format", ["csv", "zip"])
+def test_template_job_runs_in_the_pool(pool, tmp_path, format):
+
+    inventory = tmp_path / "inventory.csv"
+    synthetic_inventory(300, seed=4).to_csv(inventory, index=False)
+
+    account = {"account_id": "123456789012", "region": "us-east-1"}
+    expected = generate_template_csv(str(inventory), account["account_id"], account["region"], str(tmp_path / "ready.csv"))
+
+    with TestClient(app) as client:
+
+        job = client.post(
+            "/template/jobs",
+            files={"file": ("inventory.csv", io.BytesIO(inventory.read_bytes()))},
+            data={**account, "format": format},
+        ).json()
+
+        status = _finish(client, job)
+        result = client.get(f"/jobs/{job['job_id']}/result")
+
+    assert status["status"] == "done", status["error"]
+    assert status["rows_processed"] == 300
+    assert status["summary"]["ready"] == expected["ready"]
+
+    if format == "csv":
+        assert result.content == (tmp_path / "ready.csv").read_bytes()
+    else:
+        assert result.content[:4] == b"PK\x03\x04"
+
+
+def test_template_job_without_valid_servers_fails(pool):
+
+    with TestClient(app) as client:
+
+        job = client.post(
+            "/template/jobs",
+            files={"file": ("inventory.csv", io.BytesIO(b"Name,Guest OS,IP Address\nvm-0,Solaris 10,10.0.0.1\n"))},
+            data={"account_id": "123456789012", "region": "us-east-1"},
+        ).json()
+
+        status = _finish(client, job)
+
+    assert status["status"] == "failed"
+    assert status["error"] == "No valid servers found."